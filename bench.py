@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import datetime
+from itertools import islice
+
+import data_store
+from data_store import DataStore, JsonBackend, save_data
+from schema import stamp
+from category_index import CategoryIndex
+from cost_engine import CostIndex
+from crafting import CraftError, CraftQueue, apply_craft
+from profit_rollup import ProfitRollup
+from sales import complete_sale, register_sale, unfinished
+
+# 합성 데이터로 핵심 계산/저장 경로 시간 측정 (GUI 없이, 같은 seed 면 같은 데이터)
+# 사용법: python bench.py [--scale small,medium] [--out 결과.json] [--baseline 기준.json] [--save-baseline 기준.json]
+SCALES = {
+    # 재료 수, 판매 기록 수
+    "small": (1000, 10000),
+    "medium": (10000, 100000),
+    "large": (100000, 1000000),
+}
+ENCHANTS = 5
+CHAIN_FAMILIES = ("주괴", "판자", "가죽", "직물", "블록")
+CHAIN_DEPTH = 8
+PAGE_SIZE = 200
+OPS = 20                 # 저장이 일어나는 작업은 몇 번만 (--ops)
+REGRESSION = 1.25        # 기준보다 이만큼 느리면 회귀
+DONE = "판매완료"
+
+
+def generate(base_dir, n_materials, n_sales, seed=0):
+    # category.json / material_data.json / recipes.json / sale_data.json 생성
+    rnd = random.Random(seed)
+    # 카테고리: 8 x 6 x 4 트리
+    tree = {}
+    leaves = []
+    for a in range(8):
+        sub_a = {}
+        for b in range(6):
+            sub_b = {}
+            for c in range(4):
+                sub_b[str(c)] = {"name": f"분류{a}-{b}-{c}"}
+                leaves.append([a, b, c])
+            sub_a[str(b)] = {"name": f"분류{a}-{b}", "category": sub_b}
+        tree[str(a)] = {"name": f"분류{a}", "category": sub_a}
+
+    def enchant_block(count):
+        return {str(e): {
+            "buy_price": rnd.randint(10, 5000),
+            "fee": rnd.randint(0, 200),
+            "count": count,
+            "market_price": rnd.randint(10, 8000),
+            "market_price_time": "2025-07-01 12:00:00",
+        } for e in range(ENCHANTS)}
+
+    materials = {}
+    recipes = {}
+    # 주괴 같은 단계형 체인: n단계 = 광석 n 2개 + (n-1)단계 1개
+    for family in CHAIN_FAMILIES:
+        for tier in range(1, CHAIN_DEPTH + 1):
+            ore = f"{family}원료{tier}"
+            item = f"{family}{tier}"
+            materials[ore] = {"category": rnd.choice(leaves), "enchant": enchant_block(10 ** 7)}
+            materials[item] = {"category": rnd.choice(leaves), "enchant": enchant_block(10 ** 6)}
+            mats = {ore: 2}
+            if tier > 1:
+                mats[f"{family}{tier - 1}"] = 1
+            recipes[item] = {"name": item, "output_count": 1, "materials": mats}
+    tops = [f"{family}{CHAIN_DEPTH}" for family in CHAIN_FAMILIES]
+    names = list(materials)
+    i = 0
+    while len(materials) < n_materials:
+        name = f"재료{i:06d}"
+        i += 1
+        materials[name] = {"category": rnd.choice(leaves), "enchant": enchant_block(rnd.randint(0, 500))}
+        if i % 10 == 0:
+            # 일부는 체인 위 단계와 다른 재료를 쓰는 완성품
+            mats = {rnd.choice(tops): rnd.randint(1, 4)}
+            for mat in rnd.sample(names, 2):
+                mats.setdefault(mat, rnd.randint(1, 8))
+            recipes[name] = {"name": name, "output_count": rnd.randint(1, 5), "materials": mats}
+        names.append(name)
+
+    start = datetime.datetime(2025, 1, 1)
+    sales = []
+    for i in range(n_sales):
+        item = rnd.choice(names)
+        count = rnd.randint(1, 50)
+        unit_cost = rnd.randint(10, 5000)
+        unit_price = unit_cost + rnd.randint(-500, 1500)
+        registered = start + datetime.timedelta(minutes=rnd.randint(0, 525600))
+        sale = {
+            "id": f"bench-{i}",
+            "item": item,
+            "enchant": rnd.randrange(ENCHANTS),
+            "unit_buy_price": unit_cost,
+            "unit_fee": 0,
+            "unit_cost": unit_cost,
+            "count": count,
+            "total_cost": unit_cost * count,
+            "unit_sale_price": unit_price,
+            "total_sale_price": unit_price * count,
+            "profit": (unit_price - unit_cost) * count,
+            "registered_time": registered.isoformat(sep=" ", timespec="seconds"),
+        }
+        if rnd.random() < 0.7:
+            sale["status"] = DONE
+            sale["sold_time"] = (registered + datetime.timedelta(hours=rnd.randint(1, 72))).isoformat(sep=" ", timespec="seconds")
+        sales.append(sale)
+
+    # 현재 형식 버전으로 저장 (불러올 때 예전 형식 변환을 거치지 않게)
+    save_data(os.path.join(base_dir, data_store.CATEGORY_FILE), stamp("categories", tree))
+    save_data(os.path.join(base_dir, data_store.DATA_FILE), stamp("materials", materials))
+    save_data(os.path.join(base_dir, data_store.RECIPE_FILE), stamp("recipes", recipes))
+    save_data(os.path.join(base_dir, data_store.SALE_FILE), stamp("sales", sales))
+    return {"materials": len(materials), "recipes": len(recipes), "sales": len(sales)}
+
+
+def open_store(base_dir):
+    return DataStore(base_dir, JsonBackend(base_dir))
+
+
+def _load(base_dir):
+    store = open_store(base_dir)
+    store.materials(), store.recipes(), store.categories(), len(store.sales())
+    return 1
+
+
+# 각 측정 함수: (ctx) -> 작업 수. ctx 는 scale 별로 하나 (dir, store, rnd)
+
+def bench_load_json(ctx):
+    # 캐시 없이 json 파싱
+    data_store.SNAPSHOT_CACHE = False
+    try:
+        return _load(ctx["dir"])
+    finally:
+        data_store.SNAPSHOT_CACHE = True
+
+
+def bench_load_cached(ctx):
+    # 스냅샷 캐시가 있는 상태의 시작
+    return _load(ctx["dir"])
+
+
+def bench_calc_cost_cold(ctx):
+    # 모든 레시피 원가를 처음부터
+    index = CostIndex(ctx["store"])
+    for name in ctx["recipes"]:
+        index.cost(name)
+    ctx["store"].remove_listener(index._on_store_change)
+    return len(ctx["recipes"])
+
+
+def bench_calc_cost_incremental(ctx):
+    # 체인 맨 아래 원료 가격이 바뀐 뒤 다시 조회 (바뀐 부분만 재계산)
+    store, index = ctx["store"], ctx["cost_index"]
+    ore = f"{CHAIN_FAMILIES[0]}원료1"
+    meta = store.material(ore)
+    meta["enchant"]["0"]["market_price"] += 1
+    store.put_material(ore, meta)
+    for name in ctx["recipes"]:
+        index.cost(name)
+    return len(ctx["recipes"])
+
+
+def bench_make_recipe(ctx):
+    store = ctx["store"]
+    for _ in range(ctx["ops"]):
+        try:
+            apply_craft(store, f"{ctx['rnd'].choice(CHAIN_FAMILIES)}{CHAIN_DEPTH}", 1)
+        except CraftError:
+            pass
+    return ctx["ops"]
+
+
+def bench_craft_queue(ctx):
+    # make_recipe 와 같은 제작을 대기열로 모아서 한 번에 저장
+    store, rnd = ctx["store"], ctx["rnd"]
+    queue = CraftQueue(store)
+    for _ in range(ctx["ops"]):
+        queue.add(f"{rnd.choice(CHAIN_FAMILIES)}{CHAIN_DEPTH}", 1)
+    try:
+        queue.commit()
+    except CraftError:
+        pass
+    return ctx["ops"]
+
+
+def bench_register_sale(ctx):
+    store, rnd = ctx["store"], ctx["rnd"]
+    for _ in range(ctx["ops"]):
+        register_sale(store, f"{rnd.choice(CHAIN_FAMILIES)}원료1", rnd.randrange(ENCHANTS), 1, 100)
+    return ctx["ops"]
+
+
+def bench_refresh_sales(ctx):
+    # 수익 정산 창: 미완료 판매 첫 페이지
+    page = list(islice(unfinished(ctx["store"].sales()), PAGE_SIZE))
+    return len(page) and 1
+
+
+def bench_profit_rollup(ctx):
+    # 수익 통계: 전체 집계 생성 + 조회
+    rollup = ProfitRollup(ctx["store"])
+    rollup.query(("status", "week"))
+    ctx["store"].remove_listener(rollup._on_store_change)
+    return 1
+
+
+def bench_complete_sale(ctx):
+    store = ctx["store"]
+    todo = list(islice(unfinished(store.sales()), ctx["ops"]))
+    for idx, _ in todo:
+        complete_sale(store, idx)
+    return len(todo)
+
+
+def bench_category_navigation(ctx):
+    # 카테고리 인덱스 생성 + 모든 노드의 자식 목록 + 필터별 아이템
+    store = ctx["store"]
+    index = CategoryIndex(store.categories(), store.materials())
+    ops = 0
+    for path in index.flat:
+        index.child_list(path)
+        index.items_under(path)
+        ops += 1
+    return ops
+
+
+BENCHES = [
+    ("load_json", bench_load_json),
+    ("load_cached", bench_load_cached),
+    ("calc_cost_cold", bench_calc_cost_cold),
+    ("calc_cost_incremental", bench_calc_cost_incremental),
+    ("make_recipe", bench_make_recipe),
+    ("craft_queue", bench_craft_queue),
+    ("register_sale", bench_register_sale),
+    ("refresh_sales", bench_refresh_sales),
+    ("profit_rollup", bench_profit_rollup),
+    ("complete_sale", bench_complete_sale),
+    ("category_navigation", bench_category_navigation),
+]
+
+
+def run_scale(scale, repeat=3, seed=0, only=None, ops=OPS, log=None):
+    n_materials, n_sales = SCALES[scale]
+    base_dir = tempfile.mkdtemp(prefix=f"bench-{scale}-")
+    try:
+        t = time.perf_counter()
+        sizes = generate(base_dir, n_materials, n_sales, seed)
+        if log:
+            log(f"[{scale}] 데이터 생성 {time.perf_counter() - t:.1f}s {sizes}")
+        _load(base_dir)  # 스냅샷 캐시 생성
+        store = open_store(base_dir)
+        ctx = {
+            "dir": base_dir,
+            "store": store,
+            "rnd": random.Random(seed),
+            "recipes": sorted(store.recipes()),
+            "cost_index": CostIndex(store),
+            "ops": ops,
+        }
+        results = {}
+        for name, fn in BENCHES:
+            if only and name not in only:
+                continue
+            times = []
+            ops = 1
+            for _ in range(repeat):
+                t = time.perf_counter()
+                ops = fn(ctx) or 1
+                times.append(time.perf_counter() - t)
+            results[name] = {
+                "median_ms": round(statistics.median(times) * 1000, 3),
+                "min_ms": round(min(times) * 1000, 3),
+                "per_op_ms": round(statistics.median(times) * 1000 / ops, 4),
+                "ops": ops,
+                "repeat": repeat,
+            }
+            if log:
+                log(f"[{scale}] {name}: {results[name]['median_ms']:.1f} ms ({ops} ops)")
+        return {"sizes": sizes, "results": results}
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def compare(report, baseline, threshold=REGRESSION):
+    # 기준과 같은 scale/측정만 비교, [(scale, 이름, 기준 ms, 현재 ms, 비율)] 중 회귀만
+    regressions = []
+    for scale, current in report["scales"].items():
+        base = baseline.get("scales", {}).get(scale, {}).get("results", {})
+        for name, row in current["results"].items():
+            if name not in base or not base[name]["median_ms"]:
+                continue
+            ratio = row["median_ms"] / base[name]["median_ms"]
+            row["baseline_ms"] = base[name]["median_ms"]
+            row["ratio"] = round(ratio, 3)
+            if ratio > threshold:
+                regressions.append((scale, name, base[name]["median_ms"], row["median_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 데이터 벤치마크")
+    parser.add_argument("--scale", default="small,medium", help=f"{','.join(SCALES)} 중 쉼표로")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="측정 이름 쉼표로")
+    parser.add_argument("--ops", type=int, default=OPS, help="저장이 일어나는 측정의 반복 수")
+    parser.add_argument("--out", help="결과 json 파일 (없으면 표준출력)")
+    parser.add_argument("--baseline", help="비교할 기준 json")
+    parser.add_argument("--save-baseline", help="결과를 기준 json 으로 저장")
+    parser.add_argument("--threshold", type=float, default=REGRESSION)
+    args = parser.parse_args(argv)
+
+    scales = args.scale.split(",")
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"알 수 없는 scale: {', '.join(unknown)}")
+    only = set(args.only.split(",")) if args.only else None
+    log = lambda msg: print(msg, file=sys.stderr)
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "ops": args.ops,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "scales": {scale: run_scale(scale, args.repeat, args.seed, only, args.ops, log) for scale in scales},
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report["regressions"] = [
+            {"scale": s, "name": n, "baseline_ms": b, "median_ms": c, "ratio": round(r, 3)}
+            for s, n, b, c, r in regressions
+        ]
+        for s, n, b, c, r in regressions:
+            log(f"회귀: [{s}] {n} {b:.1f} -> {c:.1f} ms (x{r:.2f})")
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+from bisect import bisect_left
+from collections.abc import Mapping
+from data_store import get_store
+
+
+class CategoryIndex:
+    # category.json 트리를 한 번만 훑어서 만든 인덱스
+    #   path: 인덱스 튜플 (예: (0, 0, 3)), () 는 최상위
+    #   children[path] = 정렬된 [(idx, 이름), ...], row[(path, idx)] = 콤보 안 위치
+    #   names[path] = 이름 튜플, paths[이름 튜플] = path, items[path] = 그 카테고리 아이템들
+    def __init__(self, tree, materials=None):
+        self.tree = tree
+        self.children = {}
+        self.row = {}
+        self.names = {(): ()}
+        self.paths = {(): ()}
+        stack = [((), tree)]
+        while stack:
+            path, node = stack.pop()
+            kids = sorted(((int(k), v) for k, v in node.items() if isinstance(v, Mapping)), key=lambda kv: kv[0]) if isinstance(node, Mapping) else []
+            self.children[path] = [(idx, child.get("name", "")) for idx, child in kids]
+            for pos, (idx, child) in enumerate(kids):
+                sub = path + (idx,)
+                self.row[(path, idx)] = pos
+                self.names[sub] = self.names[path] + (child.get("name", ""),)
+                self.paths[self.names[sub]] = sub
+                stack.append((sub, child.get("category", {})))
+        self.flat = sorted(self.names)
+        self.items = {}
+        self._item_path = {}
+        if materials is not None:
+            # store.materials() 는 카테고리만 읽어 옴 (재료 레코드 전체를 만들지 않음)
+            if hasattr(materials, "field_items"):
+                categories = materials.field_items("category")
+            else:
+                categories = ((item, meta.get("category")) for item, meta in materials.items())
+            for item, category in categories:
+                self.set_item(item, category)
+
+    def child_list(self, path=()):
+        return self.children.get(tuple(path), [])
+
+    def position(self, path, idx):
+        # 부모 path 의 자식 목록 안에서 idx 의 위치 (없으면 -1)
+        return self.row.get((tuple(path), idx), -1)
+
+    def valid(self, path):
+        return tuple(path) in self.names
+
+    def name_path(self, path):
+        # 유효한 앞부분까지의 이름 목록
+        path = tuple(path)
+        while path not in self.names:
+            path = path[:-1]
+        return list(self.names[path])
+
+    def path_of(self, names):
+        return self.paths.get(tuple(names))
+
+    def set_item(self, item, category):
+        old = self._item_path.pop(item, None)
+        if old is not None:
+            self.items[old].discard(item)
+            if not self.items[old]:
+                del self.items[old]
+        if category is None:
+            return
+        path = tuple(category)
+        self._item_path[item] = path
+        self.items.setdefault(path, set()).add(item)
+
+    def items_under(self, path=()):
+        # path 와 그 하위 카테고리에 속한 아이템 (정렬된 flat 목록에서 접두어 구간만)
+        path = tuple(path)
+        result = set()
+        pos = bisect_left(self.flat, path)
+        while pos < len(self.flat) and self.flat[pos][:len(path)] == path:
+            result.update(self.items.get(self.flat[pos], ()))
+            pos += 1
+        return result
+
+    def on_store_change(self, kind, keys):
+        if kind != "materials":
+            return
+        materials = get_store().materials()
+        if keys is None:
+            self.__init__(self.tree, materials)
+            return
+        for item in keys:
+            meta = materials.get(item)
+            self.set_item(item, meta.get("category") if meta is not None else None)
+
+
+_index = None
+
+def get_category_index():
+    # 카테고리 파일이 다시 읽혔으면 트리 부분을 새로 만듦
+    global _index
+    store = get_store()
+    tree = store.backend.categories()
+    if _index is None:
+        _index = CategoryIndex(tree, store.materials())
+        store.add_listener(_index.on_store_change)
+    elif _index.tree is not tree:
+        _index.__init__(tree, store.materials())
+    return _index
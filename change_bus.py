@@ -0,0 +1,97 @@
+import copy
+from PyQt5.QtCore import QObject, pyqtSignal
+from data_store import get_store
+from sales import DONE
+
+
+class ChangeBus(QObject):
+    # store 변경 알림(kind, keys)을 항목 단위 시그널로 바꿔 열린 창들에 전달.
+    # 창은 필요한 시그널만 연결해서 해당 행/라벨만 고침 (QObject 라 창이 닫혀 삭제되면 연결도 끊김)
+    material_changed = pyqtSignal(str)           # 추가 또는 수정된 재료
+    material_removed = pyqtSignal(str)
+    enchant_changed = pyqtSignal(str, str)       # 재료, 인첸트: 그 단계 값이 바뀜
+    recipe_saved = pyqtSignal(str)
+    recipe_removed = pyqtSignal(str)
+    sale_registered = pyqtSignal(int)            # 판매 목록 위치
+    sale_updated = pyqtSignal(int)
+    sale_completed = pyqtSignal(int)
+    reset = pyqtSignal(str)                      # 파일을 통째로 다시 읽음: 해당 kind 전체를 다시 그려야 함
+    changed = pyqtSignal(str)                    # 위 시그널들 뒤에 kind 단위로 한 번 (합계 화면 등)
+
+    def __init__(self, store=None):
+        super().__init__()
+        self.store = store or get_store()
+        self._remember()
+        self.store.add_listener(self.on_store_change, late=True)
+
+    def _remember(self):
+        # 이전 값과 비교해서 무엇이 바뀌었는지 가림. 레코드는 통째로 교체되므로 얕은 복사면 충분
+        # (MaterialTable 은 배열 복사라 재료마다 dict 를 만들지 않음)
+        backend = self.store.backend
+        self._known = copy.copy(backend.materials())
+        self._recipes = set(backend.recipes())
+        sales = backend.sales()
+        self._sale_count = len(sales)
+        self._done = {i for i, sale in enumerate(sales) if sale.get("status") == DONE}
+
+    def on_store_change(self, kind, keys):
+        if kind not in ("materials", "recipes", "sales"):
+            return
+        if keys is None:
+            self._remember()
+            self.reset.emit(kind)
+        elif kind == "materials":
+            self._materials(keys)
+        elif kind == "recipes":
+            self._recipe(keys)
+        else:
+            self._sales(keys)
+        self.changed.emit(kind)
+
+    def _materials(self, keys):
+        materials = self.store.backend.materials()
+        for name in keys:
+            meta = materials.get(name)
+            old = (self._known.pop(name, None) or {}).get("enchant", {})
+            if meta is None:
+                self.material_removed.emit(name)
+                continue
+            new = meta.get("enchant", {})
+            self._known[name] = meta
+            self.material_changed.emit(name)
+            for enchant in sorted(set(old) | set(new)):
+                if old.get(enchant) != new.get(enchant):
+                    self.enchant_changed.emit(name, enchant)
+
+    def _recipe(self, keys):
+        recipes = self.store.recipes()
+        for name in keys:
+            if name in recipes:
+                self._recipes.add(name)
+                self.recipe_saved.emit(name)
+            else:
+                self._recipes.discard(name)
+                self.recipe_removed.emit(name)
+
+    def _sales(self, keys):
+        sales = self.store.sales()
+        for idx in sorted(keys):
+            if idx >= len(sales):
+                continue
+            if idx >= self._sale_count:
+                self._sale_count = idx + 1
+                self.sale_registered.emit(idx)
+            else:
+                self.sale_updated.emit(idx)
+            if sales[idx].get("status") == DONE and idx not in self._done:
+                self._done.add(idx)
+                self.sale_completed.emit(idx)
+
+
+_bus = None
+
+def get_change_bus():
+    global _bus
+    if _bus is None:
+        _bus = ChangeBus()
+    return _bus
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import sys
+import perf_stats
+from data_store import ConflictError, get_store
+from cost_engine import CostEngine, RecipeCycleError
+from crafting import CraftError, CraftQueue, apply_craft
+from lots import POLICIES, LotError
+from profit_rollup import GROUPS, ProfitRollup
+from sales import SaleError, complete_sale, register_sale, unfinished
+
+# 화면 없이 실행하는 명령들 (야간 배치 등). PyQt5 는 import 하지 않음
+# 사용법: python gaemu.py <명령> ... / python cli.py <명령> ...
+
+
+def _print_rows(rows, columns, as_json):
+    if as_json:
+        print(json.dumps([dict(zip(columns, row)) for row in rows], ensure_ascii=False, indent=1))
+        return
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join("-" if v is None else f"{v:.2f}" if isinstance(v, float) else str(v) for v in row))
+
+
+def cmd_cost(store, args):
+    # 모든 레시피의 개당 원가 (하위 레시피는 제작/구매 중 싼 쪽)
+    # --at 이면 그 시점 이전 마지막 시세 기준 (시세 이력)
+    recipes = store.recipes()
+    materials = store.materials()
+    if args.at:
+        from price_history import MaterialsAt, get_price_history
+        materials = MaterialsAt(materials, get_price_history(store), args.at)
+    engine = CostEngine(materials, recipes, args.enchant)
+    try:
+        engine.evaluate(list(recipes))
+    except RecipeCycleError as e:
+        print(e, file=sys.stderr)
+        return 1
+    rows = []
+    for name in sorted(recipes):
+        node = engine.cost(name)
+        rows.append((name, node.craft_cost, node.buy_cost, node.source, ",".join(node.missing)))
+    _print_rows(rows, ("recipe", "craft_cost", "buy_cost", "source", "missing"), args.json)
+    return 0
+
+
+def _number(value):
+    # numpy 값 -> float, nan 은 None ("-" 로 출력)
+    value = float(value)
+    return None if value != value else value
+
+
+def cmd_margins(store, args):
+    # 레시피 x 인첸트(0~4) 별 개당 원가/시장가/마진/ROI 를 한 번에 계산 (numpy 는 이 명령에서만 불러옴)
+    from profit_matrix import profit_table
+    try:
+        table = profit_table(store.materials(), store.recipes(), make_or_buy=not args.craft_all)
+    except RecipeCycleError as e:
+        print(e, file=sys.stderr)
+        return 1
+    rows = [(str(row["recipe"]), int(row["enchant"]), _number(row["unit_cost"]), _number(row["market_price"]),
+             _number(row["margin"]), _number(row["roi"]))
+            for row in table.sorted(args.sort, enchant=args.enchant, limit=args.limit or None)]
+    _print_rows(rows, ("recipe", "enchant", "unit_cost", "market_price", "margin", "roi"), args.json)
+    return 0
+
+
+def cmd_plan(store, args):
+    # 보유 재고로 이익이 가장 큰 제작 횟수 조합 (numpy 는 이 명령에서만 불러옴)
+    # --apply 이면 계획 전체를 확인한 뒤 한 번에 제작 (하나라도 안 되면 아무것도 반영 안 함)
+    from craft_planner import apply_plan, plan_crafts
+    recipes = store.recipes()
+    craft_fee = {name: args.fee for name in recipes} if args.fee else None
+    try:
+        plan = plan_crafts(store.materials(), recipes, args.enchant, craft_fee, args.budget, args.fee_limit,
+                           args.mode, args.policy)
+    except RecipeCycleError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for name in plan.skipped:
+        print(f"{name}: 재료 수량이 모두 0 이라 계획에서 제외", file=sys.stderr)
+    if args.json:
+        print(json.dumps({"runs": plan.runs, "profit": plan.profit, "mode": plan.mode, "optimal": plan.optimal,
+                          "skipped": plan.skipped}, ensure_ascii=False, indent=1))
+    else:
+        _print_rows(sorted(plan.runs.items()), ("recipe", "runs"), False)
+        print(f"예상 이익: {plan.profit:.2f} ({plan.mode}{'' if plan.optimal else ', 최적 아님'})")
+    if args.apply and plan.runs:
+        for name, n in apply_plan(store, plan, craft_fee, args.enchant, args.policy).items():
+            print(f"제작 성공: {name} {n}개")
+    return 0
+
+
+def cmd_craft(store, args):
+    produced = apply_craft(store, args.recipe, args.count, args.fee, args.enchant, policy=args.policy)
+    print(f"제작 성공: {args.recipe} {produced}개")
+    return 0
+
+
+def cmd_batch(store, args):
+    # 작업: 레시피:횟수[:인첸트]. 전체를 확인한 뒤 한 번에 저장 (하나라도 안 되면 아무것도 반영 안 함)
+    queue = CraftQueue(store)
+    for job in args.jobs:
+        parts = job.split(":")
+        if len(parts) not in (2, 3) or not parts[1].isdigit():
+            print(f"작업 형식 오류: {job} (레시피:횟수[:인첸트])", file=sys.stderr)
+            return 1
+        queue.add(parts[0], int(parts[1]), parts[2] if len(parts) == 3 else "0", args.fee)
+    jobs = list(queue.jobs)
+    produced = queue.commit(args.policy)
+    for (name, enchant, _, _), n in zip(jobs, produced):
+        print(f"제작 성공: {name} ({enchant} 인첸트) {n}개")
+    return 0
+
+
+def cmd_sell(store, args):
+    idx = register_sale(store, args.item, args.enchant, args.count, args.price, policy=args.policy)
+    sale = store.sales()[idx]
+    print(f"판매등록: {sale['id']} {args.item} x{args.count} 원가 {sale['total_cost']} 이익 {sale['profit']}")
+    return 0
+
+
+def cmd_settle(store, args):
+    # id 없이 실행하면 미완료 목록만 출력, --all 이면 전부 완료 처리
+    sales = store.sales()
+    if args.all:
+        ids = [sale["id"] for _, sale in unfinished(sales)]
+    elif args.ids:
+        ids = args.ids
+    else:
+        rows = [(sale["id"], sale.get("item", ""), sale.get("enchant", 0), sale.get("count", 0),
+                 sale.get("profit", 0), sale.get("registered_time", "-")) for _, sale in unfinished(sales)]
+        _print_rows(rows, ("id", "item", "enchant", "count", "profit", "registered_time"), args.json)
+        return 0
+    failed = 0
+    for sale_id in ids:
+        idx = store.sale_index(sale_id)
+        if idx is None:
+            print(f"{sale_id}: 판매 기록 없음", file=sys.stderr)
+            failed += 1
+            continue
+        complete_sale(store, idx)
+    print(f"완료 처리: {len(ids) - failed}건")
+    return 1 if failed else 0
+
+
+def cmd_report(store, args):
+    group = tuple(args.group.split(","))
+    if group not in GROUPS:
+        print(f"지원하는 그룹: {', '.join(','.join(g) for g in GROUPS)}", file=sys.stderr)
+        return 1
+    if args.status and "status" not in group:
+        print("상태 필터는 status 가 포함된 그룹에서만 가능", file=sys.stderr)
+        return 1
+    rollup = ProfitRollup(store)
+    filters = {"status": args.status} if args.status else {}
+    rows = [key + tuple(row.values()) for key, row in rollup.query(group, **filters)]
+    _print_rows(rows, group + ("sales", "units", "revenue", "cost", "profit"), args.json)
+    return 0
+
+
+def cmd_history(store, args):
+    # 시세 이력을 시간/일/주 단위로 묶은 min/max/avg/vwap (numpy 는 이 명령에서만 불러옴)
+    from price_history import from_epoch, get_price_history
+    stats = get_price_history(store).downsample(args.item, args.enchant, args.bucket, args.start, args.end)
+    rows = [(from_epoch(b), float(lo), float(hi), float(avg), float(vwap), int(n)) for b, lo, hi, avg, vwap, n in zip(
+        stats["bucket"], stats["min"], stats["max"], stats["avg"], stats["vwap"], stats["count"])]
+    _print_rows(rows, ("bucket", "min", "max", "avg", "vwap", "count"), args.json)
+    return 0
+
+
+def cmd_import(store, args):
+    # 시세 덤프(.csv/.jsonl) 가져오기
+    from price_import import import_prices
+    if not os.path.exists(args.file):
+        print(f"{args.file}: 파일 없음", file=sys.stderr)
+        return 1
+    report = import_prices(args.file, store, create_items=args.create, dry_run=args.dry_run)
+    print(report)
+    for line_no, reason, row in report.rejected:
+        print(f"  {line_no}행: {reason} {row}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gaemu.py", description="제작 시뮬레이터 명령줄 작업")
+    parser.add_argument("--dir", default=".", help="데이터 파일 폴더")
+    parser.add_argument("--stats", help="저장/불러오기 측정 결과를 json 으로 저장")
+    parser.add_argument("--profile", help="명령을 cProfile 로 실행해서 .prof 로 저장")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("cost", help="모든 레시피 원가")
+    p.add_argument("--enchant", default="0")
+    p.add_argument("--at", help="이 시각(예: \"2024-05-01 00:00:00\") 이전 마지막 시세로 계산")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_cost)
+
+    p = sub.add_parser("margins", help="레시피 x 인첸트 별 마진/ROI 순위")
+    p.add_argument("--sort", choices=("margin", "roi", "unit_cost", "market_price"), default="margin")
+    p.add_argument("--enchant", type=int, choices=range(5), help="이 인첸트만")
+    p.add_argument("--limit", type=int, default=20, help="상위 몇 개 (0 이면 전체)")
+    p.add_argument("--craft-all", action="store_true", help="하위 레시피도 구매 대신 모두 제작한다고 보고 계산")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_margins)
+
+    p = sub.add_parser("plan", help="보유 재고로 이익이 가장 큰 제작 계획")
+    p.add_argument("--enchant", default="0")
+    p.add_argument("--mode", choices=("auto", "exact", "lp", "greedy"), default="auto")
+    p.add_argument("--budget", type=float, help="실버 예산 (투입 원가+수수료)")
+    p.add_argument("--fee", type=int, default=0, help="산출물 개당 제작 수수료")
+    p.add_argument("--fee-limit", type=float, help="제작 수수료 합계 한도")
+    p.add_argument("--policy", choices=POLICIES, help="재료 lot 차감 정책 (기본: ALBION_LOT_POLICY 또는 fifo)")
+    p.add_argument("--apply", action="store_true", help="계획대로 바로 제작")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_plan)
+
+    p = sub.add_parser("craft", help="제작 (재료 차감, 산출물 추가)")
+    p.add_argument("recipe")
+    p.add_argument("count", type=int)
+    p.add_argument("--fee", type=int, default=0)
+    p.add_argument("--enchant", default="0")
+    p.add_argument("--policy", choices=POLICIES, help="재료 lot 차감 정책 (기본: ALBION_LOT_POLICY 또는 fifo)")
+    p.set_defaults(fn=cmd_craft)
+
+    p = sub.add_parser("batch", help="여러 제작을 한 번에 (앞 작업 산출물을 뒤 작업 재료로)")
+    p.add_argument("jobs", nargs="+", help="레시피:횟수[:인첸트]")
+    p.add_argument("--fee", type=int, default=0)
+    p.add_argument("--policy", choices=POLICIES, help="재료 lot 차감 정책 (기본: ALBION_LOT_POLICY 또는 fifo)")
+    p.set_defaults(fn=cmd_batch)
+
+    p = sub.add_parser("sell", help="판매등록 (재고 차감)")
+    p.add_argument("item")
+    p.add_argument("count", type=int)
+    p.add_argument("price", type=int, help="개당 판매가")
+    p.add_argument("--enchant", default="0")
+    p.add_argument("--policy", choices=POLICIES, help="재고 lot 차감 정책 (기본: ALBION_LOT_POLICY 또는 fifo)")
+    p.set_defaults(fn=cmd_sell)
+
+    p = sub.add_parser("settle", help="판매완료 처리 (id 없으면 미완료 목록)")
+    p.add_argument("ids", nargs="*")
+    p.add_argument("--all", action="store_true")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_settle)
+
+    p = sub.add_parser("report", help="수익 집계")
+    p.add_argument("group", nargs="?", default="item", help="예: item / item,enchant / status,day")
+    p.add_argument("--status", choices=("판매완료", "미완료"))
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_report)
+
+    p = sub.add_parser("import", help="시세 덤프(.csv/.jsonl) 가져오기")
+    # --dir 로 이동하기 전에 실행한 폴더 기준 경로로 바꿔 둠
+    p.add_argument("file", type=os.path.abspath)
+    p.add_argument("--create", action="store_true", help="없는 아이템은 새로 추가")
+    p.add_argument("--dry-run", action="store_true", help="검사만 하고 저장하지 않음")
+    p.set_defaults(fn=cmd_import)
+
+    p = sub.add_parser("history", help="시세 이력 (구간별 min/max/avg/vwap)")
+    p.add_argument("item")
+    p.add_argument("--enchant", default="0")
+    p.add_argument("--bucket", choices=("hour", "day", "week"), default="day")
+    p.add_argument("--start", help="시작 시각 (포함)")
+    p.add_argument("--end", help="끝 시각 (제외)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_history)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # 결과 파일은 실행한 폴더 기준, 데이터 파일은 --dir 기준
+    stats_file = args.stats and os.path.abspath(args.stats)
+    profile_file = args.profile and os.path.abspath(args.profile)
+    if stats_file:
+        perf_stats.set_enabled(True)
+    os.chdir(args.dir)
+    store = get_store()
+    try:
+        if profile_file:
+            return perf_stats.profile_call(args.command, args.fn, (store, args), filename=profile_file)
+        return args.fn(store, args)
+    except (CraftError, SaleError, LotError, ConflictError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if stats_file:
+            perf_stats.dump(stats_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+from collections import namedtuple, deque
+from data_store import get_store
+
+# source: "buy" (구매가 더 쌈 / 레시피 없음), "craft" (제작이 더 쌈), None (가격 정보 없음)
+NodeCost = namedtuple("NodeCost", "item unit_cost source craft_cost buy_cost missing")
+
+
+class RecipeCycleError(ValueError):
+    def __init__(self, items):
+        super().__init__("레시피 순환: " + " -> ".join(items))
+        self.items = items
+
+
+def recipe_output(recipe):
+    out = recipe["output_count"]
+    return out if out and out > 0 else 1
+
+
+def purchase_price(materials, item, enchant="0"):
+    # 시장가가 있으면 시장가, 없으면 기록된 구매가+수수료.
+    # 재료 정보가 없거나 시장가/구매가가 둘 다 0 이면 (가격 미입력) None: 0원으로 보지 않음
+    meta = materials.get(item)
+    if meta is None:
+        return None
+    rec = meta.get("enchant", {}).get(enchant)
+    if not rec:
+        return None
+    market = rec.get("market_price", 0)
+    if market:
+        return market
+    buy = rec.get("buy_price", 0)
+    if not buy:
+        return None
+    return buy + rec.get("fee", 0)
+
+
+class CostEngine:
+    # 레시피 의존 그래프(DAG)를 위상정렬 순서로 평가, 노드별 개당 원가를 메모
+    def __init__(self, materials, recipes, enchant="0", station_fee=None):
+        self.materials = materials
+        self.recipes = recipes
+        self.enchant = str(enchant)
+        self.station_fee = station_fee or {}
+        self._costs = {}
+
+    def invalidate(self):
+        self._costs = {}
+
+    def forget(self, items):
+        # 메모에서 제거하고 제거된 이전 값 반환
+        return {item: self._costs.pop(item) for item in items if item in self._costs}
+
+    def topo_order(self, roots=None):
+        # 재료 -> 산출물 순서. roots 를 주면 그 아래 서브그래프만
+        recipes = self.recipes
+        if roots is None:
+            nodes = set(recipes)
+            for rec in recipes.values():
+                nodes.update(rec.get("materials", {}))
+        else:
+            nodes = set()
+            stack = list(roots)
+            while stack:
+                item = stack.pop()
+                if item in nodes:
+                    continue
+                nodes.add(item)
+                rec = recipes.get(item)
+                if rec:
+                    stack.extend(rec.get("materials", {}))
+        indeg = {}
+        users = {}
+        for item in nodes:
+            rec = recipes.get(item)
+            deps = rec.get("materials", {}) if rec else {}
+            indeg[item] = len(deps)
+            for mat in deps:
+                users.setdefault(mat, []).append(item)
+        queue = deque(item for item, d in indeg.items() if d == 0)
+        order = []
+        while queue:
+            item = queue.popleft()
+            order.append(item)
+            for user in users.get(item, ()):
+                indeg[user] -= 1
+                if indeg[user] == 0:
+                    queue.append(user)
+        if len(order) < len(nodes):
+            raise RecipeCycleError(self._find_cycle({i for i, d in indeg.items() if d > 0}))
+        return order
+
+    def _find_cycle(self, remaining):
+        # 남은 노드 중 하나에서 출발해 재방문할 때까지 따라감
+        start = next(iter(remaining))
+        path = [start]
+        seen = {start: 0}
+        item = start
+        while True:
+            deps = self.recipes[item].get("materials", {})
+            item = next(m for m in deps if m in remaining)
+            if item in seen:
+                return path[seen[item]:] + [item]
+            seen[item] = len(path)
+            path.append(item)
+
+    def _evaluate(self, item):
+        recipes = self.recipes
+        buy = purchase_price(self.materials, item, self.enchant)
+        rec = recipes.get(item)
+        craft = None
+        missing = ()
+        if rec:
+            total = self.station_fee.get(item, 0)
+            lacking = []
+            for mat, qty in rec.get("materials", {}).items():
+                node = self._costs[mat]
+                if node.unit_cost is None:
+                    lacking.extend(node.missing or (mat,))
+                else:
+                    total += node.unit_cost * qty
+            if lacking:
+                missing = tuple(dict.fromkeys(lacking))
+            else:
+                craft = total / recipe_output(rec)
+        if craft is not None and (buy is None or craft < buy):
+            return NodeCost(item, craft, "craft", craft, buy, ())
+        if buy is not None:
+            return NodeCost(item, buy, "buy", craft, buy, ())
+        return NodeCost(item, None, None, None, None, missing or (item,))
+
+    def evaluate(self, roots=None):
+        for item in self.topo_order(roots):
+            if item not in self._costs:
+                self._costs[item] = self._evaluate(item)
+        return self._costs
+
+    def cost(self, item):
+        if item not in self._costs:
+            self.evaluate([item])
+        return self._costs[item]
+
+    def craft_breakdown(self, recipe_name):
+        # 1회 제작 기준 재료별 (수량, 개당 원가, 구매/제작)
+        rec = self.recipes[recipe_name]
+        self.evaluate([recipe_name])
+        lines = []
+        for mat, qty in rec.get("materials", {}).items():
+            node = self._costs[mat]
+            lines.append((mat, qty, node.unit_cost, node.source))
+        return lines
+
+
+def reverse_index(recipes):
+    # 재료 -> 그 재료를 직접 쓰는 레시피들
+    users = {}
+    for name, rec in recipes.items():
+        for mat in rec.get("materials", {}):
+            users.setdefault(mat, set()).add(name)
+    return users
+
+
+class CostIndex:
+    # 역의존 인덱스로 가격이 바뀐 재료의 (간접 포함) 상위 레시피만 dirty 처리,
+    # 다음 조회 때 필요한 것만 다시 계산하고 바뀐 원가를 구독자에게 전달
+    def __init__(self, store):
+        self.store = store
+        self._engines = {}
+        self._stale = {}
+        self._subscribers = []
+        self.users = reverse_index(store.recipes())
+        store.add_listener(self._on_store_change)
+
+    def subscribe(self, fn):
+        # fn(enchant, {item: (이전 개당원가, 새 개당원가)})
+        self._subscribers.append(fn)
+
+    def unsubscribe(self, fn):
+        if fn in self._subscribers:
+            self._subscribers.remove(fn)
+
+    def dependents(self, items):
+        seen = set(items)
+        stack = list(items)
+        while stack:
+            for user in self.users.get(stack.pop(), ()):
+                if user not in seen:
+                    seen.add(user)
+                    stack.append(user)
+        return seen
+
+    def engine(self, enchant="0"):
+        enchant = str(enchant)
+        # 먼저 읽어야 파일 재로딩 알림(reset)이 엔진 조회보다 앞섬
+        materials = self.store.materials()
+        recipes = self.store.recipes()
+        eng = self._engines.get(enchant)
+        if eng is None:
+            eng = self._engines[enchant] = CostEngine(materials, recipes, enchant)
+            self._stale[enchant] = {}
+        else:
+            eng.materials = materials
+            eng.recipes = recipes
+        return eng
+
+    def mark_dirty(self, items):
+        affected = self.dependents(items)
+        for enchant, eng in self._engines.items():
+            for item, node in eng.forget(affected).items():
+                self._stale[enchant].setdefault(item, node)
+        return affected
+
+    def reset(self):
+        self._engines = {}
+        self._stale = {}
+        self.users = reverse_index(self.store.recipes())
+
+    def _on_store_change(self, kind, keys):
+        if kind == "materials":
+            if keys is None:
+                self.reset()
+                return
+            # 개수만 바뀐 경우는 무시: 구매 단가가 실제로 달라진 재료만
+            materials = self.store.backend.materials()
+            changed = set()
+            for enchant, eng in self._engines.items():
+                for item in keys:
+                    node = eng._costs.get(item)
+                    if node is not None and node.buy_cost != purchase_price(materials, item, enchant):
+                        changed.add(item)
+            if changed:
+                self.mark_dirty(changed)
+        elif kind == "recipes":
+            if keys is None:
+                self.reset()
+                return
+            self.users = reverse_index(self.store.backend.recipes())
+            self.mark_dirty(keys)
+
+    def cost(self, item, enchant="0"):
+        eng = self.engine(enchant)
+        node = eng.cost(item)
+        self._emit(str(enchant), eng)
+        return node
+
+    def craft_breakdown(self, recipe_name, enchant="0"):
+        eng = self.engine(enchant)
+        lines = eng.craft_breakdown(recipe_name)
+        self._emit(str(enchant), eng)
+        return lines
+
+    def refresh(self, enchant=None):
+        # dirty 노드를 지금 다시 계산 (배치 소비자용)
+        enchants = [str(enchant)] if enchant is not None else list(self._engines)
+        for e in enchants:
+            eng = self.engine(e)
+            stale = self._stale.get(e)
+            if stale:
+                eng.evaluate(list(stale))
+                self._emit(e, eng)
+
+    def dirty(self, enchant="0"):
+        return set(self._stale.get(str(enchant), ()))
+
+    def _emit(self, enchant, eng):
+        stale = self._stale.get(enchant)
+        if not stale:
+            return
+        deltas = {}
+        for item in [i for i in stale if i in eng._costs]:
+            old = stale.pop(item)
+            new = eng._costs[item]
+            if old.unit_cost != new.unit_cost:
+                deltas[item] = (old.unit_cost, new.unit_cost)
+        if deltas:
+            for fn in list(self._subscribers):
+                fn(enchant, deltas)
+
+
+_index = None
+
+def get_cost_index():
+    global _index
+    if _index is None:
+        _index = CostIndex(get_store())
+    return _index
@@ -0,0 +1,248 @@
+import time
+import numpy as np
+import lots
+from cost_engine import CostEngine, recipe_output
+from crafting import CraftQueue
+
+EPS = 1e-9
+EXACT_MAX_RECIPES = 20
+LP_MAX_RECIPES = 300
+MAX_NODES = 20000
+TIME_LIMIT = 1.0
+
+
+class CraftPlan:
+    def __init__(self, runs, profit, mode, optimal, skipped=()):
+        self.runs = runs          # {레시피명: 제작 횟수}
+        self.profit = profit
+        self.mode = mode
+        self.optimal = optimal
+        self.skipped = list(skipped)  # 재료 수량이 모두 0 이라 계획에서 뺀 레시피
+
+    def __repr__(self):
+        return (f"CraftPlan(profit={self.profit:.2f}, mode={self.mode}, optimal={self.optimal}, runs={self.runs}, "
+                f"skipped={self.skipped})")
+
+
+def _rec(materials, item, enchant):
+    return materials.get(item, {}).get("enchant", {}).get(enchant, {})
+
+
+def unit_cost(rec):
+    # 보유 재고 lot 의 평균 원가 (재고가 없으면 buy_price + fee).
+    # 계획은 선형이어야 해서 재료마다 한 단가로 봄 (average 정책이면 실제 제작 원가와 같음)
+    count = rec.get("count", 0)
+    if count <= 0:
+        return lots.base_cost(rec)
+    return lots.preview(rec, count, lots.AVERAGE) / count
+
+
+def build_problem(materials, recipes, enchant="0", craft_fee=None, silver_budget=None, fee_limit=None):
+    # max p.x  s.t.  A x <= b, x >= 0 정수
+    # 행: 재료별 보유 수량 / (선택) 실버 예산: 투입 원가+수수료 / (선택) 제작 수수료 한도
+    # 재료 수량이 모두 0 인 레시피는 제약이 없어 무한히 돌릴 수 있으므로 빼고 skipped 로 돌려줌
+    craft_fee = craft_fee or {}
+    names, profits, costs, fees, lines, skipped = [], [], [], [], [], []
+    unit = {}
+    for name, rec in recipes.items():
+        mats = rec.get("materials", {})
+        market = _rec(materials, name, enchant).get("market_price", 0)
+        if not mats or not market or any(m not in materials for m in mats):
+            continue
+        if all(q <= 0 for q in mats.values()):
+            skipped.append(name)
+            continue
+        mats = {m: q for m, q in mats.items() if q > 0}
+        out = recipe_output(rec)
+        for m in mats:
+            if m not in unit:
+                unit[m] = unit_cost(_rec(materials, m, enchant))
+        input_cost = sum(q * unit[m] for m, q in mats.items())
+        fee = craft_fee.get(name, 0) * out
+        profit = out * market - input_cost - fee
+        if profit <= EPS:
+            continue
+        names.append(name)
+        profits.append(profit)
+        costs.append(input_cost + fee)
+        fees.append(fee)
+        lines.append(mats)
+    used = sorted({m for mats in lines for m in mats})
+    row = {m: i for i, m in enumerate(used)}
+    A = np.zeros((len(used), len(names)))
+    for j, mats in enumerate(lines):
+        for m, q in mats.items():
+            A[row[m], j] = q
+    b = np.array([max(_rec(materials, m, enchant).get("count", 0), 0) for m in used], dtype=float)
+    if silver_budget is not None:
+        A = np.vstack([A, costs])
+        b = np.append(b, silver_budget)
+    if fee_limit is not None:
+        A = np.vstack([A, fees])
+        b = np.append(b, fee_limit)
+    return names, np.array(profits, dtype=float), A, b, skipped
+
+
+def simplex(c, A, b):
+    # b >= 0 인 max c.x, A x <= b 전용 (원점이 실행가능해서 1단계 불필요)
+    # 최대 감소비용 규칙으로 진행하다 오래 걸리면 Bland 규칙으로 전환(순환 방지)
+    m, n = A.shape
+    if n == 0:
+        return np.zeros(0), 0.0
+    T = np.zeros((m + 1, n + m + 1))
+    T[:m, :n] = A
+    T[:m, n:n + m] = np.eye(m)
+    T[:m, -1] = b
+    T[m, :n] = -c
+    basis = list(range(n, n + m))
+    for it in range(50 * (n + m)):
+        reduced = T[m, :-1]
+        if it < 5 * (n + m):
+            entering = int(np.argmin(reduced))
+            if reduced[entering] >= -EPS:
+                break
+        else:
+            entering = next((j for j in range(n + m) if reduced[j] < -EPS), None)
+            if entering is None:
+                break
+        col = T[:m, entering]
+        ratios = np.full(m, np.inf)
+        pos = col > EPS
+        ratios[pos] = T[:m, -1][pos] / col[pos]
+        if not np.isfinite(ratios).any():
+            raise ValueError("unbounded")
+        best = ratios.min()
+        leaving = min((i for i in range(m) if ratios[i] <= best + EPS), key=lambda i: basis[i])
+        T[leaving] /= T[leaving, entering]
+        others = np.arange(m + 1) != leaving
+        T[others] -= np.outer(T[others, entering], T[leaving])
+        basis[leaving] = entering
+    x = np.zeros(n + m)
+    for i, j in enumerate(basis):
+        x[j] = T[i, -1]
+    return x[:n], T[m, -1]
+
+
+def _max_runs(A, b):
+    # 각 레시피를 단독으로 돌릴 수 있는 최대 횟수
+    with np.errstate(divide="ignore"):
+        caps = np.where(A > 0, np.floor(b[:, None] / np.where(A > 0, A, 1) + EPS), np.inf)
+    return caps.min(axis=0) if len(A) else np.zeros(A.shape[1])
+
+
+def greedy(p, A, b, x=None):
+    # 희소 자원 대비 이익 순으로 가능한 만큼 채움
+    x = np.zeros(len(p)) if x is None else x.copy()
+    remaining = b - A @ x
+    scale = np.where(b > 0, b, 1)
+    weight = (A / scale[:, None]).sum(axis=0)
+    order = np.argsort(-(p / np.where(weight > 0, weight, EPS)), kind="stable")
+    for j in order:
+        col = A[:, j]
+        need = col > 0
+        if not need.any():
+            continue
+        k = np.floor((remaining[need] / col[need]).min() + EPS)
+        if k >= 1:
+            x[j] += k
+            remaining -= k * col
+    return x
+
+
+def lp_round(p, A, b):
+    # LP 완화해를 내림한 뒤 남는 자원은 greedy 로 채움
+    x, _ = simplex(p, A, b)
+    return greedy(p, A, b, np.floor(x + EPS))
+
+
+def branch_and_bound(p, A, b, max_nodes=MAX_NODES, time_limit=TIME_LIMIT):
+    # 노드 수/시간 한도를 넘으면 그때까지의 최선해 반환 (optimal=False)
+    deadline = time.monotonic() + time_limit
+    n = len(p)
+    best_x = lp_round(p, A, b)
+    best = float(p @ best_x)
+    upper = _max_runs(A, b)
+    stack = [(np.zeros(n), upper)]
+    nodes = 0
+    while stack:
+        if nodes >= max_nodes or time.monotonic() > deadline:
+            return best_x, False
+        nodes += 1
+        lo, hi = stack.pop()
+        # x = lo + y 로 치환, y <= hi - lo 는 행으로 추가
+        rhs = b - A @ lo
+        if (rhs < -EPS).any():
+            continue
+        bounded = np.isfinite(hi)
+        A2 = np.vstack([A, np.eye(n)[bounded]])
+        b2 = np.concatenate([np.maximum(rhs, 0), (hi - lo)[bounded]])
+        y, val = simplex(p, A2, b2)
+        if val + float(p @ lo) <= best + EPS:
+            continue
+        x = lo + y
+        frac = np.abs(x - np.round(x)) > 1e-6
+        if not frac.any():
+            x = np.round(x)
+            best, best_x = float(p @ x), x
+            continue
+        # 가장 분수에 가까운 변수로 분기
+        j = int(np.argmax(np.where(frac, 0.5 - np.abs(x - np.floor(x) - 0.5), -1)))
+        down_hi = hi.copy()
+        down_hi[j] = np.floor(x[j])
+        up_lo = lo.copy()
+        up_lo[j] = np.ceil(x[j])
+        stack.append((lo, down_hi))
+        stack.append((up_lo, hi))
+    return best_x, True
+
+
+def plan_profit(materials, recipes, runs, enchant="0", craft_fee=None, policy=None):
+    # 제작(crafting.craft_changes)이 기록하는 것과 같은 원가로 본 이익:
+    # 재료별 총 사용량을 lot 정책대로 차감한 원가 (어느 레시피가 먼저 쓰든 합계는 같음)
+    craft_fee = craft_fee or {}
+    used = {}
+    revenue = 0
+    for name, k in runs.items():
+        rec = recipes[name]
+        revenue += k * recipe_output(rec) * (_rec(materials, name, enchant).get("market_price", 0) - craft_fee.get(name, 0))
+        for m, q in rec["materials"].items():
+            used[m] = used.get(m, 0) + q * k
+    cost = sum(lots.preview(_rec(materials, m, enchant), q, policy) for m, q in used.items())
+    return float(revenue - cost)
+
+
+def plan_crafts(materials, recipes, enchant="0", craft_fee=None, silver_budget=None,
+                fee_limit=None, mode="auto", policy=None):
+    # mode: exact(분기한정) / lp(LP 완화 + 반올림) / greedy / auto(레시피 수로 선택)
+    # 횟수는 평균 lot 원가로 정하고, profit 은 policy(lot 차감 정책)대로 실제 제작했을 때의 값
+    enchant = str(enchant)
+    names, p, A, b, skipped = build_problem(materials, recipes, enchant, craft_fee, silver_budget, fee_limit)
+    if mode == "auto":
+        mode = "exact" if len(names) <= EXACT_MAX_RECIPES else "lp" if len(names) <= LP_MAX_RECIPES else "greedy"
+    if not names:
+        return CraftPlan({}, 0.0, mode, True, skipped)
+    optimal = False
+    if mode == "exact":
+        x, optimal = branch_and_bound(p, A, b)
+    elif mode == "lp":
+        x = lp_round(p, A, b)
+    elif mode == "greedy":
+        x = greedy(p, A, b)
+    else:
+        raise ValueError(f"unknown mode: {mode}")
+    runs = {name: int(k) for name, k in zip(names, x) if k >= 1}
+    return CraftPlan(runs, plan_profit(materials, recipes, runs, enchant, craft_fee, policy), mode, optimal, skipped)
+
+
+def apply_plan(store, plan, craft_fee=None, enchant="0", policy=None):
+    # RecipeCalc 제작 대기열과 같은 로직(crafting.CraftQueue)으로 계획 전체를 확인하고 한 번에 저장
+    # (하나라도 재고 부족/충돌이면 아무것도 반영하지 않음).
+    # 계획은 보유 재고만 쓰므로 산출물을 재료로 쓰는 레시피를 먼저 돌려 새 lot 이 원가에 섞이지 않게 함
+    craft_fee = craft_fee or {}
+    recipes = store.recipes()
+    order = [name for name in reversed(CostEngine(store.materials(), recipes, enchant).topo_order(plan.runs))
+             if name in plan.runs]
+    queue = CraftQueue(store)
+    for name in order:
+        queue.add(name, plan.runs[name], str(enchant), craft_fee.get(name, 0))
+    return dict(zip(order, queue.commit(policy)))
@@ -0,0 +1,116 @@
+import datetime
+from collections import ChainMap
+import lots
+from cost_engine import recipe_output
+from schema import new_enchant
+
+
+class CraftError(ValueError):
+    pass
+
+
+def stock_count(materials, item, enchant="0"):
+    return materials.get(item, {}).get("enchant", {}).get(enchant, {}).get("count", 0)
+
+
+def check_stock(materials, recipe, make_cnt, enchant="0"):
+    # 1회 제작에 필요한 재료 수량 * 제작 횟수
+    for mat, cnt in recipe["materials"].items():
+        if mat not in materials:
+            raise CraftError(f"{mat} 정보 없음")
+        need = cnt * make_cnt
+        inv = stock_count(materials, mat, enchant)
+        if inv < need:
+            raise CraftError(f"{mat} 재고 부족 (필요: {need}, 보유: {inv})")
+
+
+def craft_changes(store, recipe_name, recipe, make_cnt, fee, enchant="0", changes=None, policy=None, now=None):
+    # 변경되는 항목만 사본으로 수정해서 반환 (저장은 호출하는 쪽에서)
+    # 재료는 lot 정책대로 차감하고, 산출물은 차감한 재료 원가 + 개당 수수료로 새 lot
+    changes = {} if changes is None else changes
+    input_cost = 0
+    for mat, cnt in recipe["materials"].items():
+        if mat not in changes:
+            changes[mat] = store.material(mat)
+        rec = changes[mat]["enchant"].get(enchant)
+        if rec is None:
+            raise CraftError(f"{mat} {enchant} 인첸트 정보 없음")
+        input_cost += lots.consume(rec, cnt * make_cnt, policy)
+
+    # 산출물 인벤토리 증가 (같은 인첸트 레코드)
+    if recipe_name not in changes:
+        # 없으면 새로 등록
+        changes[recipe_name] = store.material(recipe_name) or {"category": [], "enchant": {}}
+    product = changes[recipe_name]["enchant"].setdefault(enchant, new_enchant())
+    produced = make_cnt * recipe_output(recipe)
+    if produced > 0:
+        acquired = now or datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+        lots.receive(product, produced, input_cost / produced + fee, acquired)
+
+    # 제작시 수수료 입력 반영
+    product["fee"] = fee
+    return changes
+
+
+def apply_craft(store, recipe_name, make_cnt, fee=0, enchant="0", policy=None):
+    if make_cnt <= 0:
+        raise CraftError("제작 갯수를 입력하세요")
+    recipes = store.recipes()
+    if recipe_name not in recipes:
+        raise CraftError("레시피 없음")
+    recipe = recipes[recipe_name]
+    check_stock(store.materials(), recipe, make_cnt, enchant)
+    store.put_materials(craft_changes(store, recipe_name, recipe, make_cnt, fee, enchant, policy=policy))
+    return make_cnt * recipe_output(recipe)
+
+
+class CraftQueue:
+    # 여러 제작을 모아서 재고를 한 번에 확인하고 한 번에 저장 (하나라도 안 되면 아무것도 반영하지 않음).
+    # 앞 작업의 산출물은 뒤 작업의 재료로 쓸 수 있음 (예: 구리주괴 -> 청동주괴)
+    def __init__(self, store):
+        self.store = store
+        self.jobs = []    # (레시피명, 인첸트, 제작 횟수, 개당 수수료)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, recipe_name, make_cnt, enchant="0", fee=0):
+        if make_cnt <= 0:
+            raise CraftError("제작 갯수를 입력하세요")
+        self.jobs.append((recipe_name, str(enchant), make_cnt, fee))
+
+    def remove(self, idx):
+        del self.jobs[idx]
+
+    def clear(self):
+        self.jobs = []
+
+    def plan(self, policy=None, now=None):
+        # 저장하지 않고 순서대로 적용해 본 변경분과 작업별 산출 수량. 재고가 모자란 작업이 있으면 CraftError
+        recipes = self.store.recipes()
+        materials = self.store.materials()
+        now = now or datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+        changes = {}
+        produced = []
+        for pos, (name, enchant, make_cnt, fee) in enumerate(self.jobs, 1):
+            if name not in recipes:
+                raise CraftError(f"{pos}번 작업: {name} 레시피 없음")
+            recipe = recipes[name]
+            try:
+                # 앞 작업까지 반영된 수량 기준
+                check_stock(ChainMap(changes, materials), recipe, make_cnt, enchant)
+            except CraftError as e:
+                raise CraftError(f"{pos}번 작업 ({name}): {e}")
+            craft_changes(self.store, name, recipe, make_cnt, fee, enchant, changes, policy, now)
+            produced.append(make_cnt * recipe_output(recipe))
+        return changes, produced
+
+    def commit(self, policy=None):
+        # 전체 확인 후 변경된 재료를 한 번에 저장하고 작업별 산출 수량 반환.
+        # 재고 부족/충돌이면 아무것도 저장하지 않고 대기열도 그대로
+        if not self.jobs:
+            return []
+        changes, produced = self.plan(policy)
+        self.store.put_materials(changes)
+        self.jobs = []
+        return produced
@@ -0,0 +1,674 @@
+import os
+import gc
+import sys
+import copy
+import json
+import marshal
+import shutil
+import threading
+import uuid
+import zlib
+from collections import deque
+from collections.abc import Mapping, MutableMapping, Sequence
+from perf_stats import measure
+from material_table import MaterialTable, dump_mapping
+from record_journal import (
+    ConflictError, FileLock, absorb_records, append_journal, apply_journal, file_size, merge_records, read_journal,
+    record_version
+)
+from schema import stamp, upgrade
+
+DATA_FILE = "material_data.json"
+RECIPE_FILE = "recipes.json"
+CATEGORY_FILE = "category.json"
+SALE_FILE = "sale_data.json"
+# 재료 파일 저장은 바뀐 레코드만 저널(material_journal.jsonl)에 append 하고 JOURNAL_COMPACT_EVERY 줄마다 전체 파일로 다시 씀
+MATERIAL_JOURNAL_FILE = "material_journal.jsonl"
+JOURNAL_COMPACT_EVERY = 1000
+BACKUP_COUNT = 3
+# 파싱된 json 을 marshal 로 저장해 둔 캐시 (<파일>.cache). ALBION_CACHE=0 이면 사용 안 함, ALBION_CACHE_COMPRESS=1 이면 zlib 압축
+# 캐시에는 schema.upgrade 를 거친 내용이 들어감
+SNAPSHOT_SUFFIX = ".cache"
+SNAPSHOT_VERSION = 3
+SNAPSHOT_CACHE = os.environ.get("ALBION_CACHE", "1") != "0"
+SNAPSHOT_COMPRESS = os.environ.get("ALBION_CACHE_COMPRESS", "0") == "1"
+# 재료 파일은 메모리에서 MaterialTable(배열 기반)로 보관. ALBION_COMPACT=0 이면 json 그대로 dict
+COMPACT_MATERIALS = os.environ.get("ALBION_COMPACT", "1") != "0"
+
+def load_data(filename, default=None):
+    if not os.path.exists(filename):
+        return {} if default is None else default
+    with measure("load_data") as m:
+        with open(filename, "rb") as f:
+            raw = f.read()
+        m.read = len(raw)
+        with measure("json.parse"):
+            return json.loads(raw.decode("utf-8"))
+
+def save_data(filename, data, backups=0):
+    # 임시 파일에 쓰고 fsync 후 교체: 쓰는 도중 죽어도 원본은 그대로 남음
+    tmp = filename + ".tmp"
+    with measure("save_data") as m:
+        with open(tmp, "w", encoding="utf-8") as f:
+            if isinstance(data, Mapping) and not isinstance(data, dict):
+                # MaterialTable 등은 전체 dict 를 한 번에 만들지 않고 나눠서
+                dump_mapping(f, data)
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+            m.written = os.fstat(f.fileno()).st_size
+        if backups and os.path.exists(filename):
+            rotate_backups(filename, backups)
+        os.replace(tmp, filename)
+        _fsync_dir(filename)
+
+def backup_path(filename, n):
+    return f"{filename}.{n}.bak"
+
+def rotate_backups(filename, count=BACKUP_COUNT):
+    # .1.bak 이 가장 최근. 현재 파일은 하드링크로 보관 (안 되면 복사)
+    for n in range(count - 1, 0, -1):
+        if os.path.exists(backup_path(filename, n)):
+            os.replace(backup_path(filename, n), backup_path(filename, n + 1))
+    newest = backup_path(filename, 1)
+    if os.path.exists(newest):
+        os.remove(newest)
+    try:
+        os.link(filename, newest)
+    except OSError:
+        shutil.copy2(filename, newest)
+
+def _fsync_dir(filename):
+    # 이름 바꾸기 자체를 디스크에 반영 (디렉터리를 열 수 없는 OS 는 생략)
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_json(filename, data, backups=BACKUP_COUNT, schema=None):
+    # 백업을 남기며 저장하고 저장된 파일의 (mtime, size) 반환
+    # schema(파일 종류)가 있으면 파일에는 형식 버전을 붙여서 쓰고 캐시에는 메모리 형식 그대로
+    save_data(filename, stamp(schema, data) if schema else data, backups)
+    sig = file_sig(filename)
+    write_snapshot(filename, data, sig)
+    return sig
+
+def file_sig(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class gc_paused:
+    # 작은 dict 를 대량으로 만드는 동안 순환 GC 가 반복해서 도는 것을 막음
+    def __enter__(self):
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            gc.enable()
+
+def snapshot_path(filename):
+    return filename + SNAPSHOT_SUFFIX
+
+def _snapshot_bytes(data, sig):
+    # 원본 (mtime, size) 와 파이썬 버전(marshal 형식)을 같이 기록, 첫 바이트는 압축 여부
+    # state() 가 있는 객체(MaterialTable)는 그 결과를 저장
+    if hasattr(data, "state"):
+        data = data.state()
+    raw = marshal.dumps((SNAPSHOT_VERSION, tuple(sys.version_info[:2]), sig, data))
+    return b"z" + zlib.compress(raw, 1) if SNAPSHOT_COMPRESS else b"m" + raw
+
+def _write_snapshot_bytes(filename, raw):
+    # 캐시는 언제든 다시 만들 수 있으므로 fsync 없이 교체만 (스레드마다 임시 파일 분리)
+    path = snapshot_path(filename)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with measure("snapshot.write") as m:
+            with open(tmp, "wb") as f:
+                f.write(raw)
+            os.replace(tmp, path)
+            m.written = len(raw)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def write_snapshot(filename, data, sig):
+    if not SNAPSHOT_CACHE or sig is None:
+        return
+    try:
+        raw = _snapshot_bytes(data, sig)
+    except ValueError:
+        # json 이 아닌 타입이 섞이면 캐시 없이
+        return
+    _write_snapshot_bytes(filename, raw)
+
+def read_snapshot(filename, sig):
+    # 캐시가 없거나 원본과 맞지 않으면 None
+    try:
+        with measure("snapshot.read") as m:
+            with open(snapshot_path(filename), "rb") as f:
+                raw = f.read()
+            m.read = len(raw)
+        if raw[:1] == b"z":
+            raw = zlib.decompress(raw[1:])
+        elif raw[:1] == b"m":
+            raw = raw[1:]
+        else:
+            return None
+        with gc_paused(), measure("snapshot.parse"):
+            version, pyver, cached_sig, data = marshal.loads(raw)
+    except (OSError, ValueError, EOFError, TypeError, zlib.error):
+        return None
+    if version != SNAPSHOT_VERSION or tuple(pyver) != tuple(sys.version_info[:2]) or tuple(cached_sig) != sig:
+        return None
+    return data
+
+def load_snapshot(filename, default=None, sig=None, normalize=None, writer=None):
+    # load_data 와 같지만 캐시가 유효하면 캐시에서. 캐시가 오래됐으면 json 을 읽고 캐시를 다시 씀.
+    # normalize(data) 는 json 을 읽었을 때만 적용되고 캐시에는 적용된 결과가 들어감
+    # writer(CachedFile 참고)가 있고 화면 스레드면 캐시 쓰기는 writer 로 (종료 시 flush 가 기다림),
+    # 아니면 (명령줄, 백그라운드 preload) 여기서 바로 씀
+    sig = sig or file_sig(filename)
+    if sig is None or not SNAPSHOT_CACHE:
+        data = load_data(filename, default)
+        return normalize(data) if normalize else data
+    data = read_snapshot(filename, sig)
+    if data is not None:
+        return data
+    with gc_paused():
+        data = load_data(filename, default)
+        if normalize:
+            data = normalize(data)
+    # 직렬화는 호출한 쪽이 data 를 고치기 전에 여기서
+    try:
+        raw = _snapshot_bytes(data, sig)
+    except ValueError:
+        return data
+    if writer is not None and threading.current_thread() is threading.main_thread():
+        writer(snapshot_path(filename), lambda: lambda: _write_snapshot_bytes(filename, raw), None, None)
+    else:
+        _write_snapshot_bytes(filename, raw)
+    return data
+
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+class ReadOnlyDict(Mapping):
+    # 원본 dict를 복사하지 않고 감싸기만 함 (하위 dict/list도 접근 시 감쌈)
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return _wrap(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return f"ReadOnlyDict({self._data!r})"
+
+    def field_items(self, key, default=None):
+        # 항목마다 key 값만 (이름, 값). MaterialTable 은 레코드 전체를 만들지 않고 읽음
+        if hasattr(self._data, "field_items"):
+            items = self._data.field_items(key, default)
+        else:
+            items = ((name, meta.get(key, default)) for name, meta in self._data.items())
+        for name, value in items:
+            yield name, _wrap(value)
+
+    def to_dict(self):
+        data = self._data if isinstance(self._data, dict) else dict(self._data.items())
+        return copy.deepcopy(data)
+
+
+class ReadOnlyList(Sequence):
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return ReadOnlyList(self._data[idx])
+        return _wrap(self._data[idx])
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"ReadOnlyList({self._data!r})"
+
+    def to_list(self):
+        return copy.deepcopy(self._data)
+
+
+class CachedFile:
+    # 파일의 mtime/size가 바뀐 경우에만 다시 파싱. 다른 프로세스가 바꿨으면 레코드 단위로만 반영
+    # writer(filename, prepare, on_done, on_error) 가 있으면 저장은 writer 에 맡김.
+    # prepare() 는 GUI 스레드에서 불려 그 시점 내용으로 실제 쓰기 작업을 만들어 돌려줌
+    # model(data) 가 있으면 읽은 내용(json 또는 스냅샷 캐시)을 메모리용 객체로 바꿈
+    # schema(파일 종류)가 있으면 json 을 읽을 때 schema.upgrade, 저장할 때 형식 버전을 붙임
+    # journal(경로)이 있으면 저장은 바뀐 레코드만 저널에 append, 읽을 때는 파일 + 저널.
+    # 저널이 JOURNAL_COMPACT_EVERY 줄이 되면 전체 파일로 다시 쓰고 저널을 비움
+    def __init__(self, filename, default_factory=dict, model=None, schema=None, journal=None):
+        self.filename = filename
+        self.default_factory = default_factory
+        self.model = model
+        self.schema = schema
+        self.journal = journal
+        self.writer = None
+        self.on_change = None      # fn(keys): 다른 프로세스가 바꾼 레코드
+        self.on_conflict = None    # fn(keys): 양쪽에서 바꿔 이쪽 변경을 버린 레코드
+        self._data = None
+        self._sig = None           # 이 프로세스가 마지막으로 읽거나 쓴 파일의 (mtime, size)
+        self._jpos = (0, 0)        # 저널에서 반영한 (위치, 줄 수)
+        self._pending = 0
+        self._dirty = {}           # 아직 저장 준비 안 된 변경 레코드 -> 바꾸기 전 version
+        self._inflight = deque()   # 저장 중인 [변경분, 합쳐진 save 호출 수, 처리 여부] (파일별로 순서대로 끝남)
+        self._unprepared = 0       # 아직 prepare 안 된 save 호출 수 (writer 가 여러 번을 한 번으로 합침)
+        self._lock = threading.RLock()
+
+    def _stat(self):
+        return file_sig(self.filename)
+
+    def _read(self, sig=None):
+        # (내용, 저널 위치). 저널이 있으면 파일 내용에 저널 레코드까지 반영
+        data = load_snapshot(self.filename, self.default_factory(), sig, normalize=self._normalize, writer=self.writer)
+        data = self.model(data) if self.model else data
+        if not self.journal:
+            return data, (0, 0)
+        entries, offset = read_journal(self.journal)
+        apply_journal(data, entries)
+        return data, (offset, len(entries))
+
+    def _journal_moved(self):
+        # 마지막으로 반영한 뒤 다른 프로세스가 저널에 추가했거나(1) 압축해서 비웠음(-1)
+        if not self.journal:
+            return 0
+        size = file_size(self.journal)
+        return 0 if size == self._jpos[0] else 1 if size > self._jpos[0] else -1
+
+    def _normalize(self, data):
+        if self.schema:
+            data = upgrade(self.schema, data)
+        return self.model(data) if self.model else data
+
+    def get(self):
+        changed = None
+        with self._lock:
+            if self._data is not None and self._pending:
+                # 백그라운드 저장이 끝나기 전에는 메모리 내용이 기준
+                return self._data
+            sig = self._stat()
+            moved = self._journal_moved()
+            if self._data is None:
+                self._data, self._jpos = self._read(sig)
+                self._sig = sig
+            elif sig != self._sig or moved < 0:
+                new, self._jpos = self._read(sig)
+                self._sig = sig
+                if isinstance(self._data, MutableMapping) and isinstance(new, Mapping):
+                    changed = absorb_records(self._data, new)
+                else:
+                    self._data = new
+            elif moved:
+                # 다른 프로세스가 저널에 추가한 레코드만 반영
+                entries, offset = read_journal(self.journal, self._jpos[0])
+                self._jpos = (offset, self._jpos[1] + len(entries))
+                changed = list(dict.fromkeys(key for key, _ in entries))
+                apply_journal(self._data, entries)
+        if changed and self.on_change is not None:
+            self.on_change(changed)
+        return self._data
+
+    def put(self, changes):
+        # 레코드 단위 변경: 바꾸기 전 version 을 기억해 두었다가 저장할 때 디스크와 비교
+        data = self.get()
+        for key, value in changes.items():
+            if key not in self._dirty:
+                self._dirty[key] = record_version(data.get(key))
+            data[key] = value
+        self.save()
+
+    def save(self, data=None):
+        if data is not None:
+            self._data = data
+        self._pending += 1
+        self._unprepared += 1
+        if self.writer is None:
+            job = self._prepare()
+            try:
+                result = job()
+            except Exception as e:
+                self._save_failed(e)
+                raise
+            self._saved(result)
+        else:
+            self.writer(self.filename, self._prepare, self._saved, self._save_failed)
+
+    def _prepare(self):
+        bases = self._dirty
+        self._dirty = {}
+        self._inflight.append([bases, self._unprepared, False])
+        self._unprepared = 0
+        if self.journal and bases and self._jpos[1] + len(bases) < JOURNAL_COMPACT_EVERY:
+            # 바뀐 레코드만 (항목은 통째로 교체만 되므로 지금 값을 그대로 들고 감)
+            records = {key: self._data[key] for key in bases if key in self._data}
+            return lambda: self._append_journal(records, bases)
+        # 항목은 통째로 교체만 되므로 얕은 복사본이면 쓰는 도중에도 그대로
+        snapshot = copy.copy(self._data)
+
+        def write():
+            with FileLock(self.filename):
+                merged = None
+                conflicts = []
+                if (self._stat() != self._sig or self._journal_moved()) and isinstance(snapshot, Mapping):
+                    # 마지막으로 읽은/쓴 뒤 다른 프로세스가 씀
+                    disk, _ = self._read()
+                    merged, conflicts = merge_records(disk, snapshot, bases)
+                self._write_full(snapshot if merged is None else merged)
+            return merged, conflicts, False
+        return write
+
+    def _write_full(self, data):
+        # 전체 파일 저장 후 저널 비움 (FileLock 을 잡은 상태). 저널을 비우기 전에 죽어도 다시 반영하면 같은 내용
+        sig = write_json(self.filename, data, schema=self.schema)
+        if self.journal and os.path.exists(self.journal):
+            with open(self.journal, "wb"):
+                pass
+        with self._lock:
+            self._sig = sig
+            self._jpos = (0, 0)
+
+    def _append_journal(self, records, bases):
+        # 다른 프로세스가 그 사이 저널에 추가한 레코드를 먼저 읽어 version 으로 충돌 확인 (merge_records 와 같은 규칙),
+        # 충돌하지 않은 레코드만 한 줄씩 append. 다른 프로세스가 전체 파일을 다시 썼으면 전체 병합 후 전체 저장
+        with FileLock(self.filename):
+            if self._stat() != self._sig or self._journal_moved() < 0:
+                disk, _ = self._read()
+                merged, conflicts = merge_records(disk, records, bases)
+                self._write_full(merged)
+                return merged, conflicts, False
+            entries, offset = read_journal(self.journal, self._jpos[0])
+            theirs = dict(entries)
+            conflicts = [key for key, base in bases.items() if key in theirs and record_version(theirs[key]) != base]
+            written = append_journal(self.journal, offset,
+                                     [(key, records.get(key)) for key in bases if key not in conflicts])
+            with self._lock:
+                self._jpos = (offset + written, self._jpos[1] + len(entries) + len(bases) - len(conflicts))
+        return theirs, conflicts, True
+
+    def _finish(self):
+        # 합쳐진 save 호출마다 불리므로 첫 호출만 처리
+        self._pending -= 1
+        entry = self._inflight[0]
+        entry[1] -= 1
+        if entry[1] <= 0:
+            self._inflight.popleft()
+        first = not entry[2]
+        entry[2] = True
+        return entry[0] if first else None
+
+    def _saved(self, result):
+        # partial: merged 가 전체 내용이 아니라 저널에서 읽은 다른 프로세스 레코드만
+        merged, conflicts, partial = result
+        if self._finish() is None or merged is None:
+            return
+        # 다른 프로세스 변경분(과 충돌 레코드의 디스크 값)을 메모리에 반영. 그 사이 다시 바꾼 레코드는 제외
+        if partial:
+            changed = [key for key, rec in merged.items() if key not in self._dirty and self._data.get(key) != rec]
+            apply_journal(self._data, [(key, merged[key]) for key in changed])
+        else:
+            changed = absorb_records(self._data, merged, skip=self._dirty)
+        if changed and self.on_change is not None:
+            self.on_change(changed)
+        if conflicts and self.on_conflict is not None:
+            self.on_conflict(conflicts)
+
+    def _save_failed(self, error):
+        # 메모리 내용은 유지하고 변경 표시를 되돌려 다음 저장 때 다시 기록
+        bases = self._finish()
+        for key, base in (bases or {}).items():
+            self._dirty.setdefault(key, base)
+
+    def invalidate(self):
+        self._data = None
+        self._sig = None
+        self._jpos = (0, 0)
+
+
+class JsonBackend:
+    # 기존 json 파일 그대로 사용 (판매 내역은 저널에 append 후 주기적으로 압축)
+    def __init__(self, base_dir="."):
+        from sale_journal import SaleJournal
+        self.base_dir = base_dir
+        self._materials = CachedFile(self.path(DATA_FILE), model=MaterialTable.load if COMPACT_MATERIALS else None,
+                                     schema="materials", journal=self.path(MATERIAL_JOURNAL_FILE))
+        self._recipes = CachedFile(self.path(RECIPE_FILE), schema="recipes")
+        self._categories = CachedFile(self.path(CATEGORY_FILE), schema="categories")
+        self._sales = SaleJournal(self.path(SALE_FILE))
+        # 다른 프로세스 변경/충돌은 notify(kind, keys) 로 알림 (DataStore 가 연결)
+        self.notify = lambda kind, keys: None
+        for kind, source in (("materials", self._materials), ("recipes", self._recipes), ("sales", self._sales)):
+            source.on_change = lambda keys, kind=kind: self.notify(kind, keys)
+        for kind, source in (("materials", self._materials), ("recipes", self._recipes)):
+            source.on_conflict = lambda keys, kind=kind: self.notify("conflicts", [(kind, k) for k in keys])
+
+    def path(self, filename):
+        return os.path.join(self.base_dir, filename)
+
+    def materials(self):
+        return self._materials.get()
+
+    def recipes(self):
+        return self._recipes.get()
+
+    def categories(self):
+        return self._categories.get()
+
+    def sales(self):
+        return self._sales.sales()
+
+    def put_materials(self, changes):
+        self._materials.put(changes)
+
+    def put_recipe(self, name, recipe):
+        self._recipes.put({name: recipe})
+
+    def append_sale(self, sale):
+        return self._sales.register(sale)
+
+    def update_sale(self, idx, fields, op="updated", version=None):
+        self._sales.update(idx, fields, op, version)
+
+    def sale_index(self, sale_id):
+        return self._sales.index_of(sale_id)
+
+    def compact_sales(self):
+        self._sales.compact()
+
+    def set_writer(self, writer):
+        # 재료/레시피 파일 저장을 writer 로 (판매는 저널 append 라 그대로)
+        self._materials.writer = writer
+        self._recipes.writer = writer
+
+    def preload(self, progress=None):
+        # 파일 파싱만 미리 (백그라운드 스레드에서 호출 가능)
+        loaders = (self.materials, self.recipes, self.categories, self.sales)
+        for i, load in enumerate(loaders):
+            load()
+            if progress is not None:
+                progress(i + 1, len(loaders))
+
+    def invalidate(self):
+        for cached in (self._materials, self._recipes, self._categories, self._sales):
+            cached.invalidate()
+
+
+class DataStore:
+    def __init__(self, base_dir=".", backend=None):
+        self.base_dir = base_dir
+        self.backend = backend if backend is not None else JsonBackend(base_dir)
+        self.writer = None
+        self._listeners = []
+        self._late_listeners = []
+        self._sources = {}
+        self.backend.notify = self._notify
+
+    # 변경 알림: fn(kind, keys), kind = materials/recipes/sales, keys=None 이면 전체(파일 재로딩)
+    # kind = conflicts 이면 keys 는 다른 프로세스와 충돌해 버려진 [(kind, key), ...]
+    # late=True 는 화면 갱신용: 인덱스/집계 같은 일반 구독자가 먼저 갱신된 뒤 호출됨
+    def add_listener(self, fn, late=False):
+        (self._late_listeners if late else self._listeners).append(fn)
+
+    def remove_listener(self, fn):
+        for listeners in (self._listeners, self._late_listeners):
+            if fn in listeners:
+                listeners.remove(fn)
+
+    def _notify(self, kind, keys):
+        for fn in list(self._listeners) + list(self._late_listeners):
+            fn(kind, keys)
+
+    def _tracked(self, kind, data):
+        # 백엔드가 파일을 다시 읽어 객체가 바뀌었으면 전체 변경으로 알림
+        prev = self._sources.get(kind)
+        self._sources[kind] = data
+        if prev is not None and prev is not data:
+            self._notify(kind, None)
+        return data
+
+    # 읽기 전용 뷰
+    def materials(self):
+        return ReadOnlyDict(self._tracked("materials", self.backend.materials()))
+
+    def recipes(self):
+        return ReadOnlyDict(self._tracked("recipes", self.backend.recipes()))
+
+    def categories(self):
+        return ReadOnlyDict(self.backend.categories())
+
+    def sales(self):
+        return ReadOnlyList(self._tracked("sales", self.backend.sales()))
+
+    # 수정용 사본 (항목 단위). version 이 붙어 있어 저장할 때 그 사이 바뀌었는지 확인됨
+    def material(self, name):
+        return self._copy(self.backend.materials().get(name))
+
+    def recipe(self, name):
+        return self._copy(self.backend.recipes().get(name))
+
+    def _copy(self, record):
+        if record is None:
+            return None
+        record = copy.deepcopy(record)
+        record.setdefault("version", 0)
+        return record
+
+    def sale(self, idx):
+        return copy.deepcopy(self.backend.sales()[idx])
+
+    def sale_index(self, sale_id):
+        # 판매 id -> 현재 목록 위치 (없으면 None)
+        return self.backend.sale_index(sale_id)
+
+    def _versioned(self, kind, key, current, record):
+        # 낙관적 동시성: 수정용 사본에 있던 version 이 지금과 다르면 충돌, 아니면 version + 1
+        cur = record_version(current)
+        if "version" in record and record["version"] != cur:
+            raise ConflictError(kind, key)
+        record = copy.deepcopy(record)
+        record["version"] = (cur or 0) + 1
+        return record
+
+    # 변경 후 한 번만 저장 (하나라도 충돌이면 아무것도 저장하지 않음)
+    def put_materials(self, changes):
+        current = self.backend.materials()
+        staged = {name: self._versioned("materials", name, current.get(name), meta) for name, meta in changes.items()}
+        self.backend.put_materials(staged)
+        self._notify("materials", list(changes))
+
+    def put_material(self, name, meta):
+        self.put_materials({name: meta})
+
+    def put_recipe(self, name, recipe):
+        recipe = self._versioned("recipes", name, self.backend.recipes().get(name), recipe)
+        self.backend.put_recipe(name, recipe)
+        self._notify("recipes", [name])
+
+    def append_sale(self, sale):
+        # 목록 위치와 별개로 바뀌지 않는 id 를 붙임
+        sale = copy.deepcopy(sale)
+        sale.setdefault("id", uuid.uuid4().hex)
+        sale["version"] = 1
+        idx = self.backend.append_sale(sale)
+        self._notify("sales", [idx])
+        return idx
+
+    def update_sale(self, idx, fields, op="updated", version=None):
+        # op: repriced / completed 등 이벤트 종류 (저널 기록용)
+        # version: 화면에 보여줄 때의 version, 그 사이 바뀌었으면 ConflictError (확인/증가는 백엔드가 잠금 안에서)
+        self.backend.update_sale(idx, copy.deepcopy(fields), op, version)
+        self._notify("sales", [idx])
+
+    def set_writer(self, writer):
+        # writer: CachedFile 참고, flush() 로 대기 중인 저장을 바로 기록할 수 있어야 함
+        self.writer = writer
+        self.backend.set_writer(writer)
+
+    def flush(self):
+        # 지연 저장 중인 내용을 바로 기록
+        if self.writer is not None:
+            self.writer.flush()
+
+    def preload(self, progress=None):
+        self.backend.preload(progress)
+
+    def invalidate(self):
+        self.backend.invalidate()
+
+
+def open_backend(base_dir="."):
+    # ALBION_BACKEND=json|sqlite 로 강제, 없으면 db 파일이 있을 때 sqlite 사용
+    from sqlite_backend import DB_FILE, SqliteBackend
+    kind = os.environ.get("ALBION_BACKEND")
+    db_path = os.path.join(base_dir, DB_FILE)
+    if kind == "sqlite" or (kind is None and os.path.exists(db_path)):
+        return SqliteBackend(db_path, base_dir)
+    return JsonBackend(base_dir)
+
+
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = DataStore(backend=open_backend())
+        # 어느 창/명령으로 저장하든 시장가 변경이 시세 이력에 남도록 store 를 만들 때 한 번 구독
+        from price_history import get_price_history
+        get_price_history(_store)
+    return _store
@@ -0,0 +1,83 @@
+import datetime
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox,
+    QTableWidget, QTableWidgetItem, QTextEdit, QFileDialog, QMessageBox
+)
+import perf_stats
+
+REFRESH_MS = 1000
+COLUMNS = ["이름", "호출", "평균ms", "p50ms", "p95ms", "최대ms", "읽음KB", "씀KB"]
+
+
+class DiagnosticsWindow(QWidget):
+    # perf_stats 수집 결과를 1초마다 표로 보여줌. 다음 화면 동작 하나를 cProfile 로 잡을 수 있음
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("성능 진단")
+        layout = QVBoxLayout()
+        self.enable = QCheckBox("측정 켜기")
+        self.enable.setChecked(perf_stats.enabled())
+        self.enable.stateChanged.connect(self.toggle_enabled)
+        btn_reset = QPushButton("초기화")
+        btn_reset.clicked.connect(self.reset)
+        btn_dump = QPushButton("JSON 저장")
+        btn_dump.clicked.connect(self.dump)
+        self.btn_profile = QPushButton("다음 동작 프로파일")
+        self.btn_profile.clicked.connect(self.arm_profile)
+        h = QHBoxLayout()
+        h.addWidget(self.enable)
+        h.addWidget(btn_reset)
+        h.addWidget(btn_dump)
+        h.addWidget(self.btn_profile)
+        layout.addLayout(h)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        layout.addWidget(self.table)
+        self.profile_label = QLabel("프로파일 없음")
+        self.profile_text = QTextEdit()
+        self.profile_text.setReadOnly(True)
+        layout.addWidget(self.profile_label)
+        layout.addWidget(self.profile_text)
+        self.setLayout(layout)
+
+        self._shown_profile = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.refresh()
+
+    def toggle_enabled(self):
+        perf_stats.set_enabled(self.enable.isChecked())
+
+    def reset(self):
+        perf_stats.reset()
+        self.refresh()
+
+    def arm_profile(self):
+        perf_stats.profile_next()
+        self.profile_label.setText("다음 동작을 프로파일합니다...")
+
+    def dump(self):
+        default = f"perf-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+        filename, _ = QFileDialog.getSaveFileName(self, "JSON 저장", default, "JSON (*.json)")
+        if not filename:
+            return
+        perf_stats.dump(filename)
+        QMessageBox.information(self, "알림", f"저장됨: {filename}")
+
+    def refresh(self):
+        stats = perf_stats.snapshot()
+        self.table.setRowCount(len(stats))
+        for r, (name, s) in enumerate(stats.items()):
+            cells = [name, s["count"], s["avg_ms"], s["p50_ms"], s["p95_ms"], s["max_ms"],
+                     round(s["bytes_read"] / 1024, 1), round(s["bytes_written"] / 1024, 1)]
+            for c, v in enumerate(cells):
+                self.table.setItem(r, c, QTableWidgetItem(str(v)))
+        profile = perf_stats.last_profile
+        if profile is not None and profile is not self._shown_profile:
+            self._shown_profile = profile
+            self.profile_label.setText(f"{profile['name']} {profile['elapsed_ms']:.1f} ms -> {profile['file']}")
+            self.profile_text.setPlainText(profile["text"])
@@ -1,46 +1,39 @@
-import json
 import datetime
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QComboBox, QSpinBox, QMessageBox
 )
+import lots
+from data_store import ConflictError, get_store, record_version
+from perf_stats import action
+from category_index import get_category_index
+from change_bus import get_change_bus
+from name_index import get_name_index
+from qt_models import LazyListModel, LiveSource, attach_search, select_value
 
-DATA_FILE = "material_data.json"
-CATEGORY_FILE = "category.json"
-
-def load_data(filename):
-    with open(filename, encoding="utf-8") as f:
-        return json.load(f)
-
-def save_data(filename, data):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-def load_category_tree():
-    with open(CATEGORY_FILE, encoding="utf-8") as f:
-        return json.load(f)
-
-def get_category_path_from_index(cat_tree, idx_list):
-    names = []
-    node = cat_tree
-    for idx in idx_list:
-        idx_str = str(idx)
-        if idx_str in node:
-            names.append(node[idx_str]["name"])
-            node = node[idx_str].get("category", {})
-        else:
-            break
-    return names
+def get_category_path_from_index(idx_list):
+    return get_category_index().name_path(idx_list)
 
 class InventoryManager(QWidget):
     def __init__(self):
         super().__init__()
+        self.store = get_store()
         self.setWindowTitle("인벤토리")
         layout = QVBoxLayout()
 
+        # 카테고리 필터 (하위 카테고리 포함)
+        self.cat_filter = QComboBox()
+        self.cat_filter.currentIndexChanged.connect(self.load_materials)
+        layout.addWidget(QLabel("카테고리 필터"))
+        layout.addWidget(self.cat_filter)
+
         # 재료 선택
         self.material_select = QComboBox()
-        self.material_select.addItem("새로 입력")
+        # 재료 목록은 모델에서 보이는 만큼만 가져옴
+        self.material_model = LazyListModel(leading=["새로 입력"])
+        self.material_select.setModel(self.material_model)
+        # 이름/초성 입력으로 검색
+        attach_search(self.material_select, get_name_index())
         self.material_select.currentIndexChanged.connect(self.load_selected_material)
         layout.addWidget(self.material_select)
 
@@ -89,37 +82,38 @@ class InventoryManager(QWidget):
         layout.addWidget(btn)
 
         self.setLayout(layout)
-        self.cat_tree = load_category_tree()
+        self.cat_index = get_category_index()
+        self.load_category_filter()
         self.load_materials()
+        # 다른 창/프로세스에서 바뀐 재료만 반영
+        bus = get_change_bus()
+        bus.material_changed.connect(self.on_material_changed)
+        bus.material_removed.connect(self.on_material_changed)
+        bus.reset.connect(self.on_reset)
+
+    def fill_category_box(self, box, path, selected=None):
+        # path 의 자식들로 채우고 selected(idx) 복구. path 가 None 이면 공백만
+        box.blockSignals(True)
+        box.clear()
+        box.addItem("")
+        if path is not None:
+            for idx, name in self.cat_index.child_list(path):
+                box.addItem(name, idx)
+            pos = self.cat_index.position(path, selected) if selected is not None else -1
+            box.setCurrentIndex(pos + 1)
+        box.blockSignals(False)
 
     def update_category_boxes(self):
-        node = self.cat_tree
+        # 바뀐 박스 아래 단계만 다시 채움 (자식 목록은 인덱스에 정렬돼 있음)
         boxes = [self.cat_box1, self.cat_box2, self.cat_box3, self.cat_box4]
-        idx_list = [box.currentData() for box in boxes]
-        for depth, box in enumerate(boxes):
-            # 하위 후보 갱신 전 block
-            box.blockSignals(True)
-            box.clear()
-            box.addItem("")
-            if node and isinstance(node, dict):
-                for k in sorted(node.keys(), key=int):
-                    box.addItem(node[k]["name"], int(k))
-            # 현재 선택값 복구
-            idx = idx_list[depth]
-            if idx is not None and idx in [box.itemData(i) for i in range(box.count()) if box.itemData(i) is not None]:
-                # 값이 있으면 복구
-                for i in range(box.count()):
-                    if box.itemData(i) == idx:
-                        box.setCurrentIndex(i)
-                        break
-            else:
-                box.setCurrentIndex(0)
-            box.blockSignals(False)
-            # 다음 노드 이동
-            if box.currentIndex() > 0:
-                node = node.get(str(box.currentData()), {}).get("category", {})
-            else:
-                node = None
+        sender = self.sender()
+        start = boxes.index(sender) + 1 if sender in boxes else 0
+        path = tuple(self.get_selected_category_index()[:start])
+        if len(path) < start:
+            path = None
+        for box in boxes[start:]:
+            self.fill_category_box(box, path, box.currentData())
+            path = path + (box.currentData(),) if path is not None and box.currentIndex() > 0 else None
     # def update_category_boxes(self):
     #     node = self.cat_tree
     #     boxes = [self.cat_box1, self.cat_box2, self.cat_box3, self.cat_box4]
@@ -220,57 +214,65 @@ class InventoryManager(QWidget):
     #         boxes[j].addItem("")
     #         boxes[j].blockSignals(False)
     def set_category_boxes_by_index(self, idx_list):
-        node = self.cat_tree
         boxes = [self.cat_box1, self.cat_box2, self.cat_box3, self.cat_box4]
-        # 1단계(최상위) 후보는 무조건 채우기
-        box = boxes[0]
-        box.blockSignals(True)
-        box.clear()
-        box.addItem("")
-        if isinstance(node, dict):
-            for k in sorted(node.keys(), key=int):
-                box.addItem(node[k]["name"], int(k))
-        if idx_list and len(idx_list) > 0:
-            box.setCurrentIndex(idx_list[0] + 1)
-            node = node.get(str(idx_list[0]), {}).get("category", {})
-        else:
-            box.setCurrentIndex(0)
-            node = None
-        box.blockSignals(False)
-        # 2~4단계는 idx_list 기반으로만 후보 채움
-        for i in range(1, 4):
-            box = boxes[i]
-            box.blockSignals(True)
-            box.clear()
-            box.addItem("")
-            if node and isinstance(node, dict):
-                for k in sorted(node.keys(), key=int):
-                    box.addItem(node[k]["name"], int(k))
-            if idx_list and len(idx_list) > i:
-                box.setCurrentIndex(idx_list[i] + 1)
-                node = node.get(str(idx_list[i]), {}).get("category", {}) if node else None
-            else:
-                box.setCurrentIndex(0)
-                node = None
-            box.blockSignals(False)
+        path = ()
+        for i, box in enumerate(boxes):
+            selected = idx_list[i] if idx_list and len(idx_list) > i else None
+            self.fill_category_box(box, path, selected)
+            path = path + (selected,) if path is not None and box.currentIndex() > 0 else None
+
+    def load_category_filter(self):
+        # 전체 + 평탄화된 카테고리 경로 목록
+        self.cat_filter.blockSignals(True)
+        self.cat_filter.clear()
+        self.cat_filter.addItem("전체", None)
+        for path in self.cat_index.flat[1:]:
+            self.cat_filter.addItem(" > ".join(self.cat_index.names[path]), path)
+        self.cat_filter.blockSignals(False)
 
+    @action("category_filter")
     def load_materials(self):
         # material_data.json에서 불러오기
         try:
-            raw = load_data(DATA_FILE)
-        except:
+            raw = self.store.materials()
+        except Exception:
             raw = {}
         self.materials = raw
+        self.cat_index = get_category_index()
+        path = self.cat_filter.currentData()
+        if path is None:
+            names = list(self.materials)
+        else:
+            under = self.cat_index.items_under(path)
+            names = [n for n in self.materials if n in under]
+        self.material_source = LiveSource(names, accept=self.in_filter)
         self.material_select.blockSignals(True)
-        self.material_select.clear()
-        self.material_select.addItem("새로 입력")
-        for name in self.materials:
-            self.material_select.addItem(name)
+        self.material_model.reset(self.material_source)
+        self.material_select.setCurrentIndex(0)
         self.material_select.blockSignals(False)
         self.update_category_boxes()
 
+    def in_filter(self, name):
+        meta = self.materials.get(name)
+        if meta is None:
+            return False
+        path = self.cat_filter.currentData()
+        return path is None or tuple(meta.get("category") or ())[:len(path)] == tuple(path)
+
+    def on_material_changed(self, name):
+        # 필터에 새로 들어오거나 빠진 재료만 목록에서 넣고 빼고, 보고 있던 재료면 입력칸을 다시 채움
+        self.material_source.update(self.material_model, name)
+        if getattr(self, "loaded", None) and self.loaded[0] == name and self.in_filter(name):
+            self.load_selected_material()
+
+    def on_reset(self, kind):
+        if kind == "materials":
+            self.load_materials()
+
+    @action("material_detail")
     def load_selected_material(self):
         idx = self.material_select.currentIndex()
+        self.loaded = None
         if idx == 0:  # 새로 입력
             self.name.setText("")
             self.set_category_boxes_by_index([])
@@ -283,6 +285,8 @@ class InventoryManager(QWidget):
         else:
             mat_name = self.material_select.currentText()
             meta = self.materials.get(mat_name, {})
+            # 저장할 때 그 사이 다른 창/프로세스가 바꿨는지 확인용
+            self.loaded = (mat_name, record_version(self.materials.get(mat_name)))
             # 카테고리
             cat_idx = meta.get("category", [])
             self.set_category_boxes_by_index(cat_idx)
@@ -298,8 +302,9 @@ class InventoryManager(QWidget):
             t = mat.get("market_price_time", None)
             self.market_price_time.setText(str(t) if t else "-")
 
+    @action("save_material")
     def save_material(self):
-        materials = load_data(DATA_FILE)
+        materials = self.store.materials()
         n = self.name.text()
         b = self.buy_price.value()
         f = self.fee.value()
@@ -307,7 +312,9 @@ class InventoryManager(QWidget):
         m = self.market_price.value()
         enchant = str(self.enchant.currentData())
         category_idx = self.get_selected_category_index()
-        now = datetime.datetime.now().isoformat(sep=" ", timespec="seconds") if m else materials.get(n, {}).get("enchant", {}).get(enchant, {}).get("market_price_time")
+        # 시장가가 실제로 바뀐 경우만 시각 갱신 (카테고리/개수만 고친 저장이 시세 관측으로 남지 않게)
+        prev = materials.get(n, {}).get("enchant", {}).get(enchant, {})
+        now = datetime.datetime.now().isoformat(sep=" ", timespec="seconds") if m and m != prev.get("market_price") else prev.get("market_price_time")
         if not n:
             QMessageBox.warning(self, "경고", "재료명을 입력하세요")
             return
@@ -316,20 +323,36 @@ class InventoryManager(QWidget):
             QMessageBox.warning(self, "경고", "이미 존재하는 아이템입니다. 수정하려면 리스트에서 선택하세요.")
             return
         # 구조 맞추기
-        if n not in materials or not isinstance(materials[n], dict):
-            materials[n] = {"category": category_idx, "enchant": {}}
+        meta = self.store.material(n)
+        if not isinstance(meta, dict):
+            meta = {"category": category_idx, "enchant": {}}
         else:
-            materials[n]["category"] = category_idx
-        if "enchant" not in materials[n]:
-            materials[n]["enchant"] = {}
-        materials[n]["enchant"][enchant] = {
+            meta["category"] = category_idx
+        if "enchant" not in meta:
+            meta["enchant"] = {}
+        rec = {
             "buy_price": b,
             "fee": f,
             "count": c,
             "market_price": m,
             "market_price_time": now
         }
-        save_data(DATA_FILE, materials)
+        old = meta["enchant"].get(enchant)
+        if old and ("lots" in old or c > old.get("count", 0)):
+            # 재고 lot 유지: 늘어난 수량은 지금 구매가+수수료의 새 lot, 줄어든 수량은 정책대로 차감
+            lots.restock(old, c, b + f, datetime.datetime.now().isoformat(sep=" ", timespec="seconds"))
+            if "lots" in old:
+                rec["lots"] = old["lots"]
+        meta["enchant"][enchant] = rec
+        loaded = getattr(self, "loaded", None)
+        if loaded is not None and loaded[0] == n and loaded[1] is not None:
+            meta["version"] = loaded[1]
+        try:
+            self.store.put_material(n, meta)
+        except ConflictError:
+            QMessageBox.warning(self, "충돌", "다른 창에서 이 재료를 먼저 수정했습니다. 새 내용을 불러옵니다.")
+            self.load_selected_material()
+            return
         QMessageBox.information(self, "알림", "저장됨")
-        self.load_materials()
-        self.material_select.setCurrentText(n)
+        # 목록은 변경 알림으로 이미 반영됨
+        select_value(self.material_select, n)
@@ -0,0 +1,127 @@
+import os
+from collections import deque
+from operator import itemgetter
+
+# 재고 lot: 아이템/인첸트 레코드의 "lots" = [[수량, 개당 원가, 들어온 시각], ...] (들어온 순서)
+#   lot 합계는 항상 레코드의 count 와 같게 유지. lot 이 생기기 전부터 있던 재고(또는 lot 합계보다 많은 count)는
+#   buy_price + fee 원가의 lot 하나로 보고 맨 앞(가장 오래된 것)에 둠
+# 판매/제작 투입은 정책에 따라 lot 에서 차감: fifo (오래된 것부터), lifo (최근 것부터), average (이동평균)
+# 차감은 deque 양 끝에서만 하므로 건드린 lot 수만큼만 일함. average 는 처음 차감할 때 한 lot 으로 합쳐 둠
+FIFO = "fifo"
+LIFO = "lifo"
+AVERAGE = "average"
+POLICIES = (FIFO, LIFO, AVERAGE)
+# ALBION_LOT_POLICY=lifo / average 로 기본 정책 변경
+POLICY = os.environ.get("ALBION_LOT_POLICY", FIFO)
+_qty = itemgetter(0)
+
+
+class LotError(ValueError):
+    pass
+
+
+def money(value):
+    # 정수로 떨어지면 정수, 아니면 소수 둘째 자리
+    return int(value) if value == int(value) else round(value, 2)
+
+
+def base_cost(rec):
+    return rec.get("buy_price", 0) + rec.get("fee", 0)
+
+
+class LotQueue:
+    # lots 의 각 lot(list)은 그대로 쓰고 수정함 (수정 가능한 사본 레코드에서 만들 것)
+    def __init__(self, lots=(), count=None):
+        self.lots = deque(lots)
+        self.count = sum(map(_qty, self.lots)) if count is None else count
+
+    @classmethod
+    def from_record(cls, rec, copy=False):
+        # 레코드의 lot 으로 큐를 만듦 (copy=True 면 lot 을 복사해서 읽기 전용 레코드도 가능).
+        # count 와 lot 합계가 다르면 맞춤
+        lots = rec.get("lots") or ()
+        queue = cls([list(lot) for lot in lots] if copy else lots)
+        count = rec.get("count", 0)
+        if count > queue.count:
+            queue.lots.appendleft([count - queue.count, base_cost(rec), None])
+            queue.count = count
+        elif count < queue.count:
+            # count 를 직접 줄인 경우: 오래된 lot 부터 뺌
+            queue.take(queue.count - count, FIFO)
+        return queue
+
+    def store(self, rec):
+        # lot 이 예전부터 있던 재고 하나뿐이면 "lots" 없이 (MaterialTable 배열 칸에 그대로 들어감)
+        rec["count"] = self.count
+        lots = self.lots
+        if not lots or (len(lots) == 1 and lots[0][2] is None and lots[0][1] == base_cost(rec)):
+            rec.pop("lots", None)
+        else:
+            rec["lots"] = list(lots)
+
+    def add(self, qty, unit_cost, acquired=None):
+        if qty <= 0:
+            return
+        self.lots.append([qty, money(unit_cost), acquired])
+        self.count += qty
+
+    def _merge(self):
+        total = sum(q * c for q, c, _ in self.lots)
+        acquired = self.lots[-1][2]
+        self.lots = deque([[self.count, money(total / self.count), acquired]])
+
+    def take(self, qty, policy=None):
+        # qty 개를 차감하고 그 원가 합계 반환
+        policy = policy or POLICY
+        if policy not in POLICIES:
+            raise LotError(f"원가 정책 오류: {policy}")
+        if qty > self.count:
+            raise LotError(f"재고 부족 (보유:{self.count}, 요청:{qty})")
+        if policy == AVERAGE and len(self.lots) > 1:
+            self._merge()
+        end = -1 if policy == LIFO else 0
+        pop = self.lots.pop if policy == LIFO else self.lots.popleft
+        cost = 0
+        left = qty
+        while left > 0:
+            lot = self.lots[end]
+            n = min(lot[0], left)
+            cost += n * lot[1]
+            lot[0] -= n
+            left -= n
+            if lot[0] <= 0:
+                pop()
+        self.count -= qty
+        return money(cost)
+
+
+def consume(rec, qty, policy=None):
+    # 레코드에서 qty 개를 lot 정책대로 차감하고 원가 합계 반환 (rec 는 수정 가능한 사본)
+    queue = LotQueue.from_record(rec)
+    cost = queue.take(qty, policy)
+    queue.store(rec)
+    return cost
+
+
+def receive(rec, qty, unit_cost, acquired=None):
+    # 입고: 새 lot 추가
+    queue = LotQueue.from_record(rec)
+    queue.add(qty, unit_cost, acquired)
+    queue.store(rec)
+
+
+def restock(rec, count, unit_cost, acquired=None, policy=None):
+    # 재고 수량을 직접 고친 경우: 늘어난 만큼 새 lot, 줄어든 만큼 정책대로 차감
+    queue = LotQueue.from_record(rec)
+    if count > queue.count:
+        queue.add(count - queue.count, unit_cost, acquired)
+    elif count < queue.count:
+        queue.take(queue.count - count, policy)
+    queue.store(rec)
+
+
+def preview(rec, qty, policy=None):
+    # 차감하지 않고 qty 개의 원가만 계산 (읽기 전용 레코드 가능). 재고보다 많으면 모자란 만큼 buy_price + fee
+    queue = LotQueue.from_record(rec, copy=True)
+    have = min(qty, queue.count)
+    return money(queue.take(have, policy) + (qty - have) * base_cost(rec))
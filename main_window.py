@@ -0,0 +1,103 @@
+from profit_manager import ProfitManager
+from sale_register import SaleRegister
+from inventory_manager import InventoryManager
+from recipe_calc import RecipeCalc
+from recipe_manager import RecipeManager
+from diagnostics_window import DiagnosticsWindow
+from data_store import get_store
+from workers import DebouncedWriter, get_worker
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+    QPushButton, QMessageBox
+    # , QTextEdit, QComboBox, QSpinBox
+)
+
+class MainWindow(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("제작 시뮬레이터")
+        layout = QVBoxLayout()
+        btn_inv = QPushButton("인벤토리")
+        btn_recipe = QPushButton("레시피")
+        btn_calc = QPushButton("제작비용계산")
+        btn_sale = QPushButton("판매등록")
+        btn_profit = QPushButton("수익 정산")
+        btn_diag = QPushButton("성능 진단")
+
+        btn_inv.clicked.connect(self.open_inventory)
+        btn_recipe.clicked.connect(self.open_recipe)
+        btn_calc.clicked.connect(self.open_calc)
+        btn_sale.clicked.connect(self.open_sale)
+        btn_profit.clicked.connect(self.open_profit)
+        btn_diag.clicked.connect(self.open_diagnostics)
+
+        layout.addWidget(btn_inv)
+        layout.addWidget(btn_recipe)
+        layout.addWidget(btn_calc)
+        layout.addWidget(btn_sale)
+        layout.addWidget(btn_profit)
+        layout.addWidget(btn_diag)
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+        self.setLayout(layout)
+
+        # 파일 저장은 몰아서 백그라운드로(파일별 순서 보장), 시작할 때 파일 파싱도 미리
+        store = get_store()
+        worker = get_worker()
+        store.set_writer(DebouncedWriter(worker))
+        QApplication.instance().aboutToQuit.connect(store.flush)
+        worker.busy_changed.connect(self.show_busy)
+        worker.task_failed.connect(self.show_error)
+        store.add_listener(self.on_store_change)
+        worker.submit(store.preload, on_progress=self.show_progress)
+
+        self._inventory_window = None
+        self._recipe_window = None
+        self._calc_window = None
+        self._sale_window = None
+        self._profit_window = None
+        self._diag_window = None
+
+    def show_busy(self, pending):
+        self.status.setText(f"작업 중... ({pending})" if pending else "")
+
+    def show_progress(self, done, total):
+        self.status.setText(f"불러오는 중... {done}/{total}")
+
+    def show_error(self, error):
+        QMessageBox.warning(self, "오류", error.strip().splitlines()[-1])
+
+    def on_store_change(self, kind, keys):
+        # 다른 프로세스와 같은 항목을 동시에 고쳐서 디스크 쪽 내용을 남긴 경우
+        if kind == "conflicts" and keys:
+            names = ", ".join(str(key) for _, key in keys)
+            QMessageBox.warning(self, "충돌", f"다른 곳에서 먼저 저장한 내용이 있어 다음 항목은 저장되지 않았습니다:\n{names}")
+
+    def closeEvent(self, event):
+        # 모아둔 저장을 바로 기록하고 종료
+        get_store().flush()
+        super().closeEvent(event)
+
+    def open_profit(self):
+        self._profit_window = ProfitManager()
+        self._profit_window.show()
+
+    def open_inventory(self):
+        self._inventory_window = InventoryManager()
+        self._inventory_window.show()
+
+    def open_recipe(self):
+        self._recipe_window = RecipeManager()
+        self._recipe_window.show()
+
+    def open_calc(self):
+        self._calc_window = RecipeCalc()
+        self._calc_window.show()
+
+    def open_sale(self):
+        self._sale_window = SaleRegister()
+        self._sale_window.show()
+
+    def open_diagnostics(self):
+        self._diag_window = DiagnosticsWindow()
+        self._diag_window.show()
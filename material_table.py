@@ -0,0 +1,345 @@
+import re
+import json
+import datetime
+import functools
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+# 재료 데이터(material_data.json)를 재료마다 dict 를 만들지 않고 열(array) 단위로 보관.
+#   재료 이름은 번호(item_id)로 한 번만 저장, 카테고리/키 순서 같은 반복되는 값은 공유
+#   인첸트 레코드(buy_price/fee/count/market_price, market_price_time 은 epoch 초)는 int64 배열의 칸 하나.
+#   재료마다 item_base 부터 enchant 키 순서대로 칸을 쓰고, 예전 형식의 최상위 "0" 항목이 있으면 마지막 칸
+# 조회하면 그때 json 과 같은 dict 를 새로 만들어 돌려주고, 저장은 레코드를 통째로 교체.
+# 배열로 표현할 수 없는 값(예상 밖 키/타입/시간 형식)은 원래 값 그대로 보관해서 json 변환은 항상 원본과 같음
+FIELDS = ("buy_price", "fee", "count", "market_price")
+TIME_FIELD = "market_price_time"
+RECORD_KEYS = FIELDS + (TIME_FIELD,)
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+NO_TIME = INT64_MIN          # market_price_time 이 None
+STATE_TAG = "material_table/1"
+# 교체/삭제로 버려진 칸이 이 비율을 넘으면 다시 채움
+GARBAGE_RATIO = 0.25
+GARBAGE_MIN = 1024
+# 시간은 시간대 변환 없이 "YYYY-MM-DD HH:MM:SS" 를 그대로 초로 (변환해도 원래 문자열로 돌아옴)
+TIME_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}\Z")
+EPOCH = datetime.datetime(1970, 1, 1)
+DUMP_CHUNK = 1000            # dump_mapping 이 한 번에 만드는 항목 수
+TIME_CACHE = 8192            # 일괄 가격 갱신은 같은 시간이 반복되므로 변환 결과 재사용
+_PACKED = object()
+
+
+@functools.lru_cache(maxsize=TIME_CACHE)
+def parse_time(text):
+    # 배열에 넣을 수 있으면 epoch 초, 아니면 None
+    if text is None:
+        return NO_TIME
+    if type(text) is not str or not TIME_RE.match(text):
+        return None
+    try:
+        dt = datetime.datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                               int(text[11:13]), int(text[14:16]), int(text[17:19]))
+    except ValueError:
+        return None
+    delta = dt - EPOCH
+    return delta.days * 86400 + delta.seconds
+
+
+@functools.lru_cache(maxsize=TIME_CACHE)
+def format_time(ts):
+    if ts == NO_TIME:
+        return None
+    dt = EPOCH + datetime.timedelta(seconds=ts)
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+
+def _packable_int(value):
+    return type(value) is int and INT64_MIN <= value <= INT64_MAX
+
+
+class _Interned:
+    # 같은 값은 한 번만 저장하고 번호로 참조 (카테고리 경로, 키 순서)
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.index = {v: i for i, v in enumerate(self.values)}
+
+    def id(self, value):
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+
+class MaterialTable(MutableMapping):
+    def __init__(self, data=None):
+        self.ids = {}                   # 이름 -> item_id (dict 순서 = json 순서 = 번호 순서)
+        self.names = []                 # item_id -> 이름 (삭제되면 None)
+        self.layouts = _Interned()      # 최상위 키 순서
+        self.orders = _Interned()       # enchant 키 순서
+        self.categories = _Interned()   # 카테고리 경로 튜플
+        self.item_layout = array("i")   # -1: 레코드 전체가 raw
+        self.item_order = array("i")    # -1: enchant 값이 raw
+        self.item_category = array("i")  # -1: 카테고리가 없거나 raw
+        self.item_version = array("q")
+        self.item_base = array("q")     # 첫 칸 위치
+        self.item_slots = array("i")    # 칸 수
+        self.columns = {f: array("q") for f in FIELDS}
+        self.times = array("q")
+        self.raw = {}                   # item_id -> {키: 원래 값}, 레코드 전체가 raw 면 그 값
+        self.raw_records = {}           # (item_id, enchant 키 / 최상위 "0" 은 None) -> 원래 레코드
+        self.garbage = 0                # 버려진 칸 + 삭제된 번호
+        if data is not None:
+            for name, meta in data.items():
+                self[name] = meta
+
+    # --- 변환 ---
+
+    @classmethod
+    def load(cls, data):
+        # json dict / state() 결과 / MaterialTable 중 무엇이든 MaterialTable 로
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, tuple) and data and data[0] == STATE_TAG:
+            return cls.from_state(data)
+        return cls(data)
+
+    def to_json(self):
+        return {name: self._build(i) for name, i in self.ids.items()}
+
+    def _arrays(self):
+        arrays = {"layout": self.item_layout, "order": self.item_order, "category": self.item_category,
+                  "version": self.item_version, "base": self.item_base, "slots": self.item_slots,
+                  TIME_FIELD: self.times}
+        arrays.update(self.columns)
+        return arrays
+
+    def state(self):
+        # marshal 가능한 형태 (스냅샷 캐시용), 배열은 bytes 로 그대로
+        return (
+            STATE_TAG, self.names, self.layouts.values, self.orders.values, self.categories.values,
+            {key: arr.tobytes() for key, arr in self._arrays().items()},
+            self.raw, self.raw_records, self.garbage,
+        )
+
+    @classmethod
+    def from_state(cls, state):
+        _, names, layouts, orders, categories, arrays, raw, raw_records, garbage = state
+        table = cls()
+        table.names = list(names)
+        table.ids = {name: i for i, name in enumerate(table.names) if name is not None}
+        table.layouts = _Interned(tuple(v) for v in layouts)
+        table.orders = _Interned(tuple(v) for v in orders)
+        table.categories = _Interned(tuple(v) for v in categories)
+        for key, arr in table._arrays().items():
+            arr.frombytes(arrays[key])
+        table.raw = dict(raw)
+        table.raw_records = {tuple(k): v for k, v in raw_records.items()}
+        table.garbage = garbage
+        return table
+
+    def __copy__(self):
+        # 저장 중 스냅샷용: 이후 변경이 복사본에 보이지 않게 배열까지 복사
+        table = MaterialTable()
+        table.ids = dict(self.ids)
+        table.names = list(self.names)
+        table.layouts = _Interned(self.layouts.values)
+        table.orders = _Interned(self.orders.values)
+        table.categories = _Interned(self.categories.values)
+        for key, arr in table._arrays().items():
+            arr.extend(self._arrays()[key])
+        table.raw = dict(self.raw)
+        table.raw_records = dict(self.raw_records)
+        table.garbage = self.garbage
+        return table
+
+    # --- Mapping ---
+
+    def __getitem__(self, name):
+        return self._build(self.ids[name])
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __eq__(self, other):
+        if isinstance(other, MaterialTable):
+            other = other.to_json()
+        return isinstance(other, Mapping) and self.to_json() == dict(other.items())
+
+    def __repr__(self):
+        return f"MaterialTable({len(self)} items)"
+
+    def __setitem__(self, name, meta):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.item_layout.append(-1)
+            self.item_order.append(-1)
+            self.item_category.append(-1)
+            self.item_version.append(0)
+            self.item_base.append(len(self.times))
+            self.item_slots.append(0)
+        else:
+            self._clear_raw(i)
+        self._pack(i, meta)
+        self._maybe_compact()
+
+    def __delitem__(self, name):
+        i = self.ids.pop(name)
+        self.names[i] = None
+        self._clear_raw(i)
+        self.garbage += self.item_slots[i] + 1
+        self.item_slots[i] = 0
+        self._maybe_compact()
+
+    def _clear_raw(self, i):
+        self.raw.pop(i, None)
+        if self.raw_records:
+            for key in [k for k in self.raw_records if k[0] == i]:
+                del self.raw_records[key]
+
+    def _maybe_compact(self):
+        if self.garbage > GARBAGE_MIN and self.garbage > (len(self.times) + len(self.names)) * GARBAGE_RATIO:
+            fresh = MaterialTable(self.to_json())
+            self.__dict__.update(fresh.__dict__)
+
+    # --- 인코딩 ---
+
+    def _alloc(self, i, n):
+        # 칸 수가 같으면 그 자리에 덮어씀, 다르면 끝에 새로 (이전 칸은 버림)
+        if self.item_slots[i] == n:
+            return self.item_base[i]
+        self.garbage += self.item_slots[i]
+        base = len(self.times)
+        zeros = array("q", bytes(8 * n))
+        for arr in self.columns.values():
+            arr.extend(zeros)
+        self.times.extend(zeros)
+        self.item_base[i] = base
+        self.item_slots[i] = n
+        return base
+
+    def _pack_record(self, i, pos, key, rec):
+        # 배열 칸에 넣을 수 없으면 원래 레코드로 보관 (칸은 비워 둠)
+        ts = None
+        if type(rec) is dict and tuple(rec) == RECORD_KEYS:
+            ts = parse_time(rec[TIME_FIELD])
+            if ts is not None and not all(_packable_int(rec[f]) for f in FIELDS):
+                ts = None
+        if ts is None:
+            self.raw_records[(i, key)] = rec
+            return
+        for f in FIELDS:
+            self.columns[f][pos] = rec[f]
+        self.times[pos] = ts
+
+    def _pack(self, i, meta):
+        if type(meta) is not dict:
+            self.item_layout[i] = -1
+            self._alloc(i, 0)
+            self.raw[i] = meta
+            return
+        enchants = meta.get("enchant")
+        enchants = enchants if type(enchants) is dict else None
+        legacy = type(meta.get("0")) is dict
+        n = (len(enchants) if enchants is not None else 0) + legacy
+        base = self._alloc(i, n)
+        raw = {}
+        self.item_layout[i] = self.layouts.id(tuple(meta))
+        self.item_order[i] = -1
+        self.item_category[i] = -1
+        for key, value in meta.items():
+            if key == "enchant" and enchants is not None:
+                self.item_order[i] = self.orders.id(tuple(value))
+                for pos, (enchant, rec) in enumerate(value.items()):
+                    self._pack_record(i, base + pos, enchant, rec)
+            elif key == "category" and type(value) is list and all(type(v) is int for v in value):
+                self.item_category[i] = self.categories.id(tuple(value))
+            elif key == "version" and _packable_int(value):
+                self.item_version[i] = value
+            elif key == "0" and legacy:
+                self._pack_record(i, base + n - 1, None, value)
+            else:
+                raw[key] = value
+        if raw:
+            self.raw[i] = raw
+
+    # --- 디코딩 ---
+
+    def _record(self, pos):
+        c = self.columns
+        return {
+            "buy_price": c["buy_price"][pos],
+            "fee": c["fee"][pos],
+            "count": c["count"][pos],
+            "market_price": c["market_price"][pos],
+            TIME_FIELD: format_time(self.times[pos]),
+        }
+
+    def _field(self, i, key, raw):
+        if key in raw:
+            return raw[key]
+        if key == "enchant":
+            base = self.item_base[i]
+            enchants = {}
+            for pos, enchant in enumerate(self.orders.values[self.item_order[i]]):
+                rec = self.raw_records.get((i, enchant), _PACKED)
+                enchants[enchant] = self._record(base + pos) if rec is _PACKED else rec
+            return enchants
+        if key == "category":
+            return list(self.categories.values[self.item_category[i]])
+        if key == "version":
+            return self.item_version[i]
+        rec = self.raw_records.get((i, None), _PACKED)
+        return self._record(self.item_base[i] + self.item_slots[i] - 1) if rec is _PACKED else rec
+
+    def _build(self, i):
+        layout = self.item_layout[i]
+        if layout < 0:
+            return self.raw[i]
+        raw = self.raw.get(i, {})
+        return {key: self._field(i, key, raw) for key in self.layouts.values[layout]}
+
+    def field_items(self, key, default=None):
+        # 재료마다 최상위 key 값만 (이름, 값) 으로. 레코드 전체를 만들지 않음
+        for name, i in self.ids.items():
+            layout = self.item_layout[i]
+            if layout < 0:
+                meta = self.raw[i]
+                yield name, meta.get(key, default) if isinstance(meta, Mapping) else default
+            elif key in self.layouts.values[layout]:
+                yield name, self._field(i, key, self.raw.get(i, {}))
+            else:
+                yield name, default
+
+    def nbytes(self):
+        # 배열이 차지하는 바이트 (이름/raw 값 제외)
+        return sum(arr.itemsize * len(arr) for arr in self._arrays().values())
+
+
+def dump_mapping(f, data, indent=2, chunk=DUMP_CHUNK):
+    # json.dump(data, f, ensure_ascii=False, indent=indent) 와 같은 결과를 chunk 개씩 나눠 써서
+    # 전체 dict 를 한 번에 만들지 않음. 나눈 dict 를 같은 들여쓰기로 만들고 바깥 괄호만 떼어 이어 붙임
+    f.write("{")
+    first = True
+    part = {}
+    items = iter(data.items())
+    while True:
+        part.clear()
+        for key, value in items:
+            part[key] = value
+            if len(part) >= chunk:
+                break
+        if not part:
+            break
+        text = json.dumps(part, ensure_ascii=False, indent=indent)
+        f.write(("\n" if first else ",\n") + text[2:-2])
+        first = False
+    f.write("}" if first else "\n}")
@@ -0,0 +1,170 @@
+from bisect import bisect_left, bisect_right, insort
+from data_store import get_store
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+HANGUL_FIRST = 0xAC00
+HANGUL_LAST = 0xD7A3
+SEARCH_LIMIT = 50
+SEP = "\n"
+
+# 음절 -> 초성 변환표 (str.translate 용)
+CHOSEONG_TABLE = {code: CHOSEONG[(code - HANGUL_FIRST) // 588] for code in range(HANGUL_FIRST, HANGUL_LAST + 1)}
+
+
+def choseong(text):
+    # 한글 음절은 초성으로, 나머지 글자는 그대로 (소문자)
+    return text.lower().translate(CHOSEONG_TABLE)
+
+
+def is_choseong_query(query):
+    return any(ch in CHOSEONG for ch in query)
+
+
+def _bigrams(key):
+    return {key[j:j + 2] for j in range(len(key) - 1)}
+
+
+class _Keys:
+    # 키 문자열 묶음: 정렬 리스트(접두어 검색) + 줄바꿈으로 이어붙인 문자열(부분문자열 검색은 str.find).
+    # 글자 종류가 적은 초성 키는 find 가 건너뛰는 거리가 짧아서 두 글자 조각 -> id 역색인을 추가로 둠
+    def __init__(self, keys, bigrams=False):
+        self.keys = keys
+        self.sorted = sorted((k, i) for i, k in enumerate(keys))
+        self.starts = []
+        pos = 0
+        for k in keys:
+            self.starts.append(pos)
+            pos += len(k) + 1
+        self.blob = SEP.join(keys) + SEP if keys else ""
+        self.bigrams = None
+        if bigrams:
+            self.bigrams = {}
+            for i, k in enumerate(keys):
+                self._index(k, i)
+
+    def _index(self, key, i):
+        for g in _bigrams(key):
+            ids = self.bigrams.get(g)
+            if ids is None:
+                self.bigrams[g] = {i}
+            else:
+                ids.add(i)
+
+    def add(self, key, i):
+        self.keys.append(key)
+        insort(self.sorted, (key, i))
+        self.starts.append(len(self.blob))
+        self.blob += key + SEP
+        if self.bigrams is not None:
+            self._index(key, i)
+
+    def remove(self, key, i):
+        del self.sorted[bisect_left(self.sorted, (key, i))]
+
+    def prefix(self, query):
+        pos = bisect_left(self.sorted, (query, -1))
+        while pos < len(self.sorted):
+            key, i = self.sorted[pos]
+            if not key.startswith(query):
+                return
+            yield i
+            pos += 1
+
+    def substring(self, query):
+        # 등록 순서대로, 한 이름에서 여러 번 나와도 한 번만
+        if self.bigrams is not None and len(query) > 1:
+            postings = [self.bigrams.get(g) for g in _bigrams(query)]
+            if not all(postings):
+                return
+            for i in sorted(set.intersection(*postings)):
+                if query in self.keys[i]:
+                    yield i
+            return
+        blob, starts = self.blob, self.starts
+        pos = blob.find(query)
+        while pos >= 0:
+            i = bisect_right(starts, pos) - 1
+            yield i
+            nxt = starts[i + 1] if i + 1 < len(starts) else len(blob)
+            pos = blob.find(query, nxt)
+
+
+class NameIndex:
+    # 이름 검색용 메모리 인덱스. 접두어 일치를 먼저, 다음 부분문자열 일치.
+    # 자음(ㄱ~ㅎ)이 섞인 검색어는 이름의 초성 문자열과 비교
+    def __init__(self, names=()):
+        self._names = [n for n in dict.fromkeys(names) if SEP not in n]
+        self._ids = {n: i for i, n in enumerate(self._names)}
+        self._plain = _Keys([n.lower() for n in self._names])
+        self._cho = _Keys([choseong(n) for n in self._names], bigrams=True)
+        self._removed = set()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def add(self, name):
+        if name in self._ids or SEP in name:
+            return
+        i = len(self._names)
+        self._ids[name] = i
+        self._names.append(name)
+        self._plain.add(name.lower(), i)
+        self._cho.add(choseong(name), i)
+
+    def remove(self, name):
+        # 이어붙인 문자열에서는 지우지 않고 id 만 제외 (id 재사용 없음)
+        i = self._ids.pop(name, None)
+        if i is None:
+            return
+        self._plain.remove(name.lower(), i)
+        self._cho.remove(choseong(name), i)
+        self._removed.add(i)
+
+    def search(self, query, limit=SEARCH_LIMIT, accept=None):
+        query = query.strip().lower()
+        if not query or SEP in query:
+            return []
+        keys = self._plain
+        if is_choseong_query(query):
+            query = choseong(query)
+            keys = self._cho
+        out = []
+        seen = set(self._removed)
+        for ids in (keys.prefix(query), keys.substring(query)):
+            for i in ids:
+                if i in seen:
+                    continue
+                seen.add(i)
+                name = self._names[i]
+                if accept is None or accept(name):
+                    out.append(name)
+                    if len(out) >= limit:
+                        return out
+        return out
+
+    def on_store_change(self, kind, keys):
+        if kind != "materials":
+            return
+        materials = get_store().materials()
+        if keys is None:
+            self.__init__(materials)
+            return
+        for name in keys:
+            if name in materials:
+                self.add(name)
+            else:
+                self.remove(name)
+
+
+_index = None
+
+def get_name_index():
+    # 공용 store 의 재료 이름 인덱스 (재료 추가/삭제 시 해당 이름만 갱신)
+    global _index
+    if _index is None:
+        _index = NameIndex(get_store().materials())
+        get_store().add_listener(_index.on_store_change)
+    return _index
@@ -0,0 +1,212 @@
+import os
+import io
+import json
+import time
+import cProfile
+import pstats
+import datetime
+import functools
+import threading
+
+# 저장/불러오기와 화면 동작의 호출 수, 지연시간 분포, 읽고 쓴 바이트 수집.
+# 꺼져 있으면 전역 변수 하나만 확인하고 바로 원래 함수 호출. ALBION_STATS=1 이면 처음부터 켬
+ENABLED = os.environ.get("ALBION_STATS", "0") == "1"
+# 지연시간 구간 상한 (ms), 마지막 구간은 그 이상
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+PROFILE_LINES = 40
+
+_lock = threading.Lock()
+_stats = {}
+_profile_armed = False
+_profiling = False
+last_profile = None
+
+
+class Stat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def add(self, seconds, read, written):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        pos = 0
+        while pos < len(BUCKETS_MS) and ms > BUCKETS_MS[pos]:
+            pos += 1
+        self.hist[pos] += 1
+        self.bytes_read += read
+        self.bytes_written += written
+
+    def percentile(self, p):
+        # 구간 상한으로 어림 (마지막 구간은 최대값)
+        if not self.count:
+            return 0.0
+        target = self.count * p
+        seen = 0
+        for pos, n in enumerate(self.hist):
+            seen += n
+            if seen >= target:
+                return BUCKETS_MS[pos] if pos < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 3),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "hist": dict(zip(labels, self.hist)),
+        }
+
+
+def enabled():
+    return ENABLED
+
+
+def set_enabled(on):
+    global ENABLED
+    ENABLED = bool(on)
+
+
+def record(name, seconds, read=0, written=0):
+    # 저장은 작업 스레드에서도 일어나므로 잠금
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = Stat()
+        stat.add(seconds, read, written)
+
+
+class measure:
+    # with measure("save_data") as m: ... m.written = n
+    def __init__(self, name):
+        self.name = name
+        self.read = 0
+        self.written = 0
+        self.start = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start, self.read, self.written)
+
+
+def _positional_count(fn):
+    # Qt 시그널이 넘기는 여분 인자(clicked 의 checked 등)는 원래 함수가 받는 만큼만 전달
+    code = fn.__code__
+    return None if code.co_flags & 0x04 else code.co_argcount
+
+
+def timed(name=None):
+    # 함수 호출 시간 기록
+    def wrap(fn):
+        label = name or fn.__qualname__
+        nargs = _positional_count(fn)
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if nargs is not None:
+                args = args[:nargs]
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return inner
+    return wrap
+
+
+def action(name):
+    # 화면 동작(버튼/선택 처리). timed 와 같고, profile_next() 가 걸려 있으면 이 동작 하나를 cProfile 로 실행
+    def wrap(fn):
+        label = "ui." + name
+        nargs = _positional_count(fn)
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if nargs is not None:
+                args = args[:nargs]
+            if _profile_armed and not _profiling:
+                return profile_call(label, fn, args, kwargs)
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return inner
+    return wrap
+
+
+def profile_next():
+    # 다음 화면 동작 하나만 cProfile 로 측정 (결과는 last_profile)
+    global _profile_armed
+    _profile_armed = True
+
+
+def profile_call(label, fn, args=(), kwargs=None, filename=None):
+    # fn 한 번을 cProfile 로 실행하고 결과 저장
+    global _profile_armed, _profiling
+    _profile_armed = False
+    _profiling = True
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        return profiler.runcall(fn, *args, **(kwargs or {}))
+    finally:
+        elapsed = time.perf_counter() - start
+        _profiling = False
+        if ENABLED:
+            record(label, elapsed)
+        save_profile(profiler, label, elapsed, filename)
+
+
+def save_profile(profiler, label, elapsed, filename=None):
+    # .prof 파일(snakeviz 등으로 열기)과 누적시간 상위 목록을 남김
+    global last_profile
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    filename = filename or f"profile-{label}-{stamp}.prof"
+    profiler.dump_stats(filename)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    last_profile = {"name": label, "elapsed_ms": round(elapsed * 1000, 3), "file": filename, "text": out.getvalue()}
+    return last_profile
+
+
+def snapshot():
+    with _lock:
+        return {name: stat.to_dict() for name, stat in sorted(_stats.items())}
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def dump(filename):
+    data = {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "enabled": ENABLED,
+        "stats": snapshot(),
+    }
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return data
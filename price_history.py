@@ -0,0 +1,344 @@
+import os
+import datetime
+from collections.abc import Mapping
+import numpy as np
+from data_store import get_store, load_data, save_data
+from record_journal import FileLock, file_size
+from perf_stats import measure
+
+# 데이터 폴더 아래 price_history/ 에 전체 관측값을 열(column)별 파일로 보관
+#   sid.<세대>.bin (int32), ts.<세대>.bin / price.<세대>.bin / volume.<세대>.bin (int64): 같은 행 번호 = 한 관측값
+#   index.json: {"series": {"아이템\t인첸트": sid}, "generation": 세대, "offsets": [...]}
+# 열 파일은 append 만 함. 앞부분(offsets[-1] 행까지)은 압축 때 (sid, ts) 순으로 정렬해 둔 구간이고
+# offsets[sid] ~ offsets[sid + 1] 이 그 시계열. 그 뒤는 들어온 순서 그대로인 꼬리 구간 (COMPACT_ROWS 를 넘으면 압축)
+# 압축은 새 세대 파일에 쓰고 index.json 을 바꾼 뒤 예전 세대를 지우므로 도중에 죽어도 예전 세대가 남음
+HISTORY_DIR = "price_history"
+INDEX_FILE = "index.json"
+COLUMNS = (("sid", "<i4"), ("ts", "<i8"), ("price", "<i8"), ("volume", "<i8"))
+COMPACT_ROWS = 1 << 16
+BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+UTC = datetime.timezone.utc
+
+
+# 시각은 UTC epoch 초. 시간대 없는 시각 문자열(market_price_time)은 적힌 그대로 UTC 로 취급하므로
+# 문자열 <-> epoch 가 그대로 왕복되고, 일/시간 버킷이 서머타임 전환과 상관없이 문자열의 날짜/시각과 맞음
+def to_epoch(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.strptime(str(value), TIME_FORMAT)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return int(value.timestamp())
+
+
+def from_epoch(ts):
+    return datetime.datetime.fromtimestamp(int(ts), UTC).strftime(TIME_FORMAT)
+
+
+class PriceHistory:
+    # 아이템 x 인첸트 별 시세 이력. 읽을 때는 np.memmap 으로 필요한 구간만 OS 페이지 단위로 읽음
+    def __init__(self, base_dir=HISTORY_DIR, store=None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.store = store
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._index_path = os.path.join(self.base_dir, INDEX_FILE)
+        self._stat = None
+        self._load()
+
+    def _path(self, name, gen):
+        return os.path.join(self.base_dir, f"{name}.{gen}.bin")
+
+    def _load(self):
+        index = load_data(self._index_path)
+        self._series = index.get("series", {})
+        self._gen = index.get("generation", 0)
+        self._offsets = np.asarray(index.get("offsets", [0]), dtype=np.int64)
+        self._base_rows = int(self._offsets[-1])
+        self._stat = self._index_stat()
+        self._rows = None
+        self._cols = None
+        self._tail_cache = None
+        self._last = None
+        self._sync_rows()
+
+    def _index_stat(self):
+        try:
+            st = os.stat(self._index_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _sync_rows(self):
+        # 다른 프로세스가 압축했으면 index 부터 다시 읽고, append 한 행이 있으면 행 수만 맞춤.
+        # 열 파일 길이가 서로 다르면 (append 도중 종료) 가장 짧은 길이까지만 유효
+        if self._index_stat() != self._stat:
+            self._load()
+            return
+        rows = min(self._size(name) // np.dtype(dtype).itemsize for name, dtype in COLUMNS)
+        if rows != self._rows:
+            self._rows = rows
+            self._cols = None
+            self._tail_cache = None
+            self._last = None
+
+    def _size(self, name):
+        return file_size(self._path(name, self._gen))
+
+    def _save_index(self):
+        save_data(self._index_path, {
+            "series": self._series, "generation": self._gen, "offsets": self._offsets.tolist(),
+        })
+        self._stat = self._index_stat()
+
+    def _columns(self):
+        if self._cols is None:
+            rows = self._rows
+            self._cols = {
+                name: np.memmap(self._path(name, self._gen), dtype=dtype, mode="r", shape=(rows,))
+                if rows else np.empty(0, dtype=dtype)
+                for name, dtype in COLUMNS
+            }
+        return self._cols
+
+    def _tail(self):
+        # 꼬리 구간 행 번호를 (sid, ts) 순으로 정렬한 것과 시계열별 경계 (행 수가 바뀔 때만 다시 만듦)
+        if self._tail_cache is None:
+            cols = self._columns()
+            sid = np.asarray(cols["sid"][self._base_rows:])
+            order = np.lexsort((np.asarray(cols["ts"][self._base_rows:]), sid))
+            bounds = np.searchsorted(sid[order], np.arange(len(self._series) + 1))
+            self._tail_cache = (order + self._base_rows, bounds)
+        return self._tail_cache
+
+    def _bounds(self, bounds, sid):
+        return (int(bounds[sid]), int(bounds[sid + 1])) if sid + 1 < len(bounds) else (0, 0)
+
+    def _last_ts(self):
+        # 시계열별 마지막 ts (append 할 때 새 관측값인지 확인용)
+        if self._last is None:
+            cols = self._columns()
+            last = {}
+            ends = self._offsets[1:]
+            has = ends > self._offsets[:-1]
+            for sid, ts in zip(np.nonzero(has)[0].tolist(), np.asarray(cols["ts"])[ends[has] - 1].tolist()):
+                last[sid] = ts
+            sid = np.asarray(cols["sid"][self._base_rows:])
+            if len(sid):
+                tail_last = np.full(len(self._series), np.iinfo(np.int64).min)
+                np.maximum.at(tail_last, sid, np.asarray(cols["ts"][self._base_rows:]))
+                for s in np.unique(sid).tolist():
+                    last[s] = max(last.get(s, int(tail_last[s])), int(tail_last[s]))
+            self._last = last
+        return self._last
+
+    def series(self):
+        return [tuple(k.split("\t")) for k in self._series]
+
+    def append_many(self, rows):
+        # rows: [(아이템, 인첸트, 시각, 가격, 거래량)]. 새 시계열이 있으면 index 는 한 번만 저장하고 열마다 한 번씩 append
+        if not rows:
+            return
+        with measure("history.append"), FileLock(self._index_path):
+            self._sync_rows()
+            new = False
+            sids = []
+            for item, enchant, _, _, _ in rows:
+                key = f"{item}\t{enchant}"
+                sid = self._series.get(key)
+                if sid is None:
+                    sid = self._series[key] = len(self._series)
+                    new = True
+                sids.append(sid)
+            if new:
+                # 새 시계열을 먼저 기록 (행보다 index 가 앞서야 다시 읽을 때 sid 가 모두 있음)
+                self._save_index()
+            values = {
+                "sid": sids,
+                "ts": [to_epoch(ts) for _, _, ts, _, _ in rows],
+                "price": [price for _, _, _, price, _ in rows],
+                "volume": [volume for _, _, _, _, volume in rows],
+            }
+            last = self._last_ts()
+            for name, dtype in COLUMNS:
+                path = self._path(name, self._gen)
+                if self._size(name) > self._rows * np.dtype(dtype).itemsize:
+                    # 지난번 append 도중 종료로 남은 조각은 버림 (행 번호를 맞춤)
+                    os.truncate(path, self._rows * np.dtype(dtype).itemsize)
+                with open(path, "ab") as f:
+                    f.write(np.asarray(values[name], dtype=dtype).tobytes())
+            for sid, ts in zip(sids, values["ts"]):
+                if ts > last.get(sid, ts - 1):
+                    last[sid] = ts
+            self._rows += len(rows)
+            self._cols = None
+            self._tail_cache = None
+            if self._rows - self._base_rows > COMPACT_ROWS:
+                self._compact()
+
+    def append(self, item, enchant, ts, price, volume=0):
+        self.append_many([(item, str(enchant), ts, price, volume)])
+
+    def compact(self):
+        with FileLock(self._index_path):
+            self._sync_rows()
+            self._compact()
+
+    def _compact(self):
+        # 전체를 (sid, ts) 순으로 정렬해 새 세대로 씀
+        with measure("history.compact"):
+            cols = self._columns()
+            sid = np.asarray(cols["sid"])
+            order = np.lexsort((np.asarray(cols["ts"]), sid))
+            gen = self._gen + 1
+            for name, _ in COLUMNS:
+                with open(self._path(name, gen), "wb") as f:
+                    np.asarray(cols[name])[order].tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+            old = self._gen
+            self._gen = gen
+            self._offsets = np.searchsorted(sid[order], np.arange(len(self._series) + 1)).astype(np.int64)
+            self._base_rows = int(self._offsets[-1])
+            self._cols = None
+            self._tail_cache = None
+            self._save_index()
+            for name, _ in COLUMNS:
+                path = self._path(name, old)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _series_rows(self, item, enchant):
+        # 한 시계열의 {"ts", "price", "volume"} (ts 순). 꼬리 구간에 없으면 압축 구간 memmap 슬라이스 그대로
+        self._sync_rows()
+        sid = self._series.get(f"{item}\t{enchant}")
+        cols = self._columns()
+        if sid is None:
+            return {name: cols[name][:0] for name in ("ts", "price", "volume")}
+        lo, hi = self._bounds(self._offsets, sid)
+        order, bounds = self._tail()
+        t_lo, t_hi = self._bounds(bounds, sid)
+        if t_lo == t_hi:
+            return {name: cols[name][lo:hi] for name in ("ts", "price", "volume")}
+        rows = np.concatenate([np.arange(lo, hi), order[t_lo:t_hi]])
+        out = {name: np.asarray(cols[name])[rows] for name in ("ts", "price", "volume")}
+        if hi > lo and out["ts"][hi - lo] < out["ts"][hi - lo - 1]:
+            # 압축 구간 마지막보다 이른 관측값이 꼬리에 있으면 합쳐서 정렬
+            pos = np.argsort(out["ts"], kind="stable")
+            out = {name: col[pos] for name, col in out.items()}
+        return out
+
+    def last(self, item, enchant):
+        arr = self._series_rows(item, str(enchant))
+        return (int(arr["ts"][-1]), int(arr["price"][-1])) if len(arr["ts"]) else None
+
+    def range(self, item, enchant, start=None, end=None):
+        # [start, end) 구간의 {"ts", "price", "volume"}
+        arr = self._series_rows(item, str(enchant))
+        ts = arr["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, to_epoch(start), "left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, to_epoch(end), "left"))
+        return {name: col[lo:hi] for name, col in arr.items()}
+
+    def latest_before(self, item, enchant, t):
+        # t 시점(포함) 이전 마지막 관측값 (ts, price)
+        arr = self._series_rows(item, str(enchant))
+        i = int(np.searchsorted(arr["ts"], to_epoch(t), "right")) - 1
+        return (int(arr["ts"][i]), int(arr["price"][i])) if i >= 0 else None
+
+    def downsample(self, item, enchant, bucket="day", start=None, end=None):
+        # 버킷(UTC epoch 기준)별 시작시각/min/max/avg/vwap/건수 (거래량이 없으면 vwap = avg)
+        width = BUCKETS[bucket]
+        arr = self.range(item, enchant, start, end)
+        if not len(arr["ts"]):
+            return {k: np.empty(0) for k in ("bucket", "min", "max", "avg", "vwap", "count")}
+        ts = np.asarray(arr["ts"])
+        price = np.asarray(arr["price"], dtype=np.float64)
+        volume = np.asarray(arr["volume"], dtype=np.float64)
+        keys = ts // width
+        bucket_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        sums = np.add.reduceat(price, starts)
+        vol = np.add.reduceat(volume, starts)
+        pv = np.add.reduceat(price * volume, starts)
+        avg = sums / counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.where(vol > 0, pv / vol, avg)
+        return {
+            "bucket": bucket_keys * width,
+            "min": np.minimum.reduceat(price, starts),
+            "max": np.maximum.reduceat(price, starts),
+            "avg": avg,
+            "vwap": vwap,
+            "count": counts,
+        }
+
+    def record_materials(self, materials, items):
+        # 저장된 시장가가 그 시계열의 마지막 기록보다 새로우면 관측값으로 모아서 한 번에 추가
+        self._sync_rows()
+        last = self._last_ts()
+        rows = []
+        for item in items:
+            meta = materials.get(item)
+            if meta is None:
+                continue
+            for enchant, rec in meta["enchant"].items():
+                price = rec["market_price"]
+                try:
+                    ts = to_epoch(rec["market_price_time"])
+                except ValueError:
+                    # 손으로 고쳤거나 예전 형식인 시각은 이력에 넣지 않음 (다른 창의 저장을 막지 않게)
+                    continue
+                if not price or ts is None:
+                    continue
+                sid = self._series.get(f"{item}\t{enchant}")
+                if sid is None or ts > last.get(sid, ts - 1):
+                    rows.append((item, str(enchant), ts, price, 0))
+        self.append_many(rows)
+
+    def on_store_change(self, kind, keys):
+        if kind != "materials" or keys is None:
+            return
+        self.record_materials(self.store.materials(), keys)
+
+
+class MaterialsAt(Mapping):
+    # 과거 시점 t 의 시장가로 바꿔 보여주는 materials 뷰 (CostEngine 에 그대로 넘길 수 있음)
+    def __init__(self, materials, history, t):
+        self.materials = materials
+        self.history = history
+        self.t = to_epoch(t)
+
+    def __getitem__(self, item):
+        meta = self.materials[item]
+        enchants = {}
+        for enchant, rec in meta["enchant"].items():
+            rec = dict(rec)
+            seen = self.history.latest_before(item, enchant, self.t)
+            rec["market_price"] = seen[1] if seen else 0
+            rec["market_price_time"] = from_epoch(seen[0]) if seen else None
+            enchants[enchant] = rec
+        return {"category": meta["category"], "enchant": enchants}
+
+    def __iter__(self):
+        return iter(self.materials)
+
+    def __len__(self):
+        return len(self.materials)
+
+    def __contains__(self, item):
+        return item in self.materials
+
+
+_history = None
+
+def get_price_history(store=None):
+    # 처음 호출될 때 store 데이터 폴더 아래에 열고 그 store 의 재료 변경을 구독
+    global _history
+    if _history is None:
+        store = store if store is not None else get_store()
+        _history = PriceHistory(os.path.join(store.base_dir, HISTORY_DIR), store)
+        store.add_listener(_history.on_store_change)
+    return _history
@@ -0,0 +1,151 @@
+import os
+import csv
+import sys
+import json
+import datetime
+from data_store import get_store
+from category_index import CategoryIndex
+from schema import new_enchant
+
+ENCHANTS = {"0", "1", "2", "3", "4"}
+MAX_REPORTED_REJECTS = 1000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.applied = 0
+        self.skipped_older = 0
+        self.rejected_count = 0
+        self.rejected = []      # (줄번호, 사유, 원본) 앞쪽 MAX_REPORTED_REJECTS 개만
+        self.items = 0
+
+    def reject(self, line_no, reason, row):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTS:
+            self.rejected.append((line_no, reason, row))
+
+    def __str__(self):
+        return (f"전체 {self.total}행, 반영 {self.applied}, 이전시각 무시 {self.skipped_older}, "
+                f"거부 {self.rejected_count}, 변경 아이템 {self.items}")
+
+
+def iter_rows(path):
+    # (줄번호, dict) 를 한 줄씩 생성 -> 파일 크기와 무관하게 메모리 일정
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {k.strip(): v for k, v in row.items() if k}
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None
+
+
+def parse_time(value):
+    if value in (None, ""):
+        return datetime.datetime.now().strftime(TIME_FORMAT)
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return datetime.datetime.fromtimestamp(int(value)).strftime(TIME_FORMAT)
+    return datetime.datetime.fromisoformat(str(value).strip().replace("T", " ")).strftime(TIME_FORMAT)
+
+
+def parse_price(value):
+    if value in (None, ""):
+        return None
+    price = int(float(value))
+    if price < 0:
+        raise ValueError("음수 가격")
+    return price
+
+
+def parse_category(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, list):
+        return [int(v) for v in value]
+    return [int(v) for v in str(value).replace(">", "/").split("/") if v.strip()]
+
+
+def import_prices(path, store=None, create_items=False, dry_run=False):
+    # 모든 행을 메모리 상의 변경분에만 반영하고 마지막에 한 번 저장
+    store = store or get_store()
+    materials = store.materials()
+    cat_index = CategoryIndex(store.categories())
+    report = ImportReport()
+    changes = {}
+    for line_no, row in iter_rows(path):
+        report.total += 1
+        if not isinstance(row, dict):
+            report.reject(line_no, "형식 오류", row)
+            continue
+        item = str(row.get("item", "")).strip()
+        enchant = str(row.get("enchant", "0")).strip() or "0"
+        try:
+            market = parse_price(row.get("market_price"))
+            buy = parse_price(row.get("buy_price"))
+            stamp = parse_time(row.get("timestamp"))
+            category = parse_category(row.get("category"))
+        except (TypeError, ValueError) as e:
+            report.reject(line_no, f"값 오류: {e}", row)
+            continue
+        if not item:
+            report.reject(line_no, "아이템명 없음", row)
+            continue
+        if enchant not in ENCHANTS:
+            report.reject(line_no, f"인첸트 범위 오류: {enchant}", row)
+            continue
+        if market is None and buy is None:
+            report.reject(line_no, "가격 없음", row)
+            continue
+        if category is not None and not cat_index.valid(category):
+            report.reject(line_no, f"없는 카테고리: {category}", row)
+            continue
+        meta = changes.get(item)
+        if meta is None:
+            if item in materials:
+                meta = store.material(item)
+            elif create_items and category is not None:
+                meta = {"category": category, "enchant": {}}
+            else:
+                report.reject(line_no, "등록되지 않은 아이템", row)
+                continue
+            changes[item] = meta
+        enchants = meta.setdefault("enchant", {})
+        rec = enchants.setdefault(enchant, new_enchant())
+        # 구매가는 시각과 상관없이 반영, 시장가는 기록된 것보다 새로울 때만
+        if buy is not None:
+            rec["buy_price"] = buy
+        if market is not None:
+            prev = rec["market_price_time"]
+            if prev and prev > stamp:
+                if buy is None:
+                    report.skipped_older += 1
+                    continue
+            else:
+                rec["market_price"] = market
+                rec["market_price_time"] = stamp
+        report.applied += 1
+    report.items = len(changes)
+    if changes and not dry_run:
+        store.put_materials(changes)
+    return report
+
+
+if __name__ == "__main__":
+    # 사용법: python price_import.py 덤프파일(.csv|.jsonl) [--create] [--dry-run]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) != 1 or not os.path.exists(args[0]):
+        print("usage: python price_import.py <dump.csv|dump.jsonl> [--create] [--dry-run]")
+        sys.exit(1)
+    result = import_prices(args[0], get_store(), create_items="--create" in sys.argv, dry_run="--dry-run" in sys.argv)
+    print(result)
+    for line_no, reason, row in result.rejected:
+        print(f"  {line_no}행: {reason} {row}")
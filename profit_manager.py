@@ -1,17 +1,37 @@
-import os
-import json
-import datetime
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton, QMessageBox,
-    QCheckBox, QLineEdit, QHBoxLayout
+    QCheckBox, QLineEdit, QHBoxLayout, QTableWidget, QTableWidgetItem
 )
+from change_bus import get_change_bus
+from data_store import ConflictError, get_store, record_version
+from perf_stats import action
+from profit_rollup import GROUPS, get_profit_rollup
+from qt_models import LazyListModel
+from sales import DONE, complete_sale, reprice_sale, unfinished
+
+GROUP_LABELS = {"item": "아이템", "enchant": "인첸트", "status": "상태", "day": "일", "week": "주"}
+
+
+def format_sale(row):
+    # 인첸트 표시 추가
+    i, sale = row
+    return (
+        f"{sale['item']} (인첸트{sale['enchant']}, "
+        f"개당판매가:{sale['unit_sale_price']}, "
+        f"총판매가:{sale['total_sale_price']}, "
+        f"이익:{sale['profit']})"
+    )
+
 
 class ProfitManager(QWidget):
     def __init__(self):
         super().__init__()
+        self.store = get_store()
         self.setWindowTitle("수익 정산")
         layout = QVBoxLayout()
         self.sale_list = QComboBox()
+        self.sale_model = LazyListModel(formatter=format_sale)
+        self.sale_list.setModel(self.sale_model)
         self.detail = QLabel("-")
 
         # 판매가 수정부
@@ -34,6 +54,9 @@ class ProfitManager(QWidget):
         btn_recalc.clicked.connect(self.recalculate)
         self.btn_done = QPushButton("거래완료")
         self.btn_done.clicked.connect(self.complete_sale)
+        btn_summary = QPushButton("수익 통계")
+        btn_summary.clicked.connect(self.open_summary)
+        self._summary_window = None
 
         layout.addWidget(QLabel("판매 내역(미완료)"))
         layout.addWidget(self.sale_list)
@@ -44,9 +67,19 @@ class ProfitManager(QWidget):
         layout.addLayout(h2)
         layout.addWidget(btn_recalc)
         layout.addWidget(self.btn_done)
+        layout.addWidget(btn_summary)
         self.setLayout(layout)
         self.sale_list.currentIndexChanged.connect(self.show_detail)
         self.refresh_sales()
+        # 등록/수정된 판매 행만 반영
+        bus = get_change_bus()
+        bus.sale_registered.connect(self.on_sale_registered)
+        bus.sale_updated.connect(self.on_sale_updated)
+        bus.reset.connect(self.on_reset)
+
+    def open_summary(self):
+        self._summary_window = ProfitSummary()
+        self._summary_window.show()
 
     def toggle_edit_enable(self):
         enabled = self.edit_enable.isChecked()
@@ -54,43 +87,64 @@ class ProfitManager(QWidget):
         self.total_sale_edit.setEnabled(enabled)
         self.btn_done.setEnabled(not enabled)
 
+    @action("refresh_sales")
     def refresh_sales(self):
-        filename = "sale_data.json"
-        self.sales = []
-        self.sale_list.clear()
-        if os.path.exists(filename):
-            with open(filename, "r") as f:
-                data = json.load(f)
-            for i, sale in enumerate(data):
-                if sale.get("status") != "판매완료":
-                    self.sales.append((i, sale))
-                    # 인첸트 표시 추가
-                    self.sale_list.addItem(
-                        f"{sale.get('item','')} (인첸트{sale.get('enchant',0)}, "
-                        f"개당판매가:{sale.get('unit_sale_price', sale.get('sale_price', '-'))}, "
-                        f"총판매가:{sale.get('total_sale_price', sale.get('sale_price', '-'))}, "
-                        f"이익:{sale.get('profit','-')})"
-                    )
+        # 미완료 판매만, 콤보가 보여줄 만큼만 걸러내고 문구는 표시할 때 생성
+        data = self.store.sales()
+
+        self.sale_list.blockSignals(True)
+        self.sale_model.reset(lambda: unfinished(data))
+        self.sale_list.setCurrentIndex(0 if self.sale_model.rowCount() else -1)
+        self.sale_list.blockSignals(False)
         self.show_detail()
 
+    def on_sale_registered(self, idx):
+        # 목록을 끝까지 읽은 뒤에만 바로 추가 (아니면 읽는 중인 원본이 이어서 가져옴)
+        sale = self.store.sales()[idx]
+        if sale.get("status") != DONE:
+            self.sale_model.append_value((idx, sale))
+
+    def on_sale_updated(self, idx):
+        row = self.sale_model.loaded_row(lambda value: value[0] == idx)
+        if row < 0:
+            return
+        sale = self.store.sales()[idx]
+        if sale.get("status") == DONE:
+            # 현재 행이면 콤보가 다음 행을 선택하면서 상세도 바뀜
+            self.sale_model.remove_row(row)
+            if not self.sale_model.rowCount():
+                self.show_detail()
+            return
+        self.sale_model.set_value(row, (idx, sale))
+        if row == self.sale_list.currentIndex():
+            self.show_detail()
+
+    def on_reset(self, kind):
+        if kind == "sales":
+            self.refresh_sales()
+
+    @action("sale_detail")
     def show_detail(self):
-        idx = self.sale_list.currentIndex()
-        if idx < 0 or idx >= len(self.sales):
+        row = self.sale_model.value(self.sale_list.currentIndex())
+        if row is None:
+            self.shown = None
             self.detail.setText("-")
             return
-        i, sale = self.sales[idx]
-        unit_sale = str(sale.get('unit_sale_price', sale.get('sale_price', '')))
-        total_sale = str(sale.get('total_sale_price', sale.get('sale_price', '')))
+        i, sale = row
+        # 목록 위치 대신 id 와 보여준 시점의 version 을 기억 (다른 창/프로세스가 바꿨는지 확인용)
+        self.shown = (sale.get("id"), record_version(sale))
+        unit_sale = str(sale['unit_sale_price'])
+        total_sale = str(sale['total_sale_price'])
         self.detail.setText(
-            f"아이템: {sale.get('item','')}\n"
-            f"인첸트: {sale.get('enchant', 0)}\n"
-            f"판매수량: {sale.get('count', '-')}\n"
-            f"구매가(1개): {sale.get('unit_buy_price', sale.get('buy_price', '-'))}\n"
-            f"수수료(1개): {sale.get('unit_fee', sale.get('fee', '-'))}\n"
-            f"총원가: {sale.get('total_cost', '-')}\n"
+            f"아이템: {sale['item']}\n"
+            f"인첸트: {sale['enchant']}\n"
+            f"판매수량: {sale['count']}\n"
+            f"구매가(1개): {sale['unit_buy_price']}\n"
+            f"수수료(1개): {sale['unit_fee']}\n"
+            f"총원가: {sale['total_cost']}\n"
             f"개당판매가: {unit_sale}\n"
             f"총판매가: {total_sale}\n"
-            f"이익: {sale.get('profit','-')}\n"
+            f"이익: {sale['profit']}\n"
             f"상태: {sale.get('status','')}\n"
             f"판매완료시간: {sale.get('sold_time', '-')}"
         )
@@ -99,18 +153,45 @@ class ProfitManager(QWidget):
         self.edit_enable.setChecked(False)
         self.toggle_edit_enable()
 
+    def shown_sale(self):
+        # 보여주고 있는 판매의 현재 위치와 내용 (그 사이 없어졌으면 None)
+        if not getattr(self, "shown", None):
+            return None
+        sale_id, version = self.shown
+        rec_idx = self.store.sale_index(sale_id)
+        if rec_idx is None:
+            return None
+        return rec_idx, self.store.sales()[rec_idx], version
+
+    def update_shown(self, apply):
+        # apply(store, 위치, version): sales 의 수정 함수
+        current = self.shown_sale()
+        if current is None:
+            QMessageBox.warning(self, "오류", "판매 기록을 찾을 수 없습니다")
+            self.refresh_sales()
+            return False
+        rec_idx, sale, version = current
+        try:
+            apply(self.store, rec_idx, version)
+        except ConflictError:
+            QMessageBox.warning(self, "충돌", "다른 창에서 이 판매 기록을 먼저 수정했습니다. 새 내용을 불러옵니다.")
+            self.show_detail()
+            return False
+        return True
+
+    @action("reprice_sale")
     def recalculate(self):
-        idx = self.sale_list.currentIndex()
-        if idx < 0 or idx >= len(self.sales):
+        current = self.shown_sale()
+        if current is None:
             return
-        rec_idx, sale = self.sales[idx]
+        rec_idx, sale, version = current
         try:
             new_unit = float(self.unit_sale_edit.text())
             new_total = float(self.total_sale_edit.text())
         except Exception:
             QMessageBox.warning(self, "오류", "판매가 입력 오류")
             return
-        count = sale.get("count", 1)
+        count = sale["count"]
         calc_total = round(new_unit * count, 2)
         if abs(calc_total - new_total) > 0.01:
             ret = QMessageBox.question(
@@ -130,47 +211,73 @@ class ProfitManager(QWidget):
                 if count > 0:
                     new_unit = round(new_total / count, 2)
                 self.unit_sale_edit.setText(str(new_unit))
-        # 저장
-        filename = "sale_data.json"
-        with open(filename, "r") as f:
-            data = json.load(f)
-        data[rec_idx]["unit_sale_price"] = new_unit
-        data[rec_idx]["total_sale_price"] = new_total
-        # profit도 갱신
-        a = data[rec_idx].get("unit_buy_price", 0) + data[rec_idx].get("unit_fee", 0)
-        profit = (new_unit - a) * count
-        data[rec_idx]["profit"] = profit
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        # 저장 (profit도 갱신)
+        if not self.update_shown(lambda store, idx, version: reprice_sale(store, idx, new_unit, new_total, version)):
+            return
         QMessageBox.information(self, "알림", "재계산 및 저장 완료")
-        self.refresh_sales()
 
+    @action("complete_sale")
     def complete_sale(self):
-        idx = self.sale_list.currentIndex()
-        if idx < 0 or idx >= len(self.sales):
+        # 판매 시간도 기록
+        if not self.update_shown(complete_sale):
             return
-        rec_idx, sale = self.sales[idx]
-        filename = "sale_data.json"
-        with open(filename, "r") as f:
-            data = json.load(f)
-        data[rec_idx]["status"] = "판매완료"
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
         QMessageBox.information(self, "알림", "거래완료 처리됨")
-        self.refresh_sales()
 
-    def complete_sale(self):
-        idx = self.sale_list.currentIndex()
-        if idx < 0 or idx >= len(self.sales):
-            return
-        rec_idx, sale = self.sales[idx]
-        filename = "sale_data.json"
-        with open(filename, "r") as f:
-            data = json.load(f)
-        data[rec_idx]["status"] = "판매완료"
-        # 여기 추가: 판매 시간 기록
-        data[rec_idx]["sold_time"] = datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
-        QMessageBox.information(self, "알림", "거래완료 처리됨")
-        self.refresh_sales()
\ No newline at end of file
+
+class ProfitSummary(QWidget):
+    # 누적 집계(profit_rollup)만 읽으므로 판매 내역 크기와 무관
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("수익 통계")
+        self.rollup = get_profit_rollup()
+        get_change_bus().changed.connect(self.on_changed)
+        layout = QVBoxLayout()
+        self.group_select = QComboBox()
+        for group in GROUPS:
+            self.group_select.addItem(" x ".join(GROUP_LABELS[d] for d in group), group)
+        self.status_select = QComboBox()
+        self.status_select.addItem("전체", None)
+        self.status_select.addItem("판매완료", "판매완료")
+        self.status_select.addItem("미완료", "미완료")
+        self.total_label = QLabel("-")
+        self.table = QTableWidget()
+        self.group_select.currentIndexChanged.connect(self.refresh)
+        self.status_select.currentIndexChanged.connect(self.refresh)
+        h = QHBoxLayout()
+        h.addWidget(QLabel("기준"))
+        h.addWidget(self.group_select)
+        h.addWidget(QLabel("상태"))
+        h.addWidget(self.status_select)
+        layout.addLayout(h)
+        layout.addWidget(self.total_label)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.refresh()
+
+    def on_changed(self, kind):
+        if kind == "sales":
+            self.refresh()
+
+    @action("profit_summary")
+    def refresh(self):
+        group = self.group_select.currentData()
+        status = self.status_select.currentData()
+        filters = {"status": status} if status and "status" in group else {}
+        if status and "status" not in group:
+            # 상태 필터는 상태가 포함된 그룹에서만 가능
+            self.total_label.setText("상태 필터는 '상태' 기준에서만 적용됩니다")
+        else:
+            t = self.rollup.total(status)
+            self.total_label.setText(
+                f"건수 {t['sales']}, 수량 {t['units']}, 매출 {t['revenue']:.0f}, "
+                f"원가 {t['cost']:.0f}, 이익 {t['profit']:.0f}")
+        rows = self.rollup.query(group, **filters)
+        headers = [GROUP_LABELS[d] for d in group] + ["건수", "수량", "매출", "원가", "이익"]
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(rows))
+        for r, (key, vals) in enumerate(rows):
+            cells = list(key) + [vals["sales"], vals["units"], round(vals["revenue"]), round(vals["cost"]), round(vals["profit"])]
+            for c, v in enumerate(cells):
+                self.table.setItem(r, c, QTableWidgetItem(str(v)))
@@ -0,0 +1,142 @@
+import sys
+import numpy as np
+from cost_engine import CostEngine, recipe_output
+
+ENCHANT_LEVELS = 5
+
+
+def table_dtype(recipe_names):
+    # 레시피 이름 칸은 가장 긴 이름에 맞춤 (고정 폭이면 긴 이름이 잘려 recipes 키와 안 맞음)
+    width = max(map(len, recipe_names), default=1)
+    return np.dtype([
+        ("recipe", f"U{width}"), ("enchant", "i1"), ("unit_cost", "f8"),
+        ("market_price", "f8"), ("margin", "f8"), ("roi", "f8"),
+    ])
+
+
+class ProfitMatrix:
+    # 레시피 x 재료 희소행렬(COO) + 아이템 x 인첸트(0~4) 가격 배열
+    def __init__(self, materials, recipes):
+        self.recipe_names = list(recipes)
+        items = dict.fromkeys(materials)
+        for name, rec in recipes.items():
+            items[name] = None
+            items.update(dict.fromkeys(rec.get("materials", {})))
+        self.item_names = list(items)
+        self.item_index = {name: i for i, name in enumerate(self.item_names)}
+
+        n_items = len(self.item_names)
+        self.buy = np.full((n_items, ENCHANT_LEVELS), np.nan)
+        self.market = np.full((n_items, ENCHANT_LEVELS), np.nan)
+        for name, meta in materials.items():
+            i = self.item_index[name]
+            for ench, rec in meta.get("enchant", {}).items():
+                e = int(ench)
+                if 0 <= e < ENCHANT_LEVELS and rec:
+                    # 구매가가 없으면 가격 정보 없음 (cost_engine.purchase_price 와 같게)
+                    if rec.get("buy_price", 0):
+                        self.buy[i, e] = rec["buy_price"] + rec.get("fee", 0)
+                    if rec.get("market_price", 0):
+                        self.market[i, e] = rec["market_price"]
+
+        rows, cols, vals = [], [], []
+        self.output = np.ones(len(self.recipe_names))
+        self.recipe_item = np.empty(len(self.recipe_names), dtype=np.int64)
+        for r, name in enumerate(self.recipe_names):
+            rec = recipes[name]
+            self.output[r] = recipe_output(rec)
+            self.recipe_item[r] = self.item_index[name]
+            for mat, qty in rec.get("materials", {}).items():
+                rows.append(r)
+                cols.append(self.item_index[mat])
+                vals.append(qty)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        self.vals = np.asarray(vals, dtype=np.float64)
+        self.levels = self._levels(recipes)
+
+    def _levels(self, recipes):
+        # 레시피 깊이(하위 레시피가 없으면 0). 같은 깊이는 한 번에 계산
+        depth = {}
+        for item in CostEngine({}, recipes).topo_order():
+            rec = recipes.get(item)
+            deps = rec.get("materials", {}) if rec else {}
+            depth[item] = 1 + max((depth[m] for m in deps if m in recipes), default=-1) if rec else -1
+        return np.array([depth[name] for name in self.recipe_names], dtype=np.int64)
+
+    def compute(self, make_or_buy=True):
+        # 재료 단가: 시장가 우선, 없으면 구매가+수수료
+        item_cost = np.where(np.isnan(self.market), self.buy, self.market)
+        craft = np.full((len(self.recipe_names), ENCHANT_LEVELS), np.nan)
+        max_level = int(self.levels.max()) if len(self.levels) else -1
+        for level in range(max_level + 1):
+            contrib = self.vals[:, None] * item_cost[self.cols]
+            total = np.zeros_like(craft)
+            np.add.at(total, self.rows, contrib)
+            at_level = self.levels == level
+            craft[at_level] = total[at_level] / self.output[at_level, None]
+            if make_or_buy:
+                # 다음 깊이 계산 전에 산출물 단가를 min(제작, 구매)로 갱신
+                idx = self.recipe_item[at_level]
+                current = item_cost[idx]
+                item_cost[idx] = np.where(np.isnan(current), craft[at_level],
+                                          np.fmin(current, craft[at_level]))
+        if not make_or_buy:
+            contrib = self.vals[:, None] * item_cost[self.cols]
+            total = np.zeros_like(craft)
+            np.add.at(total, self.rows, contrib)
+            craft = total / self.output[:, None]
+        market = self.market[self.recipe_item]
+        margin = market - craft
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roi = np.where(craft > 0, margin / craft, np.nan)
+        return ProfitTable(self.recipe_names, craft, market, margin, roi)
+
+
+class ProfitTable:
+    def __init__(self, recipe_names, unit_cost, market_price, margin, roi):
+        self.recipe_names = recipe_names
+        self.unit_cost = unit_cost
+        self.market_price = market_price
+        self.margin = margin
+        self.roi = roi
+
+    def to_array(self):
+        n = len(self.recipe_names)
+        dtype = table_dtype(self.recipe_names)
+        table = np.empty(n * ENCHANT_LEVELS, dtype=dtype)
+        table["recipe"] = np.repeat(np.asarray(self.recipe_names, dtype=dtype["recipe"]), ENCHANT_LEVELS)
+        table["enchant"] = np.tile(np.arange(ENCHANT_LEVELS), n)
+        table["unit_cost"] = self.unit_cost.ravel()
+        table["market_price"] = self.market_price.ravel()
+        table["margin"] = self.margin.ravel()
+        table["roi"] = self.roi.ravel()
+        return table
+
+    def sorted(self, key="margin", descending=True, enchant=None, limit=None, dropna=True):
+        table = self.to_array()
+        if enchant is not None:
+            table = table[table["enchant"] == enchant]
+        if dropna:
+            table = table[~np.isnan(table[key])]
+        order = np.argsort(table[key], kind="stable")
+        if descending:
+            order = order[::-1]
+        if limit is not None:
+            order = order[:limit]
+        return table[order]
+
+
+def profit_table(materials, recipes, make_or_buy=True):
+    return ProfitMatrix(materials, recipes).compute(make_or_buy)
+
+
+if __name__ == "__main__":
+    # 사용법: python profit_matrix.py [정렬키(margin|roi|unit_cost)] [갯수]
+    from data_store import get_store
+    key = sys.argv[1] if len(sys.argv) > 1 else "margin"
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    store = get_store()
+    for row in profit_table(store.materials(), store.recipes()).sorted(key, limit=limit):
+        print(f"{row['recipe']}\t{row['enchant']}\t{row['unit_cost']:.2f}\t"
+              f"{row['market_price']:.0f}\t{row['margin']:.2f}\t{row['roi']:.2%}")
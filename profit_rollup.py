@@ -0,0 +1,116 @@
+import datetime
+from data_store import get_store
+
+DONE = "판매완료"
+PENDING = "미완료"
+GROUPS = [
+    ("item",), ("enchant",), ("status",), ("day",), ("week",),
+    ("item", "enchant"), ("status", "day"), ("status", "week"),
+]
+FIELDS = ("sales", "units", "revenue", "cost", "profit")
+
+
+def _day(sale):
+    # 판매완료 시각, 없으면 등록 시각 기준
+    stamp = sale.get("sold_time") or sale.get("registered_time")
+    return stamp[:10] if stamp else "-"
+
+
+def _week(day):
+    if day == "-":
+        return "-"
+    year, week, _ = datetime.date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def sale_keys(sale):
+    day = _day(sale)
+    return {
+        "item": sale["item"],
+        "enchant": sale["enchant"],
+        "status": DONE if sale.get("status") == DONE else PENDING,
+        "day": day,
+        "week": _week(day),
+    }
+
+
+def sale_values(sale):
+    return (1, sale["count"], sale["total_sale_price"], sale["total_cost"], sale["profit"])
+
+
+class ProfitRollup:
+    # 그룹별 합계를 유지하고, 판매 한 건이 바뀌면 이전 기여분을 빼고 새 기여분만 더함
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self._totals = {}
+        self._contrib = {}
+        self.rebuild()
+        self.store.add_listener(self._on_store_change)
+
+    def rebuild(self):
+        self._totals = {group: {} for group in GROUPS}
+        self._contrib = {}
+        for idx, sale in enumerate(self.store.sales()):
+            self._add(idx, sale)
+
+    def _apply(self, keys, values, sign):
+        for group in GROUPS:
+            key = tuple(keys[d] for d in group)
+            row = self._totals[group].get(key)
+            if row is None:
+                row = self._totals[group][key] = [0] * len(FIELDS)
+            for i, v in enumerate(values):
+                row[i] += sign * v
+            if row[0] == 0:
+                del self._totals[group][key]
+
+    def _add(self, idx, sale):
+        keys, values = sale_keys(sale), sale_values(sale)
+        self._contrib[idx] = (keys, values)
+        self._apply(keys, values, 1)
+
+    def update(self, idx):
+        old = self._contrib.pop(idx, None)
+        if old is not None:
+            self._apply(old[0], old[1], -1)
+        sales = self.store.sales()
+        if idx < len(sales):
+            self._add(idx, sales[idx])
+
+    def _on_store_change(self, kind, keys):
+        if kind != "sales":
+            return
+        if keys is None:
+            self.rebuild()
+            return
+        for idx in keys:
+            self.update(idx)
+
+    def query(self, group=("item",), **filters):
+        # 예: query(("day",), status="판매완료") -> [(키, {sales, units, revenue, cost, profit}), ...]
+        group = tuple(group)
+        if group not in self._totals:
+            raise ValueError(f"지원하지 않는 그룹: {group}")
+        result = []
+        for key, row in self._totals[group].items():
+            named = dict(zip(group, key))
+            if all(named.get(k, v) == v for k, v in filters.items()):
+                result.append((key, dict(zip(FIELDS, row))))
+        result.sort(key=lambda kv: kv[0])
+        return result
+
+    def total(self, status=None):
+        if status is None:
+            rows = self._totals[("status",)].values()
+        else:
+            rows = [self._totals[("status",)].get((status,), [0] * len(FIELDS))]
+        return dict(zip(FIELDS, [sum(col) for col in zip(*rows)] if rows else [0] * len(FIELDS)))
+
+
+_rollup = None
+
+def get_profit_rollup():
+    global _rollup
+    if _rollup is None:
+        _rollup = ProfitRollup()
+    return _rollup
@@ -0,0 +1,179 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QStringListModel
+from PyQt5.QtWidgets import QComboBox, QCompleter
+
+PAGE_SIZE = 200
+
+
+class LazyListModel(QAbstractListModel):
+    # 원본을 iterator 로 받아 뷰가 요청할 때(fetchMore) PAGE_SIZE 씩만 가져오고,
+    # 표시 문자열은 data() 호출 시점에 formatter 로 생성
+    def __init__(self, source=(), formatter=str, leading=(), page_size=PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self._formatter = formatter
+        self._leading = list(leading)
+        self.page_size = page_size
+        self._source = source
+        self._rows = []
+        self._iter = None
+        self._exhausted = True
+        self.reset(source)
+
+    def reset(self, source=None):
+        # source: iterable 또는 iterable 을 돌려주는 함수
+        if source is not None:
+            self._source = source
+        self.beginResetModel()
+        src = self._source() if callable(self._source) else self._source
+        self._iter = iter(src)
+        self._rows = list(self._leading)
+        self._exhausted = False
+        self._rows.extend(self._pull(self.page_size))
+        self.endResetModel()
+
+    def _pull(self, n):
+        batch = []
+        for value in self._iter:
+            batch.append(value)
+            if len(batch) >= n:
+                break
+        else:
+            self._exhausted = True
+        return batch
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = index.row()
+        value = self._rows[row]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return value if row < len(self._leading) else self._formatter(value)
+        if role == Qt.UserRole:
+            return value
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        batch = self._pull(self.page_size)
+        if not batch:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self._rows.extend(batch)
+        self.endInsertRows()
+
+    def leading_count(self):
+        return len(self._leading)
+
+    def value(self, row):
+        # 원본 값 (leading 행이나 범위 밖이면 None)
+        if len(self._leading) <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def find(self, match):
+        # match: 값 또는 predicate. 아직 안 가져온 구간은 찾을 때까지만 더 가져옴
+        pred = match if callable(match) else (lambda v: v == match)
+        for row in range(len(self._leading), len(self._rows)):
+            if pred(self._rows[row]):
+                return row
+        while self.canFetchMore():
+            start = len(self._rows)
+            self.fetchMore()
+            for row in range(start, len(self._rows)):
+                if pred(self._rows[row]):
+                    return row
+        return -1
+
+    def loaded_row(self, match):
+        # find 와 같지만 이미 가져온 행에서만 찾음 (변경 알림으로 행을 고칠 때, 안 가져온 구간은 원본이 최신)
+        pred = match if callable(match) else (lambda v: v == match)
+        for row in range(len(self._leading), len(self._rows)):
+            if pred(self._rows[row]):
+                return row
+        return -1
+
+    def set_value(self, row, value):
+        self._rows[row] = value
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx)
+
+    def append_value(self, value):
+        # 이미 끝까지 가져온 경우에만 즉시 추가 (아니면 나중에 fetchMore 로 보임)
+        if not self._exhausted:
+            return False
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append(value)
+        self.endInsertRows()
+        return True
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+
+class LiveSource:
+    # LazyListModel 원본용 이름 목록: accept 를 통과하는 이름만 순서대로, 같은 이름은 한 번만 내줌.
+    # 변경 알림이 오면 update(model, name) 으로 그 이름만 넣고 빼며, 모델이 아직 못 읽은 구간과 겹치지 않음
+    def __init__(self, names, accept=None):
+        self.names = list(names)
+        self.accept = accept
+        self.shown = set()
+
+    def __iter__(self):
+        # 목록 끝에 추가된 이름도 이어서 읽음
+        for name in self.names:
+            if name not in self.shown and (self.accept is None or self.accept(name)):
+                self.shown.add(name)
+                yield name
+
+    def update(self, model, name):
+        ok = self.accept is None or self.accept(name)
+        if ok and name not in self.shown:
+            if model.append_value(name):
+                self.shown.add(name)
+            else:
+                # 아직 읽는 중이면 끝에 붙여 두고 차례가 오면 다시 검사
+                self.names.append(name)
+        elif not ok and name in self.shown:
+            self.shown.discard(name)
+            row = model.loaded_row(name)
+            if row >= 0:
+                model.remove_row(row)
+
+
+def select_value(combo, value):
+    # 모델 기반 콤보에서 값으로 선택 (setCurrentText 대신)
+    model = combo.model()
+    row = model.find(value) if isinstance(model, LazyListModel) else combo.findText(value)
+    if row >= 0:
+        combo.setCurrentIndex(row)
+    return row
+
+
+def attach_search(combo, index, accept=None):
+    # 콤보를 입력 가능하게 하고, 입력할 때마다 이름 인덱스 검색 결과를 자동완성 팝업으로 보여줌.
+    # 후보를 고르면 콤보에서 그 값을 선택 (accept 로 후보를 거를 수 있음)
+    combo.setEditable(True)
+    combo.setInsertPolicy(QComboBox.NoInsert)
+    completer = QCompleter(combo)
+    completer.setModel(QStringListModel(completer))
+    completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+    line = combo.lineEdit()
+
+    def update(text):
+        completer.model().setStringList(index.search(text, accept=accept))
+
+    # QComboBox.setCompleter 는 후보를 콤보 모델의 이미 가져온 행에서만 찾으므로 lineEdit 에 직접 연결
+    line.setCompleter(completer)
+    line.textEdited.connect(update)
+    completer.activated[str].connect(lambda text: select_value(combo, text))
+    return completer
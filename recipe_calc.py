@@ -1,23 +1,18 @@
-import json
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QComboBox, QSpinBox, QPushButton
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QSpinBox, QPushButton, QListWidget
 )
 from PyQt5.QtWidgets import QMessageBox
-
-RECIPE_FILE = "recipes.json"
-DATA_FILE = "material_data.json"
-
-def load_data(filename):
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_data(filename, data):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+from change_bus import get_change_bus
+from data_store import ConflictError, get_store
+from perf_stats import action
+from cost_engine import RecipeCycleError, get_cost_index, recipe_output
+from crafting import CraftError, CraftQueue, apply_craft, stock_count
+from lots import LotError
 
 class RecipeCalc(QWidget):
     def __init__(self):
         super().__init__()
+        self.store = get_store()
         self.setWindowTitle("제작 계산")
         layout = QVBoxLayout()
         self.recipe_select = QComboBox()
@@ -31,10 +26,21 @@ class RecipeCalc(QWidget):
         self.market = QSpinBox()
         self.market.setMaximum(99999999)
         self.result = QLabel("-")
-        self.fee_spin = QSpinBox()
-        self.fee_spin.setMaximum(9999999)
         self.make_count = QSpinBox()
         self.make_count.setMaximum(999999)
+        self.enchant = QComboBox()
+        for i in range(5): self.enchant.addItem(str(i), i)
+        # 제작 대기열: 여러 제작을 모아서 한 번에 확인/저장
+        self.queue = CraftQueue(self.store)
+        self.queue_list = QListWidget()
+        btn_queue_add = QPushButton("대기열에 추가")
+        btn_queue_add.clicked.connect(self.queue_add)
+        btn_queue_remove = QPushButton("선택 삭제")
+        btn_queue_remove.clicked.connect(self.queue_remove)
+        btn_queue_clear = QPushButton("비우기")
+        btn_queue_clear.clicked.connect(self.queue_clear)
+        btn_queue_run = QPushButton("대기열 제작")
+        btn_queue_run.clicked.connect(self.queue_commit)
 
 
 
@@ -42,108 +48,147 @@ class RecipeCalc(QWidget):
         layout.addWidget(self.recipe_select)
         layout.addWidget(QLabel("개당 제작 수수료"))
         layout.addWidget(self.fee_spin)
-        layout.addWidget(QLabel("개당 제작 수수료"))
-        layout.addWidget(self.fee_spin)
         layout.addWidget(QLabel("제작 갯수"))
         layout.addWidget(self.make_count)
+        layout.addWidget(QLabel("인첸트"))
+        layout.addWidget(self.enchant)
         layout.addWidget(QLabel("시장가 입력 (1회 생산 기준)"))
         layout.addWidget(self.market)
         layout.addWidget(btn_calc)
         layout.addWidget(btn_make)
+        layout.addWidget(QLabel("제작 대기열"))
+        layout.addWidget(self.queue_list)
+        h = QHBoxLayout()
+        h.addWidget(btn_queue_add)
+        h.addWidget(btn_queue_remove)
+        h.addWidget(btn_queue_clear)
+        h.addWidget(btn_queue_run)
+        layout.addLayout(h)
         layout.addWidget(QLabel("손익/제작 결과"))
         layout.addWidget(self.result)
+        self.detail_label = QLabel("-")
+        layout.addWidget(QLabel("재료 보유 현황"))
+        layout.addWidget(self.detail_label)
         self.setLayout(layout)
+        bus = get_change_bus()
+        bus.recipe_saved.connect(self.on_recipe_saved)
+        bus.recipe_removed.connect(self.on_recipe_removed)
+        bus.reset.connect(self.on_reset)
 
     def refresh_recipes(self):
         self.recipe_select.clear()
         self.recipe_select.addItem("선택없음")
-        recipes = load_data(RECIPE_FILE)
+        recipes = self.store.recipes()
         self.recipes = recipes
         for r in recipes:
             self.recipe_select.addItem(r)
 
+    def on_recipe_saved(self, name):
+        if self.recipe_select.findText(name) < 0:
+            self.recipe_select.addItem(name)
+
+    def on_recipe_removed(self, name):
+        pos = self.recipe_select.findText(name)
+        if pos > 0:
+            self.recipe_select.removeItem(pos)
+
+    def on_reset(self, kind):
+        if kind == "recipes":
+            self.refresh_recipes()
+
+    @action("calc_cost")
     def calc_cost(self):
         recipe_name = self.recipe_select.currentText()
         recipes = self.recipes
-        materials = load_data(DATA_FILE)
         if recipe_name not in recipes:
             self.result.setText("레시피 없음")
             return
         recipe = recipes[recipe_name]
-        mats = recipe["materials"]
-        output_cnt = recipe.get("output_count", 1)
-        total = 0
-        fee_total = 0
-        for mat, cnt in mats.items():
-            if mat in materials:
-                buy = materials[mat]["buy_price"]
-                fee = materials[mat]["fee"]
-                total += buy * cnt
-                fee_total += fee
-            else:
-                self.result.setText(f"{mat} 정보 없음")
-                return
-        craft_cost = total + fee_total
-        if output_cnt > 0:
-            unit_cost = craft_cost / output_cnt
-        else:
-            unit_cost = 0
+        output_cnt = recipe_output(recipe)
+        # 하위 레시피까지 재귀적으로 제작/구매 중 싼 쪽으로 원가 계산 (공유 인덱스에서 바뀐 부분만 재계산)
+        # 제작/보유 현황과 같은 인첸트 기준
+        enchant = str(self.enchant.currentData())
+        index = get_cost_index()
+        try:
+            node = index.cost(recipe_name, enchant)
+        except RecipeCycleError as e:
+            self.result.setText(str(e))
+            return
+        if node.craft_cost is None:
+            self.result.setText(f"{', '.join(node.missing)} 정보 없음")
+            return
+        unit_cost = node.craft_cost + self.fee_spin.value()
+        craft_cost = unit_cost * output_cnt
+        lines = ""
+        for mat, cnt, mat_cost, source in index.craft_breakdown(recipe_name, enchant):
+            lines += f"  {mat} {cnt}개 x {mat_cost:.2f} ({'제작' if source == 'craft' else '구매'})\n"
         market_price = self.market.value()
         profit = market_price - unit_cost
-        msg = f"총 제작비용(1회 제작): {craft_cost}\n" \
+        msg = f"총 제작비용(1회 제작): {craft_cost:.2f}\n" \
+              f"{lines}" \
               f"산출 갯수: {output_cnt}\n" \
               f"개당 제작단가: {unit_cost:.2f}\n" \
               f"시장가-단가 손익: {profit:.2f} ({'이익' if profit > 0 else '손해'})"
         self.result.setText(msg)
 
+    @action("make_recipe")
     def make_recipe(self):
         idx = self.recipe_select.currentIndex()
         if idx == 0:
             self.result.setText("레시피를 선택하세요")
             return
         recipe_name = self.recipe_select.currentText()
-        recipes = self.recipes
-        materials = load_data(DATA_FILE)
-        if recipe_name not in recipes:
-            self.result.setText("레시피 없음")
-            return
-        recipe = recipes[recipe_name]
-        mats = recipe["materials"]
-        output_cnt = recipe.get("output_count", 1)
         make_cnt = self.make_count.value()
-
-        # 1회 제작에 필요한 재료 수량 * 제작 횟수
-        for mat, cnt in mats.items():
-            if mat not in materials:
-                self.result.setText(f"{mat} 정보 없음")
-                return
-            need = cnt * make_cnt
-            inv = materials[mat].get("enchant", {}).get("0", {}).get("count", 0)
-            if inv < need:
-                self.result.setText(f"{mat} 재고 부족 (필요: {need}, 보유: {inv})")
-                return
-
-        # 차감
-        for mat, cnt in mats.items():
-            materials[mat]["enchant"]["0"]["count"] -= cnt * make_cnt
-
-        # 산출물 인벤토리 증가
-        if recipe_name not in materials:
-            # 없으면 새로 등록
-            materials[recipe_name] = {"count": 0}
-        if "count" not in materials[recipe_name]:
-            materials[recipe_name]["count"] = 0
-        materials[recipe_name]["count"] += make_cnt * output_cnt
-
-        # 제작시 수수료 입력 반영
-        fee_val = self.fee_spin.value()
-        materials[recipe_name]["fee"] = fee_val
-
-        save_data(DATA_FILE, materials)
-        self.result.setText(f"제작 성공: {recipe_name} {make_cnt * output_cnt}개, 인벤토리 반영 완료")
+        try:
+            produced = apply_craft(self.store, recipe_name, make_cnt, self.fee_spin.value(), str(self.enchant.currentData()))
+        except (CraftError, LotError, ConflictError) as e:
+            self.result.setText(str(e))
+            return
+        self.result.setText(f"제작 성공: {recipe_name} {produced}개, 인벤토리 반영 완료")
         self.update_detail()
 
 
+    def queue_add(self):
+        if self.recipe_select.currentIndex() == 0:
+            self.result.setText("레시피를 선택하세요")
+            return
+        name = self.recipe_select.currentText()
+        enchant = str(self.enchant.currentData())
+        try:
+            self.queue.add(name, self.make_count.value(), enchant, self.fee_spin.value())
+        except CraftError as e:
+            self.result.setText(str(e))
+            return
+        self.queue_list.addItem(f"{name} x{self.make_count.value()} ({enchant} 인첸트, 수수료 {self.fee_spin.value()})")
+
+    def queue_remove(self):
+        row = self.queue_list.currentRow()
+        if row < 0:
+            return
+        self.queue.remove(row)
+        self.queue_list.takeItem(row)
+
+    def queue_clear(self):
+        self.queue.clear()
+        self.queue_list.clear()
+
+    @action("craft_queue")
+    def queue_commit(self):
+        # 대기열 전체를 확인한 뒤 한 번에 저장. 실패하면 아무것도 반영하지 않고 대기열은 그대로
+        if not len(self.queue):
+            self.result.setText("대기열이 비어 있습니다")
+            return
+        jobs = list(self.queue.jobs)
+        try:
+            produced = self.queue.commit()
+        except (CraftError, LotError, ConflictError) as e:
+            self.result.setText(f"대기열 제작 실패 (반영 안 됨): {e}")
+            return
+        self.queue_list.clear()
+        lines = "\n".join(f"  {name} {n}개" for (name, _, _, _), n in zip(jobs, produced))
+        self.result.setText(f"대기열 제작 성공: {len(jobs)}건, 인벤토리 반영 완료\n{lines}")
+        self.update_detail()
+
     def update_detail(self):
         idx = self.recipe_select.currentIndex()
         if idx == 0:
@@ -151,22 +196,23 @@ class RecipeCalc(QWidget):
             return
         recipe_name = self.recipe_select.currentText()
         recipes = self.recipes
-        materials = load_data(DATA_FILE)
+        materials = self.store.materials()
         if recipe_name not in recipes:
             self.detail_label.setText("레시피 정보 없음")
             return
         recipe = recipes[recipe_name]
         mats = recipe["materials"]
         msg = ""
+        enchant = str(self.enchant.currentData())
         for mat, cnt in mats.items():
-            inv_cnt = materials.get(mat, {}).get("count", 0)
+            inv_cnt = stock_count(materials, mat, enchant)
             msg += f"{mat}: 필요 {cnt}, 보유 {inv_cnt}\n"
-        # self.detail_label.setText(msg.strip())
+        self.detail_label.setText(msg.strip())
         # detail_label 업데이트 뒤
         # 만약 여러 재료 중 fee를 대표로 한 가지만 쓸 거면:
         if mats:
             mat0 = list(mats.keys())[0]
-            fee0 = materials.get(mat0, {}).get("fee", 0)
+            fee0 = materials.get(mat0, {}).get("enchant", {}).get(enchant, {}).get("fee", 0)
             self.fee_spin.setValue(fee0)
         else:
             self.fee_spin.setValue(0)
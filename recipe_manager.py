@@ -1,18 +1,12 @@
-import json
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox, QLineEdit,
     QSpinBox, QTextEdit, QHBoxLayout, QPushButton, QMessageBox
 )
-
-RECIPE_FILE = "recipes.json"
-
-def load_data(filename):
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_data(filename, data):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+from change_bus import get_change_bus
+from data_store import ConflictError, get_store, record_version
+from perf_stats import action
+from name_index import get_name_index
+from qt_models import attach_search
 
 class IngredientRow(QWidget):
     def __init__(self, inventory_items, remove_callback):
@@ -21,6 +15,7 @@ class IngredientRow(QWidget):
         self.combo = QComboBox()
         self.combo.setEditable(True)
         self.combo.addItems(inventory_items)
+        attach_search(self.combo, get_name_index())
         self.qty = QSpinBox()
         self.qty.setMaximum(999999)
         self.btn_remove = QPushButton("-")
@@ -37,6 +32,7 @@ class IngredientRow(QWidget):
 class RecipeManager(QWidget):
     def __init__(self):
         super().__init__()
+        self.store = get_store()
         self.setWindowTitle("레시피")
         layout = QVBoxLayout()
         self.name_select = QComboBox()
@@ -78,6 +74,12 @@ class RecipeManager(QWidget):
         self.editing = False
         self.set_editable(True)
         self.add_ingredient_row()
+        # 저장/추가된 레시피와 재료 이름만 반영
+        bus = get_change_bus()
+        bus.recipe_saved.connect(self.on_recipe_saved)
+        bus.recipe_removed.connect(self.on_recipe_removed)
+        bus.material_changed.connect(self.on_material_added)
+        bus.reset.connect(self.on_reset)
 
     def add_ingredient_row(self, mat="", qty=1):
         def remove_row():
@@ -98,7 +100,7 @@ class RecipeManager(QWidget):
         self.ingredients_layout.addWidget(row)
 
     def load_recipes(self):
-        self.recipes = load_data(RECIPE_FILE)
+        self.recipes = self.store.recipes()
         self.name_select.blockSignals(True)
         self.name_select.clear()
         self.name_select.addItem("새로 입력")
@@ -106,10 +108,35 @@ class RecipeManager(QWidget):
             self.name_select.addItem(name)
         self.name_select.blockSignals(False)
 
+    def on_recipe_saved(self, name):
+        if self.name_select.findText(name) < 0:
+            self.name_select.addItem(name)
+        elif name == self.name_select.currentText() and not self.editing:
+            # 보고 있던 레시피면 내용만 다시 표시
+            self.select_changed()
+
+    def on_recipe_removed(self, name):
+        pos = self.name_select.findText(name)
+        if pos > 0:
+            self.name_select.removeItem(pos)
+
+    def on_material_added(self, name):
+        # 새 재료는 재료 콤보들 끝에 추가
+        if name in self.inventory_items:
+            return
+        self.inventory_items.append(name)
+        for row in self.ingredient_rows:
+            row.combo.addItem(name)
+
+    def on_reset(self, kind):
+        if kind == "recipes":
+            self.load_recipes()
+        elif kind == "materials":
+            self.inventory_items = self.load_inventory_items()
+
     def load_inventory_items(self):
         try:
-            items = load_data("material_data.json")
-            return list(items.keys())
+            return list(self.store.materials().keys())
         except Exception:
             return []
 
@@ -119,8 +146,10 @@ class RecipeManager(QWidget):
         self.output_count.setEnabled(enable)
         # self.materials.setEnabled(enable)
 
+    @action("recipe_detail")
     def select_changed(self):
         idx = self.name_select.currentIndex()
+        self.loaded = None
         if idx == 0:
             self.set_editable(True)
             self.recipe_name.setText("")
@@ -130,6 +159,7 @@ class RecipeManager(QWidget):
         else:
             key = self.name_select.currentText()
             rec = self.recipes.get(key, {})
+            self.loaded = (key, record_version(self.recipes.get(key)))
             self.recipe_name.setText(rec.get("name", key))
             self.output_count.setValue(rec.get("output_count", 1))
             mats = rec.get("materials", {})
@@ -141,20 +171,32 @@ class RecipeManager(QWidget):
         self.set_editable(True)
         self.editing = True
 
+    @action("save_recipe")
     def save_recipe(self):
         n = self.recipe_name.text()
         out_cnt = self.output_count.value()
         mats = self.get_ingredients()  # 동적 행 기반 dict
+        zero = [mat for mat, qty in mats.items() if qty <= 0]
+        if zero:
+            QMessageBox.warning(self, "오류", "수량이 0인 재료가 있습니다: " + ", ".join(zero))
+            return
 
-        recipes = load_data(RECIPE_FILE)
-        recipes[n] = {
+        recipe = {
             "name": n,
             "output_count": out_cnt,
             "materials": mats
         }
-        save_data(RECIPE_FILE, recipes)
+        loaded = getattr(self, "loaded", None)
+        if loaded is not None and loaded[0] == n and loaded[1] is not None:
+            recipe["version"] = loaded[1]
+        try:
+            self.store.put_recipe(n, recipe)
+        except ConflictError:
+            QMessageBox.warning(self, "충돌", "다른 창에서 이 레시피를 먼저 수정했습니다. 새 내용을 불러옵니다.")
+            self.load_recipes()
+            return
         QMessageBox.information(self, "알림", "저장됨")
-        self.load_recipes()
+        # 목록은 변경 알림으로 이미 반영됨
         idx = self.name_select.findText(n)
         self.name_select.setCurrentIndex(idx if idx >= 0 else 0)
         self.set_editable(False)
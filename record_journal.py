@@ -0,0 +1,139 @@
+import os
+import json
+from perf_stats import measure
+
+# 레코드 단위 저널(<키, 레코드> 한 줄씩 append), version 기반 3-way 병합, 프로세스 간 파일 잠금.
+# CachedFile(data_store), SaleJournal, sqlite 백엔드가 같이 씀
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def read_journal(path, offset=0):
+    # 레코드 저널에서 offset 이후 [(키, 레코드)] 와 읽은 끝 위치. 쓰다 만 마지막 줄은 제외
+    entries = []
+    if not os.path.exists(path):
+        return entries, offset
+    with measure("journal.replay") as m, open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            m.read += len(line)
+            if line.strip():
+                event = json.loads(line)
+                entries.append((event["key"], event["record"]))
+    return entries, offset
+
+
+def append_journal(path, offset, entries):
+    # [(키, 레코드)] 를 한 줄씩 append 하고 쓴 바이트 수 반환 (호출한 쪽이 FileLock 을 잡은 상태).
+    # offset = read_journal 이 읽은 끝: 그 뒤에 쓰다 만 줄(저장 도중 종료)이 있으면 잘라내고 이어 씀
+    lines = b"".join(
+        (json.dumps({"key": key, "record": record}, ensure_ascii=False) + "\n").encode("utf-8")
+        for key, record in entries)
+    with measure("journal.append") as m, open(path, "ab") as f:
+        f.truncate(offset)
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+        m.written = len(lines)
+    return len(lines)
+
+
+def apply_journal(data, entries):
+    # 같은 키는 나중 레코드가 이김, 레코드가 None 이면 삭제
+    for key, record in entries:
+        if record is None:
+            data.pop(key, None)
+        else:
+            data[key] = record
+
+
+class ConflictError(ValueError):
+    # 읽어 간 뒤에 다른 창/프로세스가 먼저 같은 레코드를 바꿈
+    def __init__(self, kind, key):
+        super().__init__(f"다른 곳에서 먼저 수정됨: {key}")
+        self.kind = kind
+        self.key = key
+
+
+def record_version(record):
+    # 레코드가 없으면 None, version 필드가 없는 예전 레코드는 0
+    if record is None:
+        return None
+    return record.get("version", 0)
+
+
+def merge_records(disk, ours, bases):
+    # 3-way 병합. bases = 이쪽에서 바꾼 레코드 -> 바꾸기 전 version.
+    # 디스크 쪽 version 이 그대로면 이쪽 값, 디스크에서도 바뀌었으면 충돌(디스크 값 유지).
+    # 이쪽에서 안 바꾼 레코드는 디스크 값
+    merged = dict(disk)
+    conflicts = []
+    for key, base in bases.items():
+        if record_version(disk.get(key)) != base:
+            conflicts.append(key)
+        elif key in ours:
+            merged[key] = ours[key]
+        else:
+            merged.pop(key, None)
+    return merged, conflicts
+
+
+def absorb_records(data, new, skip=()):
+    # 다시 읽은 내용을 레코드 단위로 기존 객체에 반영 (객체는 그대로), 바뀐 키/인덱스 반환
+    if isinstance(data, list):
+        changed = [i for i in range(len(new)) if i >= len(data) or data[i] != new[i]]
+        for i in changed:
+            if i < len(data):
+                data[i] = new[i]
+            else:
+                data.append(new[i])
+        return changed
+    changed = [k for k in data.keys() | new.keys() if k not in skip and data.get(k) != new.get(k)]
+    for k in changed:
+        if k in new:
+            data[k] = new[k]
+        else:
+            del data[k]
+    return changed
+
+
+class FileLock:
+    # 같은 데이터 폴더를 쓰는 다른 프로세스와의 권고 잠금 (<파일>.lock). 중첩해서 잡지 않을 것
+    def __init__(self, filename):
+        self.path = filename + ".lock"
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 은 10초 정도 시도 후 실패하므로 계속 기다림
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name == "nt":
+            import msvcrt
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+from data_store import gc_paused, file_sig, load_snapshot, write_json
+from record_journal import ConflictError, FileLock, absorb_records, file_size, record_version
+from perf_stats import measure
+from schema import SCHEMA_VERSION, canonical_sale, upgrade
+
+JOURNAL_FILE = "sale_journal.jsonl"
+COMPACT_EVERY = 1000
+
+# 이벤트 종류
+REGISTERED = "registered"
+REPRICED = "repriced"
+COMPLETED = "completed"
+UPDATED = "updated"
+
+
+def _upgrade(sales):
+    return upgrade("sales", sales)
+
+
+class SaleJournal:
+    # sale_data.json = 스냅샷, sale_journal.jsonl = 스냅샷 이후 이벤트 (append only)
+    # 판매마다 바뀌지 않는 id 가 있어 압축 중 중단되거나 다른 프로세스와 같이 써도 재생이 중복되지 않음.
+    # 기록은 <저널>.lock 을 잡고 최신 상태로 맞춘 뒤에만 append
+    def __init__(self, snapshot_path, journal_path=None, compact_every=COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.join(os.path.dirname(snapshot_path), JOURNAL_FILE)
+        self.compact_every = compact_every
+        self.on_change = None      # fn(indices): 다른 프로세스가 기록한 판매
+        self._sales = None
+        self._ids = {}
+        self._snap_sig = None
+        self._offset = 0
+        self._events = 0
+        self._lock = threading.RLock()
+
+    def sales(self):
+        with self._lock:
+            self._sync()
+            return self._sales
+
+    def _sync(self):
+        changed = None
+        if self._sales is None or file_sig(self.snapshot_path) != self._snap_sig:
+            changed = self._reload()
+        else:
+            size = file_size(self.journal_path)
+            if size < self._offset:
+                # 다른 프로세스에서 압축함
+                changed = self._reload()
+            elif size > self._offset:
+                changed = self._replay()
+        if changed and self.on_change is not None:
+            self.on_change(changed)
+
+    def _reload(self):
+        prev = self._sales
+        sig = file_sig(self.snapshot_path)
+        sales = load_snapshot(self.snapshot_path, [], sig, normalize=_upgrade)
+        self._sales = sales
+        with gc_paused():
+            self._ids = {sale["id"]: i for i, sale in enumerate(sales)}
+        self._snap_sig = sig
+        self._offset = 0
+        self._events = 0
+        self._replay()
+        if prev is None:
+            return None
+        # 기존 목록 객체에 바뀐 것만 반영
+        changed = absorb_records(prev, self._sales)
+        self._sales = prev
+        return changed
+
+    def _replay(self):
+        changed = []
+        if not os.path.exists(self.journal_path):
+            return changed
+        with measure("journal.replay") as m, open(self.journal_path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 쓰다 만 마지막 줄은 무시
+                    break
+                self._offset += len(line)
+                m.read += len(line)
+                if line.strip():
+                    idx = self._apply(json.loads(line))
+                    if idx is not None:
+                        changed.append(idx)
+                    self._events += 1
+        return changed
+
+    def _apply(self, event):
+        # 반영된 판매 위치 (이미 반영된 이벤트면 None)
+        if event["op"] == REGISTERED:
+            sale = event["sale"]
+            if event.get("schema") != SCHEMA_VERSION:
+                # 형식 버전 표시 전에 기록된 판매
+                sale = canonical_sale(sale)
+            if "id" not in sale:
+                # id 없는 예전 이벤트는 위치로 중복 판단
+                if event["idx"] != len(self._sales):
+                    return None
+                sale["id"] = f"legacy-{event['idx']}"
+            elif sale["id"] in self._ids:
+                return None
+            self._ids[sale["id"]] = len(self._sales)
+            self._sales.append(sale)
+            return len(self._sales) - 1
+        idx = self._ids.get(event["id"]) if "id" in event else event["idx"]
+        if idx is None or idx >= len(self._sales):
+            return None
+        self._sales[idx].update(event["fields"])
+        return idx
+
+    def _append(self, event):
+        # 호출하는 쪽에서 잠금을 잡고 _sync 한 상태
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        with measure("journal.append") as m, open(self.journal_path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            m.written = len(line)
+        self._offset += len(line)
+        self._events += 1
+        self._apply(event)
+        if self.compact_every and self._events >= self.compact_every:
+            self._compact()
+
+    def register(self, sale):
+        with self._lock, FileLock(self.journal_path):
+            self._sync()
+            idx = len(self._sales)
+            self._append({"op": REGISTERED, "schema": SCHEMA_VERSION, "idx": idx, "sale": sale})
+            return idx
+
+    def update(self, idx, fields, op=UPDATED, version=None):
+        # version 이 주어지면 지금 version 과 같을 때만 기록, 기록하면서 version + 1
+        with self._lock, FileLock(self.journal_path):
+            self._sync()
+            sale = self._sales[idx]
+            cur = record_version(sale)
+            if version is not None and cur != version:
+                raise ConflictError("sales", sale["id"])
+            fields = dict(fields)
+            fields["version"] = (cur or 0) + 1
+            self._append({"op": op, "idx": idx, "id": sale["id"], "fields": fields})
+
+    def index_of(self, sale_id):
+        with self._lock:
+            self._sync()
+            return self._ids.get(sale_id)
+
+    def compact(self):
+        with self._lock, FileLock(self.journal_path):
+            self._sync()
+            self._compact()
+
+    def _compact(self):
+        # 현재 상태를 스냅샷으로 기록한 뒤 저널을 비움
+        self._snap_sig = write_json(self.snapshot_path, self._sales, schema="sales")
+        with open(self.journal_path, "wb"):
+            pass
+        self._offset = 0
+        self._events = 0
+
+    def invalidate(self):
+        self._sales = None
+        self._ids = {}
+        self._snap_sig = None
@@ -1,28 +1,26 @@
-import os
-import json
+from collections.abc import Mapping
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox, QSpinBox, QPushButton, QMessageBox
 )
-
-DATA_FILE = "material_data.json"
-
-def load_data(filename):
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            return json.load(f)
-    return {}
-
-def save_data(filename, data):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+from change_bus import get_change_bus
+from data_store import ConflictError, get_store
+from perf_stats import action
+from name_index import get_name_index
+from qt_models import LazyListModel, LiveSource, attach_search
+from sales import SaleError, quote, register_sale
 
 class SaleRegister(QWidget):
     def __init__(self):
         super().__init__()
+        self.store = get_store()
         self.setWindowTitle("판매등록")
         self.materials = {}
         layout = QVBoxLayout()
         self.item_select = QComboBox()
+        self.item_model = LazyListModel()
+        self.item_select.setModel(self.item_model)
+        # 검색 후보도 재고 있는 아이템만
+        attach_search(self.item_select, get_name_index(), accept=self.in_stock)
         self.enchant_select = QComboBox()
         for i in range(0, 5):
             self.enchant_select.addItem(f"{i} 인첸트", i)
@@ -63,37 +61,57 @@ class SaleRegister(QWidget):
         self.item_select.currentIndexChanged.connect(self.update_item_info)
         self.enchant_select.currentIndexChanged.connect(self.update_item_info)
         self.refresh_items()
+        # 재고가 바뀐 아이템만 반영
+        bus = get_change_bus()
+        bus.material_changed.connect(self.on_material_changed)
+        bus.material_removed.connect(self.on_material_changed)
+        bus.reset.connect(self.on_reset)
 
     def refresh_items(self):
-        self.item_select.clear()
         self.enchant_select.clear()
-        materials = load_data(DATA_FILE)
+        materials = self.store.materials()
         self.materials = materials
-        # 아이템명별로 "갯수 1개 이상인 인첸트"만 콤보에 추가
-        filtered_items = []
-        for item_name, meta in materials.items():
-            enchants = meta.get("enchant", {})
-            for enchant_str, mat in enchants.items():
-                if isinstance(mat, dict) and mat.get("count", 0) > 0:
-                    filtered_items.append((item_name, enchant_str))
-                    break
-        for item_name, _ in filtered_items:
-            self.item_select.addItem(item_name)
-        self.refresh_enchants()
+        # 아이템명별로 "갯수 1개 이상인 인첸트"가 있는 것만, 콤보가 요청하는 만큼만 걸러냄
+        self.item_source = LiveSource(materials, accept=self.in_stock)
+        self.item_select.blockSignals(True)
+        self.item_model.reset(self.item_source)
+        self.item_select.setCurrentIndex(0 if self.item_model.rowCount() else -1)
+        self.item_select.blockSignals(False)
         # 인첸트 콤보도 해당 아이템에서 count>0인 인첸트만
         self.refresh_enchants()
 
+    def on_material_changed(self, name):
+        # 재고가 생기거나 없어진 아이템만 목록에서 넣고 빼고, 보고 있던 아이템이면 인첸트/가격만 다시 표시
+        current = self.item_select.currentText()
+        self.item_source.update(self.item_model, name)
+        if name == current or self.item_select.currentText() != current:
+            self.refresh_enchants()
+
+    def on_reset(self, kind):
+        if kind == "materials":
+            self.refresh_items()
+
+    def in_stock(self, item_name):
+        enchants = self.materials.get(item_name, {}).get("enchant", {})
+        return any(isinstance(mat, Mapping) and mat.get("count", 0) > 0 for mat in enchants.values())
+
     def refresh_enchants(self):
+        selected = self.enchant_select.currentData()
         self.enchant_select.blockSignals(True)
         self.enchant_select.clear()
         item = self.item_select.currentText()
         enchants = self.materials.get(item, {}).get("enchant", {})
         for enchant_str, mat in enchants.items():
-            if isinstance(mat, dict) and mat.get("count", 0) > 0:
+            if isinstance(mat, Mapping) and mat.get("count", 0) > 0:
                 self.enchant_select.addItem(f"{enchant_str} 인첸트", int(enchant_str))
+        # 고르던 인첸트가 아직 있으면 유지
+        pos = self.enchant_select.findData(selected)
+        if pos >= 0:
+            self.enchant_select.setCurrentIndex(pos)
         self.enchant_select.blockSignals(False)
         self.update_item_info()
 
+    @action("sale.item_info")
     def update_item_info(self):
         item = self.item_select.currentText()
         enchant = str(self.enchant_select.currentData() or "0")
@@ -109,76 +127,30 @@ class SaleRegister(QWidget):
         if market_price is not None:
             self.sale_price.setValue(market_price)
 
+    @action("calc_profit")
     def calc_profit(self):
         item = self.item_select.currentText()
         enchant = str(self.enchant_select.currentData() or "0")
-        mat = self.materials.get(item, {}).get("enchant", {}).get(enchant, {})
-        if not mat:
-            self.result.setText("아이템/인첸트 정보 없음")
+        try:
+            q = quote(self.materials, item, enchant, self.count_spin.value(), self.sale_price.value())
+        except SaleError as e:
+            self.result.setText(str(e))
             return
-        cnt = self.count_spin.value()
-        a = (mat.get("buy_price", 0) + mat.get("fee", 0)) * cnt
-        b = self.sale_price.value() * cnt
-        unit_profit = self.sale_price.value() - (mat.get("buy_price", 0) + mat.get("fee", 0))
-        total_profit = b - a
+        unit_profit, total_profit = q["unit_profit"], q["profit"]
         self.result.setText(
             f"개당 이익: {unit_profit} ({'이익' if unit_profit > 0 else '손해'})\n"
             f"총 이익: {total_profit} ({'이익' if total_profit > 0 else '손해'})"
         )
 
+    @action("register_sale")
     def register_sale(self):
         item = self.item_select.currentText()
         enchant = str(self.enchant_select.currentData())
-        print(enchant)
-        mat = self.materials.get(item, {}).get("enchant", {}).get(enchant, {})
-        print(mat)
-        if not mat:
-            QMessageBox.warning(self, "경고", "아이템/인첸트 정보 없음")
-            return
-        cnt = self.count_spin.value()
-        stock = mat.get("count", 0)
-        print("stock -> ", stock)
-        print(mat.get("count"))
-        if cnt <= 0:
-            QMessageBox.warning(self, "경고", "판매수량을 입력하세요")
-            return
-        if stock < cnt:
-            QMessageBox.warning(self, "경고", f"재고 부족 (보유:{stock}, 요청:{cnt})")
-            return
-
-        a = (mat.get("buy_price", 0) + mat.get("fee", 0)) * cnt
-        b = self.sale_price.value() * cnt
-        unit_profit = self.sale_price.value() - (mat.get("buy_price", 0) + mat.get("fee", 0))
-        profit = b - a
-
-        # 인벤토리에서 차감
-        materials = load_data(DATA_FILE)
-        if item not in materials or "enchant" not in materials[item] or enchant not in materials[item]["enchant"]:
-            QMessageBox.warning(self, "경고", "인벤토리 정보 오류")
+        # 재고 차감 + sale_data 기록
+        try:
+            register_sale(self.store, item, enchant, self.count_spin.value(), self.sale_price.value())
+        except (SaleError, ConflictError) as e:
+            QMessageBox.warning(self, "경고", str(e))
             return
-        materials[item]["enchant"][enchant]["count"] = stock - cnt
-        save_data(DATA_FILE, materials)
-
-        # sale_data.json에 append
-        filename = "sale_data.json"
-        if os.path.exists(filename):
-            with open(filename, "r") as f:
-                data = json.load(f)
-        else:
-            data = []
-        data.append({
-            "item": item,
-            "enchant": int(enchant),
-            "unit_buy_price": mat.get("buy_price", 0),
-            "unit_fee": mat.get("fee", 0),
-            "unit_cost": mat.get("buy_price", 0) + mat.get("fee", 0),
-            "count": cnt,
-            "total_cost": a,
-            "unit_sale_price": self.sale_price.value(),
-            "total_sale_price": self.sale_price.value() * cnt,
-            "profit": profit
-        })
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        # 목록/재고 표시는 변경 알림으로 이미 반영됨
         QMessageBox.information(self, "알림", "판매등록 완료")
-        self.refresh_items()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import datetime
+import lots
+from crafting import stock_count
+
+DONE = "판매완료"
+
+
+class SaleError(ValueError):
+    pass
+
+
+def now_stamp():
+    return datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+
+
+def quote(materials, item, enchant, count, unit_price, policy=None):
+    # 판매 전 손익 계산 (재고 lot 원가 기준, lots.py)
+    enchant = str(enchant)
+    mat = materials.get(item, {}).get("enchant", {}).get(enchant, {})
+    if not mat:
+        raise SaleError("아이템/인첸트 정보 없음")
+    return _priced(item, enchant, mat, count, unit_price, lots.preview(mat, count, policy), policy)
+
+
+def _priced(item, enchant, mat, count, unit_price, total_cost, policy):
+    cost = lots.money(total_cost / count) if count else lots.base_cost(mat)
+    return {
+        "item": item,
+        "enchant": int(enchant),
+        "unit_buy_price": mat.get("buy_price", 0),
+        "unit_fee": mat.get("fee", 0),
+        "unit_cost": cost,
+        "count": count,
+        "total_cost": total_cost,
+        "unit_sale_price": unit_price,
+        "total_sale_price": unit_price * count,
+        "unit_profit": unit_price - cost,
+        "profit": lots.money(unit_price * count - total_cost),
+        "cost_basis": policy or lots.POLICY,
+    }
+
+
+def register_sale(store, item, enchant, count, unit_price, now=None, policy=None):
+    # 재고 lot 차감 후 판매 기록 추가 (원가는 차감한 lot 기준), 판매 목록 위치 반환
+    enchant = str(enchant)
+    materials = store.materials()
+    if not materials.get(item, {}).get("enchant", {}).get(enchant):
+        raise SaleError("아이템/인첸트 정보 없음")
+    stock = stock_count(materials, item, enchant)
+    if count <= 0:
+        raise SaleError("판매수량을 입력하세요")
+    if stock < count:
+        raise SaleError(f"재고 부족 (보유:{stock}, 요청:{count})")
+    meta = store.material(item)
+    if meta is None or enchant not in meta.get("enchant", {}):
+        raise SaleError("인벤토리 정보 오류")
+    mat = meta["enchant"][enchant]
+    sale = _priced(item, enchant, mat, count, unit_price, lots.consume(mat, count, policy), policy)
+    store.put_material(item, meta)
+    del sale["unit_profit"]
+    sale["registered_time"] = now or now_stamp()
+    return store.append_sale(sale)
+
+
+def unfinished(sales):
+    # (위치, 판매) 중 미완료만. 읽는 도중 등록된 판매도 이어서 읽음
+    i = 0
+    while i < len(sales):
+        sale = sales[i]
+        if sale.get("status") != DONE:
+            yield i, sale
+        i += 1
+
+
+def reprice_sale(store, idx, unit_price, total_price, version=None):
+    # 판매가 수정 + 이익 재계산 (원가는 판매 때 차감한 lot 원가 그대로)
+    sale = store.sales()[idx]
+    store.update_sale(idx, {
+        "unit_sale_price": unit_price,
+        "total_sale_price": total_price,
+        "profit": lots.money(total_price - sale["total_cost"])
+    }, op="repriced", version=version)
+
+
+def complete_sale(store, idx, version=None, now=None):
+    store.update_sale(idx, {
+        "status": DONE,
+        "sold_time": now or now_stamp()
+    }, op="completed", version=version)
@@ -0,0 +1,203 @@
+import os
+import sys
+from collections.abc import Mapping
+from perf_stats import measure
+
+# 데이터 파일 형식 버전. 버전 표시가 없는 파일은 1 (예전 형식이 섞여 있을 수 있음)
+#   재료/레시피/카테고리 파일: 최상위 dict 맨 앞에 "_schema": 버전
+#   판매 파일: {"_schema": 버전, "sales": [...]}
+# 읽을 때 예전 버전이면 레코드마다 한 가지 형식으로 바꾸고, 현재 버전이면 그대로 사용.
+# 그래서 화면/계산 코드는 필드를 바로 읽음 (예전 키로 대신 읽는 .get 체인 없음)
+SCHEMA_VERSION = 2
+SCHEMA_KEY = "_schema"
+
+# 인첸트 레코드 기본값 (키 순서 = MaterialTable 배열에 들어가는 순서)
+ENCHANT_DEFAULTS = {"buy_price": 0, "fee": 0, "count": 0, "market_price": 0, "market_price_time": None}
+# 판매: 새 키 <- 예전 키
+SALE_RENAMES = (
+    ("unit_buy_price", "buy_price"),
+    ("unit_fee", "fee"),
+    ("unit_sale_price", "sale_price"),
+    ("total_sale_price", "sale_price"),
+)
+
+
+class SchemaError(ValueError):
+    # 이 프로그램보다 새 버전에서 저장한 파일
+    def __init__(self, version):
+        super().__init__(f"데이터 파일 형식 {version} 은 지원하지 않습니다 (지원: {SCHEMA_VERSION} 이하)")
+        self.version = version
+
+
+def new_enchant(**fields):
+    rec = dict(ENCHANT_DEFAULTS)
+    rec.update(fields)
+    return rec
+
+
+def canonical_enchant(rec):
+    if not isinstance(rec, dict):
+        return rec
+    out = {key: rec.get(key, default) for key, default in ENCHANT_DEFAULTS.items()}
+    for key, value in rec.items():
+        if key not in out:
+            out[key] = value
+    return out
+
+
+def canonical_material(meta):
+    # {"category": [...], "enchant": {"0": 레코드, ...}, 그 밖의 키(version 등)}
+    #   최상위 "0", "1".. 블록: enchant 에 없는 단계만 채움 (enchant 쪽이 최신)
+    #   예전 제작 기능이 최상위에 쌓은 count/fee: 0 인첸트 레코드에 더함 (그때는 0 인첸트만 제작)
+    if not isinstance(meta, dict):
+        return meta
+    enchants = {str(k): canonical_enchant(rec) for k, rec in (meta.get("enchant") or {}).items()}
+    for key, block in meta.items():
+        if key.isdigit() and isinstance(block, dict) and key not in enchants:
+            enchants[key] = canonical_enchant(block)
+    if "count" in meta or "fee" in meta:
+        rec = enchants.setdefault("0", new_enchant())
+        rec["count"] += meta.get("count") or 0
+        if "fee" in meta:
+            rec["fee"] = meta["fee"]
+    out = {"category": list(meta.get("category") or []), "enchant": enchants}
+    for key, value in meta.items():
+        if key in out or key in ("count", "fee") or (key.isdigit() and isinstance(value, dict)):
+            continue
+        out[key] = value
+    return out
+
+
+def canonical_recipe(name, rec):
+    # {"name", "output_count", "materials", 그 밖의 키}. 예전 "output" -> "output_count"
+    out = {
+        "name": rec.get("name", name),
+        "output_count": rec.get("output_count", rec.get("output", 1)),
+        "materials": dict(rec.get("materials") or {}),
+    }
+    for key, value in rec.items():
+        if key not in out and key != "output":
+            out[key] = value
+    return out
+
+
+def canonical_sale(sale):
+    # 예전 buy_price/fee/sale_price -> unit_*/total_*, 빠진 인첸트/원가/이익은 있는 값으로 채움.
+    # status 는 판매완료된 것만 있음 (register_sale 과 같음)
+    out = dict(sale)
+    for new, old in SALE_RENAMES:
+        if new not in out:
+            out[new] = sale.get(old) or 0
+    for _, old in SALE_RENAMES:
+        out.pop(old, None)
+    out.setdefault("item", "")
+    out["enchant"] = int(out.get("enchant") or 0)
+    out.setdefault("count", 0)
+    out.setdefault("unit_cost", out["unit_buy_price"] + out["unit_fee"])
+    out.setdefault("total_cost", out["unit_cost"] * out["count"])
+    out.setdefault("profit", out["total_sale_price"] - out["total_cost"])
+    return out
+
+
+def file_version(data):
+    if isinstance(data, dict) and SCHEMA_KEY in data:
+        return data[SCHEMA_KEY]
+    return 1
+
+
+def upgrade(kind, data):
+    # 파일에서 읽은 내용 -> 메모리 형식 (버전 표시 제거). 예전 버전이면 레코드를 제자리에서 바꿈
+    version = file_version(data)
+    if version > SCHEMA_VERSION:
+        raise SchemaError(version)
+    if isinstance(data, dict) and SCHEMA_KEY in data:
+        del data[SCHEMA_KEY]
+        if kind == "sales":
+            data = data["sales"]
+    if version == SCHEMA_VERSION:
+        return data
+    with measure("schema.upgrade"):
+        if kind == "materials":
+            for name, meta in data.items():
+                data[name] = canonical_material(meta)
+        elif kind == "recipes":
+            for name, rec in data.items():
+                data[name] = canonical_recipe(name, rec)
+        elif kind == "sales":
+            for i, sale in enumerate(data):
+                data[i] = canonical_sale(sale)
+                # id 가 없던 예전 기록은 위치 기반 id (스냅샷 안의 순서는 바뀌지 않음)
+                data[i].setdefault("id", f"legacy-{i}")
+    return data
+
+
+class Stamped(Mapping):
+    # 저장용: 맨 앞에 "_schema" 를 붙여 보여주기만 함 (내용은 복사하지 않음)
+    def __init__(self, data, version=SCHEMA_VERSION):
+        self.data = data
+        self.version = version
+
+    def __getitem__(self, key):
+        if key == SCHEMA_KEY:
+            return self.version
+        return self.data[key]
+
+    def __iter__(self):
+        yield SCHEMA_KEY
+        yield from self.data
+
+    def __len__(self):
+        return len(self.data) + 1
+
+
+def stamp(kind, data):
+    # 메모리 형식 -> 파일에 쓸 형식
+    if kind == "sales":
+        return {SCHEMA_KEY: SCHEMA_VERSION, "sales": data}
+    return Stamped(data)
+
+
+def migrate(base_dir=".", log=print):
+    # 폴더의 데이터 파일을 현재 버전으로 다시 씀 (백업 남김). 레코드는 제자리에서 바꾸고 나눠서 씀
+    from data_store import load_data, write_json, DATA_FILE, RECIPE_FILE, CATEGORY_FILE, SALE_FILE, MATERIAL_JOURNAL_FILE
+    from record_journal import FileLock, apply_journal, read_journal
+    from sale_journal import SaleJournal
+    done = {}
+    for kind, filename in (("materials", DATA_FILE), ("recipes", RECIPE_FILE), ("categories", CATEGORY_FILE)):
+        path = os.path.join(base_dir, filename)
+        if not os.path.exists(path):
+            continue
+        # 재료 저널에 남은 레코드(현재 버전)도 합쳐서 쓰고 저널은 비움
+        journal = os.path.join(base_dir, MATERIAL_JOURNAL_FILE) if kind == "materials" else None
+        with FileLock(path):
+            data = load_data(path)
+            version = file_version(data)
+            data = upgrade(kind, data)
+            entries = read_journal(journal)[0] if journal else []
+            apply_journal(data, entries)
+            if version != SCHEMA_VERSION or entries:
+                write_json(path, data, schema=kind)
+                if entries:
+                    with open(journal, "wb"):
+                        pass
+        done[filename] = (version, len(data))
+        log(f"{filename}: {version} -> {SCHEMA_VERSION} ({len(data)}건)")
+    path = os.path.join(base_dir, SALE_FILE)
+    if os.path.exists(path):
+        version = file_version(load_data(path))
+        # 저널까지 반영해서 스냅샷으로 다시 씀
+        journal = SaleJournal(path)
+        journal.compact()
+        n = len(journal.sales())
+        done[SALE_FILE] = (version, n)
+        log(f"{SALE_FILE}: {version} -> {SCHEMA_VERSION} ({n}건)")
+    return done
+
+
+if __name__ == "__main__":
+    # 사용법: python schema.py [폴더]
+    try:
+        migrate(sys.argv[1] if len(sys.argv) > 1 else ".")
+    except SchemaError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
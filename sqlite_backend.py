@@ -0,0 +1,366 @@
+import os
+import sys
+import json
+import sqlite3
+from data_store import (
+    CachedFile, load_data, DATA_FILE, RECIPE_FILE, CATEGORY_FILE, SALE_FILE, MATERIAL_JOURNAL_FILE
+)
+from record_journal import ConflictError, absorb_records, apply_journal, read_journal, record_version
+from sale_journal import SaleJournal
+from perf_stats import timed
+from schema import SCHEMA_VERSION, canonical_material, canonical_recipe, canonical_sale, upgrade
+
+DB_FILE = "albion.db"
+
+ENCHANT_FIELDS = ["buy_price", "fee", "count", "market_price", "market_price_time"]
+SALE_FIELDS = [
+    "item", "enchant", "count", "unit_buy_price", "unit_fee", "unit_cost",
+    "total_cost", "unit_sale_price", "total_sale_price", "profit", "status", "sold_time"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    name TEXT PRIMARY KEY,
+    category TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS material_enchants (
+    item TEXT NOT NULL REFERENCES items(name),
+    enchant INTEGER NOT NULL,
+    buy_price INTEGER NOT NULL DEFAULT 0,
+    fee INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    market_price INTEGER NOT NULL DEFAULT 0,
+    market_price_time TEXT,
+    lots TEXT,
+    PRIMARY KEY (item, enchant)
+);
+CREATE INDEX IF NOT EXISTS idx_material_enchants_enchant ON material_enchants(enchant);
+CREATE TABLE IF NOT EXISTS recipes (
+    name TEXT PRIMARY KEY,
+    output_count INTEGER NOT NULL DEFAULT 1,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS recipe_lines (
+    recipe TEXT NOT NULL REFERENCES recipes(name),
+    line_no INTEGER NOT NULL,
+    material TEXT NOT NULL,
+    qty INTEGER NOT NULL,
+    PRIMARY KEY (recipe, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_recipe_lines_material ON recipe_lines(material);
+-- 금액 컬럼은 타입 미지정: 원본 int/float 그대로 보존
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item TEXT,
+    enchant INTEGER,
+    count INTEGER,
+    unit_buy_price,
+    unit_fee,
+    unit_cost,
+    total_cost,
+    unit_sale_price,
+    total_sale_price,
+    profit,
+    status TEXT,
+    sold_time TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sales_item ON sales(item, enchant);
+CREATE INDEX IF NOT EXISTS idx_sales_enchant ON sales(enchant);
+CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status);
+CREATE INDEX IF NOT EXISTS idx_sales_sold_time ON sales(sold_time);
+"""
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # version 컬럼이 없던 예전 db
+    if "version" not in [row[1] for row in conn.execute("PRAGMA table_info(recipes)")]:
+        conn.execute("ALTER TABLE recipes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    # 재고 lot 컬럼이 없던 예전 db
+    if "lots" not in [row[1] for row in conn.execute("PRAGMA table_info(material_enchants)")]:
+        conn.execute("ALTER TABLE material_enchants ADD COLUMN lots TEXT")
+    return conn
+
+
+def _split_material(meta):
+    # 저장용: category / enchant 맵 / 나머지(extra)로 분리
+    extra = {k: v for k, v in meta.items() if k not in ("category", "enchant")}
+    return meta.get("category"), meta.get("enchant", {}), extra
+
+
+def _enchant_row(item, enchant, rec):
+    # 마지막 칸: 재고 lot (json, 없으면 NULL)
+    lots = rec.get("lots")
+    return (item, int(enchant)) + tuple(rec.get(f, None if f == "market_price_time" else 0) for f in ENCHANT_FIELDS) + (
+        json.dumps(lots, ensure_ascii=False) if lots else None,)
+
+
+def _sale_row(sale):
+    extra = {k: v for k, v in sale.items() if k not in SALE_FIELDS}
+    return tuple(sale.get(f) for f in SALE_FIELDS) + (json.dumps(extra, ensure_ascii=False) if extra else None,)
+
+
+def _row_to_sale(row):
+    sale = {}
+    for f, v in zip(SALE_FIELDS, row):
+        if v is not None:
+            sale[f] = v
+    if row[-1]:
+        sale.update(json.loads(row[-1]))
+    return sale
+
+
+class SqliteBackend:
+    # 메모리 캐시는 그대로 두고, 변경분만 행 단위 트랜잭션으로 반영
+    def __init__(self, db_path=DB_FILE, base_dir="."):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self._categories = CachedFile(os.path.join(base_dir, CATEGORY_FILE))
+        self._version = None
+        self.notify = lambda kind, keys: None
+        self._upgrade()
+        self.invalidate()
+
+    def _upgrade(self):
+        # 형식 버전(user_version) 표시 전에 이관한 db: 예전 키가 남은 재료/판매 행만 한 번 고쳐 씀
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            self._load()
+            for name, meta in self._materials.items():
+                new = canonical_material(meta)
+                if new != meta:
+                    self._write_material(name, new, meta)
+            for idx, sale in enumerate(self._sales):
+                new = canonical_sale(sale)
+                if new != sale:
+                    self.conn.execute(
+                        "UPDATE sales SET " + ", ".join(f"{f}=?" for f in SALE_FIELDS) + ", extra=? WHERE id=?",
+                        _sale_row(new) + (self._sale_ids[idx],))
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _check_version(self):
+        # 다른 연결(다른 프로세스)에서 커밋하면 data_version 이 바뀜 -> 바뀐 레코드만 기존 객체에 반영
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return
+        old = None if self._version is None else (self._materials, self._recipes, self._sales)
+        self._load()
+        self._version = version
+        if old is None:
+            return
+        for kind, prev, new in zip(("materials", "recipes", "sales"), old, (self._materials, self._recipes, self._sales)):
+            changed = absorb_records(prev, new)
+            if changed:
+                self.notify(kind, changed)
+        self._materials, self._recipes, self._sales = old
+
+    def _begin(self):
+        # 쓰기 잠금을 먼저 잡고 최신 상태로 맞춘 뒤 확인/기록 (with self.conn 안에서 호출)
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._check_version()
+
+    def _expect(self, kind, key, current, record):
+        # DataStore 가 version + 1 해서 넘긴 레코드: 그 사이 다른 연결이 바꿨으면 충돌
+        if "version" in record and (record_version(current) or 0) != record["version"] - 1:
+            raise ConflictError(kind, key)
+
+    @timed("sqlite.load")
+    def _load(self):
+        materials = {}
+        for name, category, extra in self.conn.execute("SELECT name, category, extra FROM items"):
+            meta = json.loads(extra) if extra else {}
+            if category is not None:
+                meta["category"] = json.loads(category)
+            meta["enchant"] = {}
+            materials[name] = meta
+        for row in self.conn.execute(
+                "SELECT item, enchant, " + ", ".join(ENCHANT_FIELDS) + ", lots FROM material_enchants ORDER BY item, enchant"):
+            rec = dict(zip(ENCHANT_FIELDS, row[2:-1]))
+            if row[-1]:
+                rec["lots"] = json.loads(row[-1])
+            materials[row[0]]["enchant"][str(row[1])] = rec
+        recipes = {}
+        for name, out, version in self.conn.execute("SELECT name, output_count, version FROM recipes"):
+            recipes[name] = {"name": name, "output_count": out, "materials": {}}
+            if version:
+                recipes[name]["version"] = version
+        for recipe, material, qty in self.conn.execute(
+                "SELECT recipe, material, qty FROM recipe_lines ORDER BY recipe, line_no"):
+            recipes[recipe]["materials"][material] = qty
+        self._sale_ids = []
+        self._sale_index = {}
+        sales = []
+        for row in self.conn.execute("SELECT id, " + ", ".join(SALE_FIELDS) + ", extra FROM sales ORDER BY id"):
+            sale = _row_to_sale(row[1:])
+            # id 가 없던 예전 판매는 행 번호 기반 id
+            sale.setdefault("id", f"row-{row[0]}")
+            self._sale_index[sale["id"]] = len(sales)
+            self._sale_ids.append(row[0])
+            sales.append(sale)
+        self._materials = materials
+        self._recipes = recipes
+        self._sales = sales
+
+    def materials(self):
+        self._check_version()
+        return self._materials
+
+    def recipes(self):
+        self._check_version()
+        return self._recipes
+
+    def categories(self):
+        return self._categories.get()
+
+    def sales(self):
+        self._check_version()
+        return self._sales
+
+    def set_writer(self, writer):
+        # 행 단위 트랜잭션이라 저장이 짧음, 연결도 생성한 스레드 전용이므로 그대로 동기 저장
+        pass
+
+    def preload(self, progress=None):
+        # 연결이 만든 스레드 전용이라 미리 읽지 않음 (첫 조회 때 로드)
+        if progress is not None:
+            progress(1, 1)
+
+    @timed("sqlite.put_materials")
+    def put_materials(self, changes):
+        with self.conn:
+            self._begin()
+            for name, meta in changes.items():
+                self._expect("materials", name, self._materials.get(name), meta)
+            for name, meta in changes.items():
+                self._write_material(name, meta, self._materials.get(name))
+        for name, meta in changes.items():
+            self._materials[name] = meta
+        self._version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _write_material(self, name, meta, old):
+        category, enchants, extra = _split_material(meta)
+        old_category, old_enchants, old_extra = _split_material(old) if old else (None, {}, None)
+        if old is None or category != old_category or extra != old_extra:
+            self.conn.execute(
+                "INSERT INTO items(name, category, extra) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET category=excluded.category, extra=excluded.extra",
+                (name, json.dumps(category) if category is not None else None,
+                 json.dumps(extra, ensure_ascii=False) if extra else None))
+        # 바뀐 인첸트 행만 기록
+        for enchant, rec in enchants.items():
+            if old_enchants.get(enchant) != rec:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO material_enchants(item, enchant, " + ", ".join(ENCHANT_FIELDS) + ", lots) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _enchant_row(name, enchant, rec))
+        for enchant in set(old_enchants) - set(enchants):
+            self.conn.execute("DELETE FROM material_enchants WHERE item=? AND enchant=?", (name, int(enchant)))
+
+    @timed("sqlite.put_recipe")
+    def put_recipe(self, name, recipe):
+        recipe = canonical_recipe(name, recipe)
+        with self.conn:
+            self._begin()
+            self._expect("recipes", name, self._recipes.get(name), recipe)
+            self.conn.execute(
+                "INSERT INTO recipes(name, output_count, version) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET output_count=excluded.output_count, version=excluded.version",
+                (name, recipe["output_count"], recipe.get("version", 0)))
+            self.conn.execute("DELETE FROM recipe_lines WHERE recipe=?", (name,))
+            self.conn.executemany(
+                "INSERT INTO recipe_lines(recipe, line_no, material, qty) VALUES (?, ?, ?, ?)",
+                [(name, i, mat, qty) for i, (mat, qty) in enumerate(recipe["materials"].items())])
+        self._recipes[name] = recipe
+        self._version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @timed("sqlite.append_sale")
+    def append_sale(self, sale):
+        with self.conn:
+            self._begin()
+            cur = self.conn.execute(
+                "INSERT INTO sales(" + ", ".join(SALE_FIELDS) + ", extra) VALUES (" +
+                ", ".join("?" * (len(SALE_FIELDS) + 1)) + ")", _sale_row(sale))
+        self._sale_ids.append(cur.lastrowid)
+        self._sale_index[sale["id"]] = len(self._sales)
+        self._sales.append(sale)
+        self._version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return len(self._sales) - 1
+
+    @timed("sqlite.update_sale")
+    def update_sale(self, idx, fields, op="updated", version=None):
+        with self.conn:
+            self._begin()
+            sale = dict(self._sales[idx])
+            cur = record_version(sale)
+            if version is not None and cur != version:
+                raise ConflictError("sales", sale["id"])
+            sale.update(fields)
+            sale["version"] = (cur or 0) + 1
+            row = _sale_row(sale)
+            self.conn.execute(
+                "UPDATE sales SET " + ", ".join(f"{f}=?" for f in SALE_FIELDS) + ", extra=? WHERE id=?",
+                row + (self._sale_ids[idx],))
+        self._sales[idx] = sale
+        self._version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def sale_index(self, sale_id):
+        self._check_version()
+        return self._sale_index.get(sale_id)
+
+    def invalidate(self):
+        self._version = None
+        self._categories.invalidate()
+
+
+def migrate_json_to_sqlite(base_dir=".", db_path=None):
+    # json 파일 -> sqlite 1회 이관 (기존 db 내용은 비움)
+    db_path = db_path or os.path.join(base_dir, DB_FILE)
+    materials = upgrade("materials", load_data(os.path.join(base_dir, DATA_FILE)))
+    apply_journal(materials, read_journal(os.path.join(base_dir, MATERIAL_JOURNAL_FILE))[0])
+    recipes = upgrade("recipes", load_data(os.path.join(base_dir, RECIPE_FILE)))
+    sales = SaleJournal(os.path.join(base_dir, SALE_FILE)).sales()
+    conn = connect(db_path)
+    with conn:
+        for table in ("material_enchants", "items", "recipe_lines", "recipes", "sales"):
+            conn.execute(f"DELETE FROM {table}")
+        for name, meta in materials.items():
+            category, enchants, extra = _split_material(meta)
+            conn.execute(
+                "INSERT INTO items(name, category, extra) VALUES (?, ?, ?)",
+                (name, json.dumps(category) if category is not None else None,
+                 json.dumps(extra, ensure_ascii=False) if extra else None))
+            conn.executemany(
+                "INSERT INTO material_enchants(item, enchant, " + ", ".join(ENCHANT_FIELDS) + ", lots) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [_enchant_row(name, e, rec) for e, rec in enchants.items()])
+        for name, rec in recipes.items():
+            conn.execute("INSERT INTO recipes(name, output_count, version) VALUES (?, ?, ?)",
+                         (name, rec["output_count"], rec.get("version", 0)))
+            conn.executemany(
+                "INSERT INTO recipe_lines(recipe, line_no, material, qty) VALUES (?, ?, ?, ?)",
+                [(name, i, mat, qty) for i, (mat, qty) in enumerate(rec["materials"].items())])
+        conn.executemany(
+            "INSERT INTO sales(" + ", ".join(SALE_FIELDS) + ", extra) VALUES (" +
+            ", ".join("?" * (len(SALE_FIELDS) + 1)) + ")",
+            [_sale_row(sale) for sale in sales])
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    conn.close()
+    return len(materials), len(recipes), len(sales)
+
+
+if __name__ == "__main__":
+    # 사용법: python sqlite_backend.py migrate [db경로]
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("usage: python sqlite_backend.py migrate [db_path]")
+        sys.exit(1)
+    target = sys.argv[2] if len(sys.argv) > 2 else DB_FILE
+    n_mat, n_rec, n_sale = migrate_json_to_sqlite(".", target)
+    print(f"이관 완료: 재료 {n_mat}, 레시피 {n_rec}, 판매 {n_sale} -> {target}")
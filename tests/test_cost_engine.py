@@ -0,0 +1,59 @@
+import pytest
+from cost_engine import CostEngine, RecipeCycleError, purchase_price
+
+
+def material(market=0, buy=0, fee=0):
+    return {"category": [], "enchant": {"0": {
+        "buy_price": buy, "fee": fee, "count": 0, "market_price": market, "market_price_time": None,
+    }}}
+
+
+def recipe(materials, output=1):
+    return {"materials": materials, "output_count": output}
+
+
+def test_purchase_price_prefers_market():
+    materials = {"a": material(market=50, buy=30, fee=5), "b": material(buy=30, fee=5)}
+    assert purchase_price(materials, "a") == 50
+    assert purchase_price(materials, "b") == 35
+
+
+def test_purchase_price_unpriced_is_none():
+    # 가격이 하나도 없는 레코드는 0원이 아니라 가격 정보 없음
+    materials = {"a": material(fee=5)}
+    assert purchase_price(materials, "a") is None
+    assert purchase_price(materials, "a", "1") is None
+    assert purchase_price(materials, "없음") is None
+
+
+def test_cheaper_of_craft_and_buy():
+    materials = {"ore": material(market=10), "bar": material(market=50), "plate": material(market=100)}
+    recipes = {"bar": recipe({"ore": 2}), "plate": recipe({"bar": 3}, output=2)}
+    engine = CostEngine(materials, recipes)
+    bar = engine.cost("bar")
+    assert (bar.unit_cost, bar.source, bar.buy_cost) == (20, "craft", 50)
+    plate = engine.cost("plate")
+    assert (plate.unit_cost, plate.source) == (30, "craft")
+
+
+def test_missing_price_marks_cost_unknown():
+    materials = {"ore": material(), "bar": material()}
+    recipes = {"bar": recipe({"ore": 2}), "plate": recipe({"bar": 1, "coal": 1})}
+    engine = CostEngine(materials, recipes)
+    bar = engine.cost("bar")
+    assert bar.unit_cost is None and bar.source is None
+    assert bar.missing == ("ore",)
+    # 하위 레시피에서 모자란 재료까지 모아서 보고
+    plate = engine.cost("plate")
+    assert plate.unit_cost is None
+    assert set(plate.missing) == {"ore", "coal"}
+
+
+def test_cycle_is_reported():
+    materials = {"a": material(market=1), "b": material(market=1), "c": material(market=1)}
+    recipes = {"a": recipe({"b": 1}), "b": recipe({"c": 1}), "c": recipe({"a": 1})}
+    with pytest.raises(RecipeCycleError) as err:
+        CostEngine(materials, recipes).evaluate()
+    cycle = err.value.items
+    assert cycle[0] == cycle[-1]
+    assert set(cycle) == {"a", "b", "c"}
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from craft_planner import build_problem, plan_crafts, simplex
+from schema import new_enchant
+
+
+def material(market=0, buy=0, count=0):
+    return {"category": [], "enchant": {"0": new_enchant(buy_price=buy, market_price=market, count=count)}}
+
+
+def recipe(materials, output=1):
+    return {"materials": materials, "output_count": output}
+
+
+def test_simplex_optimum():
+    # max 3x + 2y  s.t. x + y <= 4, x + 3y <= 6  ->  x=4, y=0
+    x, value = simplex(np.array([3.0, 2.0]), np.array([[1.0, 1.0], [1.0, 3.0]]), np.array([4.0, 6.0]))
+    assert value == pytest.approx(12)
+    assert x == pytest.approx([4, 0])
+
+
+def test_simplex_unbounded_column():
+    with pytest.raises(ValueError):
+        simplex(np.array([1.0]), np.array([[0.0]]), np.array([5.0]))
+
+
+def test_exact_plan_is_integer():
+    # LP 해는 a 2.5회, 정수해는 a 2회 + 남는 재료로 b 1회
+    materials = {"ore": material(buy=1, count=5), "a": material(market=12), "b": material(market=5)}
+    recipes = {"a": recipe({"ore": 2}), "b": recipe({"ore": 1})}
+    plan = plan_crafts(materials, recipes, mode="exact")
+    assert plan.runs == {"a": 2, "b": 1}
+    assert plan.profit == pytest.approx(2 * 10 + 4)
+    assert plan.optimal
+
+
+def test_zero_quantity_recipe_is_skipped():
+    # 재료 수량이 모두 0 인 레시피는 제약이 없으므로 계획에서 빼고 알려줌
+    materials = {"ore": material(buy=1, count=4), "bar": material(market=5), "free": material(market=3)}
+    recipes = {"bar": recipe({"ore": 2}), "free": recipe({"ore": 0})}
+    names, _, A, _, skipped = build_problem(materials, recipes)
+    assert names == ["bar"] and skipped == ["free"]
+    assert A.shape == (1, 1)
+    plan = plan_crafts(materials, recipes)
+    assert plan.runs == {"bar": 2}
+    assert plan.skipped == ["free"]
+
+
+def test_budget_limits_runs():
+    materials = {"ore": material(buy=10, count=100), "bar": material(market=50)}
+    plan = plan_crafts(materials, {"bar": recipe({"ore": 2})}, silver_budget=65)
+    assert plan.runs == {"bar": 3}
@@ -0,0 +1,84 @@
+import pytest
+import lots
+from lots import AVERAGE, FIFO, LIFO, LotError, LotQueue
+
+
+def record(count=0, buy=0, fee=0, lot_list=None):
+    rec = {"buy_price": buy, "fee": fee, "count": count}
+    if lot_list is not None:
+        rec["lots"] = [list(lot) for lot in lot_list]
+    return rec
+
+
+def queue():
+    # 10 @ 100 -> 10 @ 200
+    return LotQueue([[10, 100, "t1"], [10, 200, "t2"]])
+
+
+def test_fifo_takes_oldest_first():
+    q = queue()
+    assert q.take(15, FIFO) == 10 * 100 + 5 * 200
+    assert list(q.lots) == [[5, 200, "t2"]]
+    assert q.count == 5
+
+
+def test_lifo_takes_newest_first():
+    q = queue()
+    assert q.take(15, LIFO) == 10 * 200 + 5 * 100
+    assert list(q.lots) == [[5, 100, "t1"]]
+
+
+def test_average_merges_lots():
+    q = queue()
+    assert q.take(5, AVERAGE) == 5 * 150
+    assert list(q.lots) == [[15, 150, "t2"]]
+
+
+def test_take_more_than_stock():
+    q = queue()
+    with pytest.raises(LotError):
+        q.take(21, FIFO)
+    assert q.count == 20
+
+
+def test_unknown_policy():
+    with pytest.raises(LotError):
+        queue().take(1, "random")
+
+
+def test_consume_uses_legacy_stock_first():
+    # lot 이 생기기 전부터 있던 재고(count 가 lot 합계보다 많은 만큼)는 buy_price + fee 의 가장 오래된 lot
+    rec = record(count=8, buy=40, fee=10, lot_list=[[3, 70, "t1"]])
+    assert lots.consume(rec, 6, FIFO) == 5 * 50 + 1 * 70
+    assert rec["count"] == 2
+    assert rec["lots"] == [[2, 70, "t1"]]
+
+
+def test_consume_drops_lots_when_only_legacy_stock_left():
+    rec = record(count=4, buy=40, fee=10)
+    assert lots.consume(rec, 1, LIFO) == 50
+    assert rec == record(count=3, buy=40, fee=10)
+
+
+def test_receive_then_consume():
+    rec = record(count=2, buy=10)
+    lots.receive(rec, 3, 20, "t1")
+    assert rec["count"] == 5
+    assert lots.consume(rec, 4, LIFO) == 3 * 20 + 10
+    assert lots.consume(rec, 1, FIFO) == 10
+    assert rec["count"] == 0
+
+
+def test_preview_does_not_modify():
+    rec = record(count=2, buy=10, lot_list=[[2, 30, "t1"]])
+    # 재고보다 많으면 모자란 만큼은 buy_price + fee
+    assert lots.preview(rec, 3, FIFO) == 2 * 30 + 10
+    assert rec == record(count=2, buy=10, lot_list=[[2, 30, "t1"]])
+
+
+def test_restock_down_uses_policy():
+    rec = record(count=0, lot_list=[])
+    lots.receive(rec, 2, 10, "t1")
+    lots.receive(rec, 2, 30, "t2")
+    lots.restock(rec, 1, 0, policy=LIFO)
+    assert rec["lots"] == [[1, 10, "t1"]]
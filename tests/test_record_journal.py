@@ -0,0 +1,128 @@
+import os
+import pytest
+from data_store import MATERIAL_JOURNAL_FILE, DataStore
+from record_journal import ConflictError, append_journal, apply_journal, merge_records, read_journal
+from schema import new_enchant
+
+
+def material(count):
+    return {"category": [], "enchant": {"0": new_enchant(count=count)}}
+
+
+def count(store, name):
+    return store.materials()[name]["enchant"]["0"]["count"]
+
+
+def test_merge_keeps_our_unchanged_base():
+    disk = {"a": {"version": 1, "v": "disk"}, "b": {"version": 3, "v": "disk"}}
+    ours = {"a": {"version": 2, "v": "ours"}, "c": {"version": 1, "v": "new"}}
+    merged, conflicts = merge_records(disk, ours, {"a": 1, "c": None})
+    assert conflicts == []
+    assert merged == {"a": ours["a"], "b": disk["b"], "c": ours["c"]}
+
+
+def test_merge_conflict_keeps_disk():
+    # 이쪽이 version 1 에서 고쳤는데 디스크는 이미 2 -> 충돌, 디스크 값 유지
+    disk = {"a": {"version": 2, "v": "disk"}}
+    ours = {"a": {"version": 2, "v": "ours"}}
+    merged, conflicts = merge_records(disk, ours, {"a": 1})
+    assert conflicts == ["a"]
+    assert merged["a"]["v"] == "disk"
+
+
+def test_merge_delete_and_create_conflicts():
+    # 지운 레코드를 디스크에서 고쳤거나, 새로 만든 키를 디스크에서도 만들었으면 충돌
+    disk = {"a": {"version": 4}, "b": {"version": 1}}
+    merged, conflicts = merge_records(disk, {"b": {"version": 1, "v": "ours"}}, {"a": 3, "b": None})
+    assert sorted(conflicts) == ["a", "b"]
+    assert merged == disk
+    merged, conflicts = merge_records(disk, {}, {"a": 4})
+    assert conflicts == [] and "a" not in merged
+
+
+def test_read_journal_skips_torn_line(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    end = append_journal(path, 0, [("a", {"v": 1}), ("b", {"v": 2})])
+    # 쓰다가 종료된 마지막 줄
+    with open(path, "ab") as f:
+        f.write(b'{"key": "c", "rec')
+    entries, offset = read_journal(path)
+    assert entries == [("a", {"v": 1}), ("b", {"v": 2})]
+    assert offset == end
+    # 이어 쓰면 쓰다 만 줄은 잘라냄
+    written = append_journal(path, offset, [("b", None)])
+    entries, offset = read_journal(path)
+    assert offset == end + written == os.path.getsize(path)
+    data = {"b": {"v": 0}, "x": {"v": 9}}
+    apply_journal(data, entries)
+    assert data == {"a": {"v": 1}, "x": {"v": 9}}
+
+
+def test_read_journal_from_offset(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    first = append_journal(path, 0, [("a", {"v": 1})])
+    append_journal(path, first, [("a", {"v": 2})])
+    assert read_journal(path, first)[0] == [("a", {"v": 2})]
+    assert read_journal(str(tmp_path / "없음.jsonl"), 5) == ([], 5)
+
+
+def test_store_replays_journal_after_crash(tmp_path):
+    base = str(tmp_path)
+    store = DataStore(base)
+    store.put_materials({"ore": material(5), "bar": material(1)})
+    store.put_material("ore", dict(store.material("ore"), enchant={"0": new_enchant(count=7)}))
+    journal = os.path.join(base, MATERIAL_JOURNAL_FILE)
+    assert os.path.getsize(journal) > 0
+    with open(journal, "ab") as f:
+        f.write(b'{"key": "bar", "record": {"cat')
+    # 새 프로세스: 파일 + 저널을 다시 읽음, 쓰다 만 줄은 무시
+    reopened = DataStore(base)
+    assert count(reopened, "ore") == 7
+    assert count(reopened, "bar") == 1
+    assert reopened.material("ore")["version"] == 2
+    reopened.put_material("bar", dict(reopened.material("bar"), enchant={"0": new_enchant(count=3)}))
+    assert count(DataStore(base), "bar") == 3
+
+
+def test_stale_version_raises(tmp_path):
+    store = DataStore(str(tmp_path))
+    store.put_material("ore", material(5))
+    stale = store.material("ore")
+    store.put_material("ore", store.material("ore"))
+    with pytest.raises(ConflictError):
+        store.put_material("ore", stale)
+
+
+def test_other_process_change_is_seen_before_put(tmp_path):
+    base = str(tmp_path)
+    DataStore(base).put_material("ore", material(5))
+    a, b = DataStore(base), DataStore(base)
+    theirs = b.material("ore")
+    a.put_material("ore", dict(a.material("ore"), enchant={"0": new_enchant(count=1)}))
+    # b 는 저장 전에 저널을 다시 읽어 a 의 변경을 봄
+    with pytest.raises(ConflictError):
+        b.put_material("ore", dict(theirs, enchant={"0": new_enchant(count=2)}))
+    assert count(b, "ore") == 1
+
+
+def test_conflict_while_save_is_queued_keeps_first_writer(tmp_path):
+    # b 의 저장이 writer 에서 기다리는 사이 a 가 같은 레코드를 먼저 저장 -> b 의 변경은 버리고 알림
+    base = str(tmp_path)
+    DataStore(base).put_materials({"ore": material(5), "bar": material(1)})
+    a, b = DataStore(base), DataStore(base)
+    queued = []
+    b.set_writer(lambda filename, prepare, on_done, on_error: queued.append((prepare, on_done)))
+    events = []
+    b.add_listener(lambda kind, keys: events.append((kind, keys)))
+    b.put_materials({"ore": dict(b.material("ore"), enchant={"0": new_enchant(count=2)}),
+                     "bar": dict(b.material("bar"), enchant={"0": new_enchant(count=8)})})
+    a.put_material("ore", dict(a.material("ore"), enchant={"0": new_enchant(count=1)}))
+    for prepare, on_done in queued:
+        result = prepare()()
+        if on_done is not None:
+            on_done(result)
+    assert ("conflicts", [("materials", "ore")]) in events
+    assert count(b, "ore") == 1
+    disk = DataStore(base)
+    assert count(disk, "ore") == 1
+    assert count(disk, "bar") == 8
@@ -0,0 +1,163 @@
+import traceback
+from collections import deque
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, QCoreApplication, pyqtSignal
+
+DEBOUNCE_MS = 500
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+
+
+class Task(QRunnable):
+    # fn(*args, **kwargs) 를 스레드풀에서 실행, 결과/에러는 시그널로 GUI 스레드에 전달
+    def __init__(self, fn, args=(), kwargs=None, with_progress=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = dict(kwargs or {})
+        self.signals = TaskSignals()
+        if with_progress:
+            self.kwargs["progress"] = self.signals.progress.emit
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc())
+        else:
+            self.signals.finished.emit(result)
+
+
+class Worker(QObject):
+    # 같은 key(파일 경로)의 작업은 제출 순서대로 하나씩만 실행, key 가 다르면 병렬
+    busy_changed = pyqtSignal(int)
+    task_failed = pyqtSignal(str)
+
+    def __init__(self, pool=None):
+        super().__init__()
+        self.pool = pool or QThreadPool.globalInstance()
+        self._queues = {}
+        self._running = set()
+        self._busy_keys = set()
+        self._pending = 0
+
+    def pending(self):
+        return self._pending
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, on_progress=None, **kwargs):
+        task = Task(fn, args, kwargs, with_progress=on_progress is not None)
+        task.signals.finished.connect(lambda result: self._done(task, key, on_done, result))
+        task.signals.failed.connect(lambda error: self._failed(task, key, on_error, error))
+        if on_progress is not None:
+            task.signals.progress.connect(on_progress)
+        self._pending += 1
+        self.busy_changed.emit(self._pending)
+        if key is None:
+            self._start(task)
+        else:
+            self._queues.setdefault(key, deque()).append(task)
+            self._next(key)
+        return task
+
+    def _start(self, task):
+        self._running.add(task)
+        self.pool.start(task)
+
+    def _next(self, key):
+        if key in self._busy_keys:
+            return
+        queue = self._queues.get(key)
+        if queue:
+            self._busy_keys.add(key)
+            self._start(queue.popleft())
+        else:
+            self._queues.pop(key, None)
+
+    def _finish(self, task, key):
+        self._running.discard(task)
+        self._pending -= 1
+        if key is not None:
+            self._busy_keys.discard(key)
+            self._next(key)
+        self.busy_changed.emit(self._pending)
+
+    def _done(self, task, key, on_done, result):
+        self._finish(task, key)
+        if on_done is not None:
+            on_done(result)
+
+    def _failed(self, task, key, on_error, error):
+        self._finish(task, key)
+        if on_error is not None:
+            on_error(error)
+        self.task_failed.emit(error)
+
+    def wait(self):
+        # 남은 작업을 모두 끝내고 완료 시그널까지 처리 (종료 직전 등)
+        while self._pending:
+            self.pool.waitForDone(100)
+            QCoreApplication.processEvents()
+
+    def write_file(self, filename, prepare, on_done=None, on_error=None):
+        # 파일 단위로 순서 보장되는 쓰기 (DataStore.set_writer 로 설치)
+        return self.submit(prepare(), key=filename, on_done=on_done, on_error=on_error)
+
+
+class DebouncedWriter(QObject):
+    # 파일별로 마지막 저장 요청 후 delay 동안 추가 요청이 없으면 한 번만 씀.
+    # 그 사이 요청들은 합쳐지고, 내용은 실제로 쓸 때의 메모리 상태로 만듦
+    def __init__(self, worker, delay_ms=DEBOUNCE_MS):
+        super().__init__()
+        self.worker = worker
+        self.delay_ms = delay_ms
+        self._waiting = {}
+        self._timers = {}
+
+    def __call__(self, filename, prepare, on_done=None, on_error=None):
+        prev = self._waiting.get(filename)
+        dones, errors = prev[1:] if prev else ([], [])
+        if on_done is not None:
+            dones.append(on_done)
+        if on_error is not None:
+            errors.append(on_error)
+        self._waiting[filename] = (prepare, dones, errors)
+        timer = self._timers.get(filename)
+        if timer is None:
+            timer = self._timers[filename] = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._write(filename))
+        timer.start(self.delay_ms)
+
+    def pending(self):
+        return len(self._waiting)
+
+    def _write(self, filename):
+        entry = self._waiting.pop(filename, None)
+        if entry is None:
+            return
+        prepare, dones, errors = entry
+        self.worker.write_file(
+            filename, prepare,
+            on_done=lambda result: [fn(result) for fn in dones],
+            on_error=lambda error: [fn(error) for fn in errors],
+        )
+
+    def flush(self):
+        # 대기 중인 저장을 지금 쓰고 끝날 때까지 기다림 (창 닫기/종료)
+        for filename in list(self._waiting):
+            self._timers[filename].stop()
+            self._write(filename)
+        self.worker.wait()
+
+
+_worker = None
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        _worker = Worker()
+    return _worker